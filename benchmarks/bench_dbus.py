@@ -0,0 +1,218 @@
+"""
+    DBusTransport against a mock NetworkManager on a private bus: checks the reads it answers, then times them.
+
+    Starts its own dbus-daemon (it must be installed; nothing touches the system bus), serves the NetworkManager
+    objects DBusTransport reads from a thread using the package's own bus client, and compares every answer with the
+    terse output nmcli prints for the same state. Exits non zero when an answer is wrong.
+
+        python benchmarks/bench_dbus.py [devices] [calls]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from nmcli.bus import DBusConnection, HeaderField, Message, MessageType, Variant  # noqa: E402
+from nmcli.transport import DBusTransport, Transport  # noqa: E402
+
+
+CONFIG = """<!DOCTYPE busconfig PUBLIC "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:path={socket}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+NM = 'org.freedesktop.NetworkManager'
+NM_PATH = '/org/freedesktop/NetworkManager'
+PROPERTIES = 'org.freedesktop.DBus.Properties'
+
+
+
+class MockNetworkManager(object):
+    """ NetworkManager's root, device, active connection and settings objects for `devices` veth pairs, one active each """
+    def __init__(self, address: str, devices: int):
+        self.devices = [f'{NM_PATH}/Devices/{i}' for i in range(devices)]
+        self.active = [f'{NM_PATH}/ActiveConnection/{i}' for i in range(devices)]
+        # one more profile than devices, never activated
+        self.settings = [f'{NM_PATH}/Settings/{i}' for i in range(devices + 1)]
+        self.bus = DBusConnection(address)
+        # when set, method calls get no reply, as from a NetworkManager that hangs
+        self.stall = False
+        self._serial = 1000
+        self._thread = None
+
+    def uuid(self, i: int) -> str:
+        return f'6d0c{i:08x}-0000-4000-8000-{i:012x}'
+
+    def objects(self) -> dict:
+        """ { (path, interface): { property: Variant } } """
+        objects = { (NM_PATH, NM): {
+                'Version': Variant('s', '1.46.0'), 'State': Variant('u', 70), 'Startup': Variant('b', False),
+                'Connectivity': Variant('u', 4), 'NetworkingEnabled': Variant('b', True),
+                'WirelessHardwareEnabled': Variant('b', True), 'WirelessEnabled': Variant('b', False),
+                'WwanHardwareEnabled': Variant('b', False), 'WwanEnabled': Variant('b', False),
+                'ActiveConnections': Variant('ao', self.active),
+                } }
+        for i, path in enumerate(self.devices):
+            objects[(path, f'{NM}.Device')] = { 'Interface': Variant('s', f'veth{i}'), 'DeviceType': Variant('u', 20),
+                                                'State': Variant('u', 100), 'ActiveConnection': Variant('o', self.active[i]) }
+        for i, path in enumerate(self.active):
+            objects[(path, f'{NM}.Connection.Active')] = { 'Id': Variant('s', f'veth {i}'), 'Uuid': Variant('s', self.uuid(i)),
+                                                           'Connection': Variant('o', self.settings[i]), 'Devices': Variant('ao', [self.devices[i]]),
+                                                           'State': Variant('u', 2) }
+        return objects
+
+    def profile(self, i: int) -> dict:
+        return { 'connection': { 'id': Variant('s', f'veth {i}'), 'uuid': Variant('s', self.uuid(i)), 'type': Variant('s', 'veth'),
+                                 'autoconnect': Variant('b', i % 2 == 0) } }
+
+    def start(self) -> 'MockNetworkManager':
+        self.bus.Call('org.freedesktop.DBus', '/org/freedesktop/DBus', 'org.freedesktop.DBus', 'RequestName', 'su', (NM, 4))
+        self._objects = self.objects()
+        self._thread = threading.Thread(target=self._serve, name='mock-networkmanager', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.bus.close()
+
+    def _serve(self):
+        bus = self.bus
+        while True:
+            try:
+                message = bus._receive()
+            except (OSError, ConnectionError, AttributeError):
+                return
+            if message.type != MessageType.method_call or self.stall: continue
+            try:
+                signature, body = self._answer(message.fields.get(HeaderField.path), message.fields.get(HeaderField.interface),
+                                               message.fields.get(HeaderField.member), message.body)
+                reply = self._reply(message, MessageType.method_return, signature, body)
+            except KeyError as e:
+                reply = self._reply(message, MessageType.error, 's', (f'no such object or property: {e}',), f'{NM}.UnknownMethod')
+            bus._socket.sendall(reply.ToBytes())
+
+    def _reply(self, message: Message, kind: int, signature: str, body: tuple, error: str = None) -> Message:
+        self._serial += 1
+        fields = { HeaderField.reply_serial: message.serial, HeaderField.destination: message.fields[HeaderField.sender] }
+        if signature: fields[HeaderField.signature] = signature
+        if error: fields[HeaderField.error_name] = error
+        return Message(kind, self._serial, fields, body)
+
+    def _answer(self, path: str, interface: str, member: str, args: tuple) -> (str, tuple):
+        if interface == PROPERTIES and member == 'GetAll': return 'a{sv}', (self._objects[(path, args[0])],)
+        if interface == PROPERTIES and member == 'Get': return 'v', (self._objects[(path, args[0])][args[1]],)
+        if (path, member) == (NM_PATH, 'GetDevices'): return 'ao', (self.devices,)
+        if (path, member) == (f'{NM_PATH}/Settings', 'ListConnections'): return 'ao', (self.settings,)
+        if member == 'GetSettings': return 'a{sa{sv}}', (self.profile(self.settings.index(path)),)
+        raise KeyError(f'{path} {interface}.{member}')
+
+
+
+class Refuse(Transport):
+    """ The fallback: counts what DBusTransport could not answer itself """
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        self.calls.append(command)
+        return 0, 'fallback\n', ''
+
+
+
+def expected(devices: int) -> dict:
+    uuid = lambda i: f'6d0c{i:08x}-0000-4000-8000-{i:012x}'
+    return {
+            ('general', 'status'): 'connected:full:enabled:disabled:disabled:disabled\n',
+            ('device', 'status'): ''.join(f'veth{i}:veth:connected:veth {i}\n' for i in range(devices)),
+            ('connection', 'show'): ''.join(f'veth {i}:{uuid(i)}:veth:' + (f'veth{i}' if i < devices else '') + '\n' for i in range(devices + 1)),
+            ('--fields', 'NAME,ACTIVE,AUTOCONNECT', 'connection', 'show'): ''.join(
+                    f'veth {i}:{"yes" if i < devices else "no"}:{"yes" if i % 2 == 0 else "no"}\n' for i in range(devices + 1)),
+            }
+
+
+def check(transport: DBusTransport, fallback: Refuse, devices: int) -> int:
+    failures = 0
+    for words, stdout in expected(devices).items():
+        retcode, output, stderr = transport.execute(['nmcli', '--terse', *words])
+        ok = retcode == 0 and output == stdout
+        failures += not ok
+        print(f'  {"ok  " if ok else "FAIL"} nmcli --terse {" ".join(words)}')
+        if not ok: print(f'       expected {stdout[:120]!r}\n       got      {output[:120]!r} {stderr!r}')
+
+    retcode, output, _ = transport.execute(['nmcli', '--terse', 'connection', 'up', 'veth 0'])
+    ok = output == 'fallback\n' and len(fallback.calls) == 1
+    failures += not ok
+    print(f'  {"ok  " if ok else "FAIL"} commands it does not serve go to the fallback')
+    return failures
+
+
+def main(devices: int = 50, calls: int = 200):
+    daemon = shutil.which('dbus-daemon')
+    if daemon is None:
+        print('dbus-daemon is not installed; nothing to run against')
+        sys.exit(2)
+
+    directory = tempfile.mkdtemp(prefix='nmcli-bus-')
+    socket = os.path.join(directory, 'bus')
+    config = os.path.join(directory, 'bus.conf')
+    with open(config, 'w') as file:
+        file.write(CONFIG.format(socket=socket))
+    bus = subprocess.Popen([daemon, f'--config-file={config}', '--nofork', '--print-address'], stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        address = bus.stdout.readline().strip()
+        service = MockNetworkManager(address, devices).start()
+        fallback = Refuse()
+        transport = DBusTransport(address=address, fallback=fallback)
+
+        print(f'mock NetworkManager on {address}, {devices} devices')
+        failures = check(transport, fallback, devices)
+
+        for words in (['general', 'status'], ['device', 'status'], ['connection', 'show']):
+            started = time.perf_counter()
+            for _ in range(calls):
+                transport.execute(['nmcli', '--terse', *words])
+            elapsed = (time.perf_counter() - started) / calls
+            print(f'  {" ".join(words):20} {elapsed * 1e3:8.2f} ms per call')
+
+        service.stall = True
+        started = time.perf_counter()
+        try:
+            transport.execute(['nmcli', '--terse', 'device', 'status'], timeout=0.5)
+            ok = False
+        except subprocess.TimeoutExpired:
+            ok = time.perf_counter() - started < 1.0 and len(fallback.calls) == 1
+        service.stall = False
+        failures += not ok
+        print(f'  {"ok  " if ok else "FAIL"} a stalled bus raises TimeoutExpired at the caller\'s timeout')
+
+        service.stop()
+        transport.execute(['nmcli', '--terse', 'device', 'status'])
+        ok = len(fallback.calls) == 2
+        failures += not ok
+        print(f'  {"ok  " if ok else "FAIL"} a read the bus cannot answer goes to the fallback')
+    finally:
+        bus.terminate()
+        bus.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print(f'{failures} failed')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
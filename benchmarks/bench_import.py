@@ -0,0 +1,58 @@
+"""
+    Import time benchmark with a regression budget, measured like `python -X importtime`.
+
+    Each scenario runs in fresh interpreters; the median of the cumulative import time of the nmcli modules is compared
+    against its budget, and the script exits with status 1 when a budget is exceeded.
+
+        python benchmarks/bench_import.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# scenario: (statement, budget in milliseconds)
+SCENARIOS = {
+        'import nmcli':                  ('import nmcli', 10.0),
+        'first command (device status)': ('from nmcli import nmcli; nmcli.devices.status', 45.0),
+        'asyncio managers':              ('from nmcli import AsyncDeviceManager', 50.0),
+        }
+
+
+def import_time(statement: str) -> float:
+    """ Milliseconds spent importing the top level modules the statement pulls in, from one -X importtime run. """
+    env = dict(os.environ, PYTHONPATH=SRC)
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+
+    total = 0
+    started = False
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'): continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not cumulative_us.strip().isdigit(): continue
+        # nested imports finish first, so the interpreter's own startup imports are skipped by waiting for the first nmcli module
+        started = started or name.strip().startswith('nmcli')
+        if started and name.startswith(' ') and not name.startswith('  '):  # top level only: nested ones are in their parent's time
+            total += int(cumulative_us)
+    return total / 1000
+
+
+def main(runs: int = 15) -> int:
+    # warm the bytecode caches so the first run does not pay for compilation
+    subprocess.run([sys.executable, '-c', 'import compileall; compileall.compile_dir(%r, quiet=1)' % SRC], check=True)
+
+    failed = False
+    for name, (statement, budget) in SCENARIOS.items():
+        times = [import_time(statement) for _ in range(runs)]
+        median = statistics.median(times)
+        over = median > budget
+        failed |= over
+        print(f'  {name:32} median {median:7.2f} ms   min {min(times):7.2f} ms   budget {budget:6.1f} ms   {"OVER BUDGET" if over else "ok"}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*map(int, sys.argv[1:2])))
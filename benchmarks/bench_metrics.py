@@ -0,0 +1,73 @@
+"""
+    Overhead benchmark: what metrics add to a command, against an in-process transport so nmcli's own time is left out.
+
+        python benchmarks/bench_metrics.py [calls]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from nmcli.base import ROOT  # noqa: E402
+from nmcli.device import DeviceManager  # noqa: E402
+from nmcli.metrics import Metrics, redact  # noqa: E402
+from nmcli.transport import Transport  # noqa: E402
+
+
+class CannedTransport(Transport):
+    stdout = ''.join(f'veth{i}:ethernet:connected:veth{i}\n' for i in range(20))
+
+    def execute(self, command: [str]) -> (int, str, str):
+        return 0, self.stdout, ''
+
+
+def run(devices: DeviceManager, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        devices.status()
+    return (time.perf_counter() - started) / calls
+
+
+# (property, redacted); checked before timing, as these reach the slow command log and every sink
+SECRETS = [('password', True), ('wifi-sec.psk', True), ('+wifi-sec.psk', True), ('802-11-wireless-security.leap-password', True),
+           ('wifi-sec.leap-password', True), ('wifi-sec.wep-key0', True), ('802-1x.password', True), ('802-1x.password-raw', True),
+           ('802-1x.private-key-password', True), ('802-1x.phase2-private-key-password', True), ('802-1x.pin', True),
+           ('gsm.pin', True), ('wireguard.private-key', True), ('vpn.secrets', True), ('ipv4.dns', False),
+           ('wifi.ssid', False), ('connection.id', False), ('802-1x.ca-cert', False), ('wifi-sec.psk-flags', True)]
+
+
+def check_redact():
+    for name, secret in SECRETS:
+        redacted = redact(['nmcli', 'con', 'modify', 'office', name, 'hunter2'])[-1] == '***'
+        assert redacted == secret, f"{name}: {'redacted' if redacted else 'shown in clear'}"
+
+    # a timeout quotes the whole argv in its message, which ends up in Invocation.error
+    argv = ['nmcli', 'connection', 'modify', 'office', 'wifi-sec.psk', 'hunter2']
+    invocation = Metrics().record(argv, 0.0, 1.0, None, error=subprocess.TimeoutExpired(argv, 1.0))
+    assert 'hunter2' not in json.dumps(invocation.ToDict()), invocation.error
+
+
+def main(calls: int = 20000):
+    check_redact()
+    transport, coalesce = ROOT.transport, ROOT.coalesce
+    ROOT.transport, ROOT.coalesce = CannedTransport(), False
+    devices = DeviceManager()
+    try:
+        run(devices, calls // 10)
+        off = min(run(devices, calls) for _ in range(3))
+        metrics = ROOT.metrics = Metrics()
+        on = min(run(devices, calls) for _ in range(3))
+    finally:
+        ROOT.transport, ROOT.coalesce, ROOT.metrics = transport, coalesce, None
+
+    print(f'{calls} `device status` calls (parse not read), in-process transport')
+    print(f'  {"metrics off":14} {off * 1e6:8.2f} us per call')
+    print(f'  {"metrics on":14} {on * 1e6:8.2f} us per call   +{(on - off) * 1e6:.2f} us')
+    print(f'  {metrics.histogram("device status")!r}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
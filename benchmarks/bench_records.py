@@ -0,0 +1,67 @@
+"""
+    Memory benchmark: slotted records (and the columnar ScanTable) against the dict per row representation,
+    measured with tracemalloc.
+
+        python benchmarks/bench_records.py [profiles] [access points]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from nmcli.constants import NMCLI_FIELDS  # noqa: E402
+from nmcli.records import ConnectionProfile, AccessPoint  # noqa: E402
+from nmcli.scan import ScanTable  # noqa: E402
+from nmcli.standard_parsers import parse_terse  # noqa: E402
+
+
+PROFILE_FIELDS = ['NAME', 'UUID', 'TYPE', 'TIMESTAMP', 'AUTOCONNECT', 'READONLY', 'ACTIVE', 'DEVICE', 'STATE']
+AP_FIELDS = NMCLI_FIELDS['dev wifi']
+
+
+def make_profiles(rows: int) -> str:
+    return ''.join(f'profile {i}:6d0c{i:08x}-0000-4000-8000-00000000{i:04x}:{("802-3-ethernet", "vlan", "802-11-wireless")[i % 3]}'
+                   f':{1600000000 + i}:yes:no:{"yes" if i % 50 == 0 else "no"}:{"eth0" if i % 50 == 0 else ""}:{"activated" if i % 50 == 0 else ""}\n'
+                   for i in range(rows))
+
+
+def make_access_points(rows: int) -> str:
+    return ''.join(f'corp-{i % 40}:00\\:11\\:22\\:{i >> 8 & 255:02X}\\:{i & 255:02X}\\:01:Infra:{(2412, 2437, 5180, 5500)[i % 4]} MHz'
+                   f':{(54, 130, 270, 540)[i % 4]} Mbit/s:{i % 100}:{("WPA2", "WPA2 802.1X", "WPA3", "")[i % 4]}:(none)'
+                   f':pair_ccmp group_ccmp psk:wlan{i % 2}:no:/org/freedesktop/NetworkManager/AccessPoint/{i}\n'
+                   for i in range(rows))
+
+
+def measure(build: callable) -> (int, object):
+    """ Bytes still allocated by what build() returns. """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, 'filename')), result
+
+
+def main(profiles: int = 5000, access_points: int = 3000):
+    cases = [
+            (f'{profiles} connection profiles', make_profiles(profiles), PROFILE_FIELDS, ConnectionProfile),
+            (f'{access_points} access points', make_access_points(access_points), AP_FIELDS, AccessPoint),
+            (f'{access_points} access points', make_access_points(access_points), AP_FIELDS, ScanTable),
+            ]
+    for name, stdout, fields, record in cases:
+        dicts, rows = measure(lambda: parse_terse(stdout, fields))
+        records, parsed = measure(lambda: record.Parse(stdout, fields))
+        # a drop-in for the dicts: the same rows, keys and strings
+        assert [row.ToDict() for row in parsed] == rows, f'{record.__name__} rows differ from the terse parser'
+        del rows, parsed
+        print(f'{name}')
+        print(f'  {"list of dicts":27} {dicts / 1024:9.1f} KiB')
+        print(f'  {record.__name__ + (" records" if record is not ScanTable else ""):27} {records / 1024:9.1f} KiB   {records / dicts:5.2f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
@@ -0,0 +1,76 @@
+"""
+    Memory benchmark: cached `device show` Results that keep their raw output against lazy Results that release it.
+
+        python benchmarks/bench_results.py [devices] [results]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from nmcli.base import ROOT  # noqa: E402
+from nmcli.device import _DevShowCommand  # noqa: E402
+from nmcli.results import Result  # noqa: E402
+
+
+def make_device_show(devices: int, seed: int) -> str:
+    lines = []
+    for i in range(devices):
+        lines += [f'GENERAL.DEVICE:veth{seed}-{i}', 'GENERAL.TYPE:veth', 'GENERAL.HWADDR:02\\:42\\:AC\\:11\\:00\\:02', 'GENERAL.MTU:1500',
+                  'GENERAL.STATE:100 (connected)', f'GENERAL.CONNECTION:veth{i}', f'GENERAL.CON-PATH:/org/freedesktop/NetworkManager/ActiveConnection/{i}']
+        lines += [f'IP4.ADDRESS[{k}]:10.{seed % 250}.{k}.{i % 250}/24' for k in range(1, 9)]
+        lines += [f'IP6.ROUTE[{k}]:dst = fe80::/64\\, nh = ::\\, mt = {k}' for k in range(1, 9)]
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def measure(build: callable) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del kept
+    return sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+
+
+def main(devices: int = 250, results: int = 20):
+    parser = _DevShowCommand._show_parser
+    root = ROOT('device')
+
+    def read(result: Result):
+        # what a status check reads before the Result sits in the cache
+        for record in result.data.values():
+            record['GENERAL']['STATE']
+
+    def eager() -> [Result]:
+        # the previous behaviour: parsed up front, stdout and stderr kept alongside the data
+        cached = []
+        for seed in range(results):
+            stdout = make_device_show(devices, seed)
+            result = Result(parser(stdout, ''), 0, stdout, '')
+            read(result)
+            cached.append(result)
+        return cached
+
+    def lazy() -> [Result]:
+        cached = []
+        for seed in range(results):
+            result = root._handle_output(0, make_device_show(devices, seed), '', parser=parser)
+            read(result)
+            cached.append(result)
+        return cached
+
+    size = len(make_device_show(devices, 0))
+    old, new = measure(eager), measure(lazy)
+    print(f'{results} cached `device show` Results, {devices} devices ({size / 1024:.0f} KiB of output) each')
+    print(f'  {"raw output kept":27} {old / 1024:9.1f} KiB')
+    print(f'  {"lazy, raw output released":27} {new / 1024:9.1f} KiB   {new / old:5.2f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
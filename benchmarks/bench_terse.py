@@ -0,0 +1,139 @@
+"""
+    Microbenchmark: parsing 10k rows of nmcli output, the baseline code against what replaced it, command by command.
+
+    The baseline functions below are copied unchanged from the tree before the shared TerseParser (print() included).
+    They were written for nmcli's space padded table and are fed that; the current code is fed the `--terse` output
+    nmcli is actually run with. Both sides return the same shape.
+
+        python benchmarks/bench_terse.py [rows]
+"""
+import contextlib
+import io
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from nmcli.device import _DevStatusCommand  # noqa: E402
+from nmcli.standard_parsers import TerseParser, row_parser  # noqa: E402
+
+
+CONNECTION_FIELDS = ['NAME', 'UUID', 'TYPE', 'DEVICE']
+PERMISSION_FIELDS = ['PERMISSION', 'VALUE']
+DEVICE_FIELDS = ['DEVICE', 'TYPE', 'STATE', 'CONNECTION']
+
+
+def make_connections(rows: int) -> str:
+    lines = []
+    for i in range(rows):
+        name = f'vlan\\:{i}' if i % 10 == 0 else f'profile {i}'  # every 10th name carries an escaped ':'
+        lines.append(f'{name}:6d0c{i:08x}-0000-4000-8000-00000000{i:04x}:vlan:eth{i % 8}')
+    return '\n'.join(lines) + '\n'
+
+
+def make_permissions(rows: int, terse: bool) -> str:
+    lines = [] if terse else ['PERMISSION  VALUE']
+    for i in range(rows):
+        lines.append(f'org.freedesktop.NetworkManager.permission{i}' + (':' if terse else '  ') + ('yes' if i % 2 else 'auth'))
+    return '\n'.join(lines) + '\n'
+
+
+def make_devices(rows: int, terse: bool) -> str:
+    lines = [] if terse else ['DEVICE  TYPE  STATE  CONNECTION']
+    for i in range(rows):
+        lines.append((':' if terse else '  ').join([f'veth{i}', 'ethernet', 'connected', f'veth{i}']))
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------------- the baseline code, unchanged
+
+_splitter = re.compile(r'(?<!\\):')
+
+def baseline_execute_nmcli_rows(stdout: str, fields: list) -> list:
+    """ The terse branch of the baseline ROOT._execute_nmcli, with self._splitter """
+    data = []
+    for line in stdout.split('\n'):
+        values = _splitter.split(line)
+        if len(values) == len(fields):
+            row = dict(zip(fields, values))
+            data.append(row)
+    return data
+
+
+def baseline_row_parser(stdout: str, headers: list or tuple) -> dict:
+    l = []
+    for row in stdout.strip().split('\n'):
+        if any(header in row for header in headers): continue
+        l.append(row.split())
+    d = { }
+    for row in l:
+        key, value = row
+        d[key] = value
+    return d
+
+
+def baseline_dev_status_parser(stdout: str, headers: list or tuple) -> dict:
+    l = []
+    for row in stdout.strip().split('\n'):
+        if any(header in row for header in headers): continue
+        l.append(row.split())
+
+    d = { }
+    for row in l:
+        print(row)
+        DEVICE, TYPE, STATE, *CONNECTION = row
+        d[DEVICE] = {
+                'TYPE':       TYPE,
+                'STATE':      STATE,
+                'CONNECTION': ' '.join(CONNECTION),
+                }
+    return d
+
+
+def quiet(parse: callable) -> callable:
+    def run(*args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return parse(*args)
+    return run
+
+
+def main(rows: int = 10000, repeat: int = 5, number: int = 10):
+    connections = make_connections(rows)
+    permissions, permissions_table = make_permissions(rows, True), make_permissions(rows, False)
+    devices, devices_table = make_devices(rows, True), make_devices(rows, False)
+    parser = TerseParser(CONNECTION_FIELDS)
+
+    assert parser(connections)[0]['NAME'] == 'vlan:0', 'escaped values must be unescaped'
+    assert len(parser(connections)) == rows
+    assert row_parser(permissions, PERMISSION_FIELDS) == baseline_row_parser(permissions_table, PERMISSION_FIELDS)
+    assert len(_DevStatusCommand._parser(devices, DEVICE_FIELDS)) == rows
+
+    commands = [
+            ('connection show (rows as dicts)', [
+                    ('baseline ROOT._execute_nmcli', lambda: baseline_execute_nmcli_rows(connections, CONNECTION_FIELDS)),
+                    ('TerseParser', lambda: parser(connections)),
+                    ('TerseParser.rows (lists)', lambda: parser.rows(connections)),
+                    ]),
+            ('general permissions (row_parser)', [
+                    ('baseline row_parser', lambda: baseline_row_parser(permissions_table, PERMISSION_FIELDS)),
+                    ('row_parser', lambda: row_parser(permissions, PERMISSION_FIELDS)),
+                    ]),
+            ('device status', [
+                    ('baseline _DevStatusCommand._parser', lambda: quiet(baseline_dev_status_parser)(devices_table, DEVICE_FIELDS)),
+                    ('_DevStatusCommand._parser', lambda: _DevStatusCommand._parser(devices, DEVICE_FIELDS)),
+                    ]),
+            ]
+    print(f'{rows} rows, best of {repeat} x {number} runs; speedup against the baseline of each command')
+    for command, cases in commands:
+        print(f'  {command}')
+        baseline = None
+        for name, case in cases:
+            best = min(timeit.repeat(case, repeat=repeat, number=number)) / number
+            baseline = baseline or best
+            print(f'    {name:36} {best * 1e3:8.2f} ms   {baseline / best:5.2f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,140 @@
+"""
+    Behaviour checks for DBusTransport, run through the public commands against the mock NetworkManager of
+    bench_dbus.py on a private dbus-daemon. The repo has no test suite, so these are plain asserts; any failure
+    stops the script with a traceback and a non zero exit.
+
+        python benchmarks/check_dbus.py
+"""
+import asyncio
+import contextlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bench_dbus import CONFIG, MockNetworkManager, Refuse  # noqa: E402
+from nmcli import nmcli  # noqa: E402
+from nmcli.aio import AsyncDeviceManager  # noqa: E402
+from nmcli.base import ROOT, NetWorkManagerException  # noqa: E402
+from nmcli.records import ConnectionProfile, Device  # noqa: E402
+from nmcli.transport import DBusTransport  # noqa: E402
+
+
+DEVICES = 3
+
+
+@contextlib.contextmanager
+def private_bus():
+    """ The address of a dbus-daemon of its own, stopped on exit """
+    directory = tempfile.mkdtemp(prefix='nmcli-bus-')
+    config = os.path.join(directory, 'bus.conf')
+    with open(config, 'w') as file:
+        file.write(CONFIG.format(socket=os.path.join(directory, 'bus')))
+    daemon = subprocess.Popen([shutil.which('dbus-daemon'), f'--config-file={config}', '--nofork', '--print-address'],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    try:
+        yield daemon.stdout.readline().strip()
+    finally:
+        daemon.terminate()
+        daemon.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def check_device_status(fallback: Refuse):
+    data = nmcli.devices.status().data
+    assert list(data) == [f'veth{i}' for i in range(DEVICES)], data
+    assert all(isinstance(device, Device) for device in data.values())
+    assert data['veth1'].ToDict() == { 'DEVICE': 'veth1', 'TYPE': 'veth', 'STATE': 'connected', 'CONNECTION': 'veth 1' }, data['veth1']
+    assert not fallback.calls, 'device status must be served over the bus'
+
+
+def check_connection_show(fallback: Refuse):
+    profiles = nmcli.connections.Show().data
+    assert [profile.name for profile in profiles] == [f'veth {i}' for i in range(DEVICES + 1)], profiles
+    assert all(isinstance(profile, ConnectionProfile) for profile in profiles)
+    assert profiles[0].uuid == '6d0c00000000-0000-4000-8000-000000000000' and profiles[0].type == 'veth'
+    assert profiles[0]['TIMESTAMP-REAL'] == 'never'
+    assert not fallback.calls, 'connection show must be served over the bus'
+
+
+def check_general_status(fallback: Refuse):
+    status = nmcli.general.status().data
+    assert status == { 'STATE': 'connected', 'CONNECTIVITY': 'full', 'WIFI-HW': 'enabled', 'WIFI': 'disabled', 'WWAN-HW': 'disabled',
+                       'WWAN': 'disabled' }, status
+    assert not fallback.calls, 'general status must be served over the bus'
+
+
+def check_invalid_field(transport: DBusTransport):
+    retcode, stdout, stderr = transport.execute(['nmcli', '--terse', '--fields', 'DEVICE,NOT-A-FIELD', 'device', 'status'])
+    assert retcode == 2 and stdout == '' and "invalid field 'NOT-A-FIELD'" in stderr, (retcode, stdout, stderr)
+    try:
+        nmcli.devices.status(fields=['DEVICE', 'NOT-A-FIELD'])
+    except NetWorkManagerException as e:
+        assert e.data['retcode'] == 2, e.data
+    else:
+        raise AssertionError('an invalid field must fail as nmcli does')
+
+
+def check_fallback(transport: DBusTransport, fallback: Refuse):
+    assert transport.execute(['nmcli', '--terse', 'connection', 'up', 'veth 0']) == (0, 'fallback\n', '')
+    assert fallback.calls == [['nmcli', '--terse', 'connection', 'up', 'veth 0']], fallback.calls
+    fallback.calls.clear()
+
+
+def check_async():
+    async def run():
+        devices = AsyncDeviceManager()
+        return (await devices.status()).data
+    data = asyncio.run(run())
+    assert list(data) == [f'veth{i}' for i in range(DEVICES)], data
+
+
+def check_timeout(transport: DBusTransport, service: MockNetworkManager, fallback: Refuse):
+    service.stall = True
+    started = time.monotonic()
+    try:
+        transport.execute(['nmcli', '--terse', 'device', 'status'], timeout=0.5)
+    except subprocess.TimeoutExpired:
+        elapsed = time.monotonic() - started
+        assert elapsed < 1.5, f'timed out after {elapsed:.2f}s instead of 0.5s'
+    else:
+        raise AssertionError('a stalled bus must time out')
+    finally:
+        service.stall = False
+    assert not fallback.calls, 'a read past its timeout must not be retried through nmcli'
+    assert nmcli.general.status().data['STATE'] == 'connected', 'the transport must reconnect after a timeout'
+
+
+def check_bus_gone(service: MockNetworkManager, fallback: Refuse):
+    service.stop()
+    assert nmcli.devices.status().data == { }, 'the fallback answered, with its own output'
+    assert len(fallback.calls) == 1 and fallback.calls[0][-2:] == ['device', 'status'], fallback.calls
+
+
+def main():
+    if shutil.which('dbus-daemon') is None:
+        print('dbus-daemon is not installed; these checks need one')
+        sys.exit(2)
+
+    transport = ROOT.transport
+    with private_bus() as address:
+        service = MockNetworkManager(address, DEVICES).start()
+        fallback = Refuse()
+        dbus = DBusTransport(address=address, fallback=fallback)
+        nmcli.set_transport(dbus)
+        try:
+            for check, args in [(check_device_status, (fallback,)), (check_connection_show, (fallback,)), (check_general_status, (fallback,)),
+                                (check_invalid_field, (dbus,)), (check_fallback, (dbus, fallback)), (check_async, ()),
+                                (check_timeout, (dbus, service, fallback)), (check_bus_gone, (service, fallback))]:
+                check(*args)
+                print(f'ok  {check.__name__}')
+        finally:
+            nmcli.set_transport(transport)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+    Behaviour checks for bulk provisioning (keyfile.provision), against a temporary directory and a stub nmcli put
+    first on PATH. The repo has no test suite, so these are plain asserts; any failure stops the script with a
+    traceback and a non zero exit.
+
+        python benchmarks/check_provision.py
+"""
+import asyncio
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from nmcli import nmcli  # noqa: E402
+from nmcli.aio import AsyncConnectionManager  # noqa: E402
+from nmcli.base import ROOT  # noqa: E402
+from nmcli.keyfile import loads  # noqa: E402
+from nmcli.transport import SubprocessTransport  # noqa: E402
+
+
+# logs every command, leading options dropped; `con load` refuses files containing 'reject' the way nmcli reports it,
+# and fails as a whole when it loaded none
+STUB = """#!/usr/bin/env python3
+import json, sys
+args = sys.argv[1:]
+while args and args[0].startswith('-'): args = args[2:] if args[0] == '--fields' else args[1:]
+with open({log!r}, 'a') as log: log.write(json.dumps(args) + '\\n')
+if args[:2] == ['con', 'load']:
+    files = args[2:]
+    rejected = [path for path in files if 'reject' in open(path).read()]
+    for path in rejected: print(f"Could not load file '{{path}}'", file=sys.stderr)
+    sys.exit(1 if rejected and len(rejected) == len(files) else 0)
+"""
+
+
+def profile(n: int, **extra) -> dict:
+    return { 'connection': { 'id': f'vlan{n}', 'type': 'vlan', **extra }, 'vlan': { 'id': n, 'parent': 'eth0' },
+             'ipv4': { 'method': 'manual', 'address1': f'10.{n % 250}.0.2/24', 'dns': ['10.0.0.53', '10.0.0.54'] } }
+
+
+class Stub(object):
+    def __init__(self, directory: str):
+        self.bin = os.path.join(directory, 'bin')
+        self.log = os.path.join(directory, 'calls.jsonl')
+        os.makedirs(self.bin)
+        path = os.path.join(self.bin, 'nmcli')
+        with open(path, 'w') as file:
+            file.write(STUB.format(log=self.log))
+        os.chmod(path, 0o755)
+
+    def calls(self) -> [[str]]:
+        """ The command of every nmcli run since the last call, without its leading options """
+        if not os.path.exists(self.log): return []
+        with open(self.log) as file:
+            calls = [json.loads(line) for line in file]
+        os.unlink(self.log)
+        return calls
+
+
+def check_one_load(stub: Stub, directory: str):
+    report = nmcli.connections.provision([profile(n) for n in range(100, 150)], directory)
+    assert report.ok and len(report.loaded) == 50, report.ToDict()
+    calls = stub.calls()
+    assert len(calls) == 1 and calls[0][:2] == ['con', 'load'], calls
+    assert calls[0][2:] == [entry.path for entry in report.profiles], 'one load, of every file, in order'
+
+
+def check_files(stub: Stub, directory: str):
+    report = nmcli.connections.provision([profile(7, uuid='0b5d1a4c-0000-4000-8000-000000000007')], directory)
+    stub.calls()
+    path = report.profiles[0].path
+    assert path == os.path.join(directory, 'vlan7.nmconnection'), path
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600, oct(os.stat(path).st_mode)
+    with open(path) as file:
+        text = file.read()
+    assert text.startswith('[connection]\n'), text
+    grouped = loads(text)
+    assert grouped['connection'] == { 'id': 'vlan7', 'type': 'vlan', 'uuid': '0b5d1a4c-0000-4000-8000-000000000007' }, grouped
+    assert grouped['vlan'] == { 'id': '7', 'parent': 'eth0' }, grouped
+    assert grouped['ipv4']['dns'] == ['10.0.0.53', '10.0.0.54'] and grouped['ipv4']['address1'] == '10.7.0.2/24', grouped
+    assert not [name for name in os.listdir(directory) if name.startswith('.')], 'temporary files left behind'
+
+
+def check_invalid_profile(stub: Stub, directory: str):
+    report = nmcli.connections.provision([profile(200), { 'connection': { 'id': 'no-type' } }, profile(201)], directory)
+    bad = report.profiles[1]
+    assert not bad.ok and 'connection.type' in bad.error and bad.path is None, bad
+    assert [entry.ok for entry in report.profiles] == [True, False, True]
+    calls = stub.calls()
+    assert len(calls) == 1 and calls[0][2:] == [report.profiles[0].path, report.profiles[2].path], calls
+
+
+def check_load_failures(stub: Stub, directory: str):
+    rejected = profile(300)
+    rejected['connection']['id'] = 'reject-me'
+    report = nmcli.connections.provision([profile(301), rejected], directory)
+    assert not report.ok and report.error is None, report.ToDict()
+    assert report.profiles[0].ok and report.profiles[1].error == 'NetworkManager could not load the file', report.profiles
+    assert len(stub.calls()) == 1
+
+    report = nmcli.connections.provision([rejected], directory)
+    assert report.error is not None and report.profiles[0].error.startswith('load failed'), report.ToDict()
+    stub.calls()
+
+
+def check_no_overwrite(stub: Stub, directory: str):
+    os.makedirs(directory)
+    other = os.path.join(directory, 'office.nmconnection')
+    text = '[connection]\nid=office\nuuid=11111111-1111-4111-8111-111111111111\ntype=ethernet\n'
+    with open(other, 'w') as file:
+        file.write(text)
+
+    office = { 'connection': { 'id': 'office', 'type': 'vlan', 'uuid': '22222222-2222-4222-8222-222222222222' } }
+    report = nmcli.connections.provision([office], directory)
+    with open(other) as file:
+        assert file.read() == text, "another profile's keyfile was overwritten"
+    assert report.profiles[0].path == os.path.join(directory, 'office-22222222.nmconnection'), report.profiles
+
+    # the profile's own file is replaced in place
+    office['vlan'] = { 'id': 5, 'parent': 'eth1' }
+    again = nmcli.connections.provision([office], directory)
+    assert again.profiles[0].path == report.profiles[0].path, again.profiles
+    with open(again.profiles[0].path) as file:
+        assert loads(file.read())['vlan']['parent'] == 'eth1'
+    stub.calls()
+
+
+def check_reload(stub: Stub, directory: str):
+    report = nmcli.connections.provision([profile(400), profile(401)], directory, reload=True)
+    assert report.ok, report.ToDict()
+    assert stub.calls() == [['con', 'reload']]
+
+
+def check_async(stub: Stub, directory: str):
+    report = asyncio.run(AsyncConnectionManager().provision([profile(n) for n in range(500, 510)], directory))
+    assert report.ok and len(report.loaded) == 10, report.ToDict()
+    calls = stub.calls()
+    assert len(calls) == 1 and len(calls[0]) == 12, calls
+
+
+def main():
+    root = tempfile.mkdtemp(prefix='nmcli-provision-')
+    transport, cache, coalesce = ROOT.transport, ROOT.cache, ROOT.coalesce
+    path = os.environ.get('PATH', '')
+    try:
+        stub = Stub(root)
+        os.environ['PATH'] = stub.bin + os.pathsep + path
+        ROOT.transport, ROOT.cache, ROOT.coalesce = SubprocessTransport(), None, False
+        for check in (check_one_load, check_files, check_invalid_profile, check_load_failures, check_no_overwrite, check_reload, check_async):
+            directory = os.path.join(root, check.__name__)
+            check(stub, directory)
+            print(f'ok  {check.__name__}')
+    finally:
+        os.environ['PATH'] = path
+        ROOT.transport, ROOT.cache, ROOT.coalesce = transport, cache, coalesce
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
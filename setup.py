@@ -5,12 +5,13 @@ from src.nmcli.__version__ import version
 
 
 data_files = [
-        'PySwitchCase/*.py'
+        'PySwitchCase/*.py',
+        'resources/*.txt',
         ]
 setup(
         name='Python-NetworkManagerCLI',
         version=version,
-        packages=['nmcli'],
+        packages=['nmcli', 'nmcli.resources'],
         url='https://github.com/Jakar510/PyNMCLI',
         license='GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007',
         author='Tyler Stegmaier',
@@ -0,0 +1,65 @@
+"""
+    asyncio variants of the managers.
+
+    Every command exposed by these returns an awaitable Result; nmcli is spawned with asyncio.create_subprocess_exec,
+    so many invocations can be in flight on one event loop without a thread per call.
+
+        devices = AsyncDeviceManager()
+        result = await devices.status()
+"""
+from .connection import ConnectionManager
+from .device import DeviceManager
+from .general import GeneralCommand
+from .misc import RadioTransmissionControlCommand, MonitorCommand
+from .status import NetworkControlCommand
+
+
+___all__ = ['AsyncConnectionManager', 'AsyncDeviceManager', 'AsyncGeneralCommand', 'AsyncRadioTransmissionControlCommand', 'AsyncNetworkControlCommand', 'AsyncMonitorCommand']
+
+
+
+
+class AsyncConnectionManager(ConnectionManager):
+    __doc__ = ConnectionManager.__doc__
+    def __init__(self):
+        super().__init__(asynchronous=True)
+
+
+
+class AsyncDeviceManager(DeviceManager):
+    __doc__ = DeviceManager.__doc__
+    def __init__(self):
+        super().__init__(asynchronous=True)
+
+
+
+class AsyncGeneralCommand(GeneralCommand):
+    __doc__ = GeneralCommand.__doc__
+    def __init__(self):
+        super().__init__(asynchronous=True)
+
+
+
+class AsyncRadioTransmissionControlCommand(RadioTransmissionControlCommand):
+    __doc__ = RadioTransmissionControlCommand.__doc__
+    def __init__(self):
+        super().__init__(asynchronous=True)
+
+
+
+class AsyncNetworkControlCommand(NetworkControlCommand):
+    __doc__ = NetworkControlCommand.__doc__
+    def __init__(self):
+        super().__init__(asynchronous=True)
+
+
+
+class AsyncMonitorCommand(MonitorCommand):
+    """
+        `nmcli monitor` as an async iterator of events:
+
+            async with AsyncMonitorCommand()() as events:
+                async for event in events: ...
+    """
+    def __init__(self):
+        super().__init__(asynchronous=True)
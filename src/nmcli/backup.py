@@ -0,0 +1,345 @@
+"""
+    Backups of every connection profile into one archive, written as the profiles are read.
+
+        report = nmcli.connections.backup('/var/backups/nm/monday.tar.gz')
+        report = nmcli.connections.backup('/var/backups/nm/tuesday.tar.gz', previous='/var/backups/nm/monday.tar.gz')
+        report.written, report.unchanged, report.failed
+
+    A profile is stored as its keyfile when NetworkManager keeps one this process can read (the FILENAME column of
+    `connection show`), else as its properties from `connection show uuid ...`, one call per DETAILS_CHUNK profiles.
+    VPN and WireGuard profiles also get their `connection export` configuration. Reads and exports run on a bounded
+    pool and every result is written as soon as it arrives, so memory holds a chunk per worker, not the whole backup.
+
+    Archives are tar (.tar, .tar.gz or .tgz, .tar.xz, .tar.bz2) holding profiles/<uuid>.nmconnection or .json,
+    vpn/<uuid>.conf and a trailing manifest.json; or NDJSON (.ndjson, .ndjson.gz), one object per line with the manifest
+    last. The archive is written under a temporary name, readable by its owner only, and renamed once complete.
+
+    With previous, only the profiles whose TIMESTAMP or content hash differ from the previous manifest are written, and
+    unchanged VPN profiles are not exported again. The manifest still lists every profile with the archive holding it,
+    so a chain of incremental archives restores to the latest state.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+from collections import deque
+
+
+___all__ = ['Backup', 'BackupReport', 'read_manifest', 'MANIFEST']
+
+
+
+MANIFEST = 'manifest.json'
+# suffix: tarfile mode
+_tar_modes = (('.tar.gz', 'w:gz'), ('.tgz', 'w:gz'), ('.tar.xz', 'w:xz'), ('.tar.bz2', 'w:bz2'), ('.tar', 'w'))
+# profile types `connection export` supports
+_exportable = ('vpn', 'wireguard')
+_list_fields = ['NAME', 'UUID', 'TYPE', 'TIMESTAMP', 'FILENAME']
+
+
+
+
+def _format(path: str) -> (str, str or None):
+    """ ('tar', mode) or ('ndjson', None) for an archive path """
+    name = path.lower()
+    for suffix, mode in _tar_modes:
+        if name.endswith(suffix): return 'tar', mode
+    if name.endswith('.ndjson') or name.endswith('.ndjson.gz'): return 'ndjson', None
+    raise ValueError(f"unknown archive type '{path}'; use .tar[.gz|.xz|.bz2], .tgz or .ndjson[.gz]")
+
+
+def read_manifest(path: str) -> dict:
+    """ The manifest of an archive written by Backup """
+    kind, _ = _format(path)
+    if kind == 'tar':
+        with tarfile.open(path, 'r:*') as tar:
+            member = tar.extractfile(MANIFEST)
+            if member is None: raise ValueError(f'{path} has no {MANIFEST}')
+            return json.load(member)
+
+    manifest = None
+    with (gzip.open(path, 'rt', encoding='utf-8') if path.lower().endswith('.gz') else open(path, encoding='utf-8')) as f:
+        for line in f:
+            if line.startswith('{"manifest"'): manifest = json.loads(line)['manifest']
+    if manifest is None: raise ValueError(f'{path} has no manifest')
+    return manifest
+
+
+
+class _Writer(object):
+    """ Appends to a tar or NDJSON archive under a temporary name; close() renames it into place. """
+    def __init__(self, path: str):
+        self.path = path
+        self.kind, mode = _format(path)
+        fd, self._tmp = tempfile.mkstemp(prefix='.nmcli-backup-', dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        if self.kind == 'tar': self._out = tarfile.open(self._tmp, mode)
+        elif path.lower().endswith('.gz'): self._out = gzip.open(self._tmp, 'wt', encoding='utf-8')
+        else: self._out = open(self._tmp, 'w', encoding='utf-8')
+
+    def write(self, member: str, data: bytes, record: dict):
+        """ member and data go into a tar, record into NDJSON """
+        if self.kind == 'tar':
+            info = tarfile.TarInfo(member)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            info.mode = 0o600
+            self._out.addfile(info, io.BytesIO(data))
+        else:
+            self._out.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def close(self, manifest: dict):
+        self.write(MANIFEST, json.dumps(manifest, indent=1, sort_keys=True).encode(), { 'manifest': manifest })
+        self._out.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        try:
+            self._out.close()
+        finally:
+            if os.path.exists(self._tmp): os.unlink(self._tmp)
+
+
+
+class _Profile(object):
+    __slots__ = ['uuid', 'name', 'type', 'timestamp', 'filename']
+    def __init__(self, listed: 'ConnectionProfile'):
+        self.uuid = listed.uuid
+        self.name = listed.name
+        self.type = listed.type
+        self.timestamp = listed.Number('TIMESTAMP')
+        self.filename = listed.filename
+
+
+
+class BackupReport(object):
+    """ What a backup wrote. failed maps the uuids that could not be read or exported to why. """
+    def __init__(self, path: str, manifest: dict, written: int, unchanged: int, exported: int, failed: dict, elapsed: float, reads: int):
+        self.path = path
+        self.manifest = manifest
+        self.written = written
+        self.unchanged = unchanged
+        self.exported = exported
+        self.failed = failed
+        self.elapsed = elapsed
+        # nmcli calls made
+        self.reads = reads
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    @property
+    def profiles(self) -> int:
+        return len(self.manifest['profiles'])
+
+    def ToDict(self) -> dict:
+        return { 'path': self.path, 'profiles': self.profiles, 'written': self.written, 'unchanged': self.unchanged, 'exported': self.exported,
+                 'failed': dict(self.failed), 'elapsed': self.elapsed, 'reads': self.reads, 'base': self.manifest.get('base') }
+
+    def __repr__(self) -> str:
+        return (f"<{self.__class__.__name__} : {self.path} {self.profiles} profiles, {self.written} written, {self.unchanged} unchanged, "
+                f"{len(self.failed)} failed, {self.elapsed:.2f}s>")
+
+
+
+class Backup(object):
+    """
+        One backup run. run() serves a synchronous ConnectionManager, arun() an asynchronous one.
+    """
+    def __init__(self, path: str, connections: 'ConnectionManager', previous: str = None, max_workers: int = None, vpn: bool = True,
+                 secrets: bool = False, chunk: int = None):
+        """
+        :param previous: the archive to be incremental to
+        :param vpn: also export VPN and WireGuard profiles in their native format
+        :param secrets: read properties with --show-secrets (keyfiles hold whatever secrets they hold)
+        :param chunk: profiles per details call
+        """
+        from .concurrency import DEFAULT_MAX_WORKERS
+        from .reconcile import DETAILS_CHUNK
+        _format(path)
+        if max_workers is not None and max_workers < 1: raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+        self.path = path
+        self.connections = connections
+        self.previous = previous
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.vpn = vpn
+        self.secrets = secrets
+        self.chunk = chunk or DETAILS_CHUNK
+        self.reads = 0
+
+        self._base = { }
+        self._manifest = { }
+        self._failed = { }
+        self._written = self._unchanged = self._exported = 0
+        self._writer = None
+
+    # -------------------------------------------------------------------------------- planning
+
+    def _tasks(self, listed: ['ConnectionProfile']) -> deque:
+        """ The first reads: keyfile chunks, and details chunks for the profiles without a readable keyfile """
+        from .connection import _ConnShowCommand
+        if self.previous is not None:
+            base = read_manifest(self.previous)
+            self._base = base.get('profiles', { })
+        profiles = [_Profile(listed) for listed in listed]
+        keyfiles = [profile for profile in profiles if profile.filename and os.access(profile.filename, os.R_OK)]
+        readable = { profile.uuid for profile in keyfiles }
+        shown = { profile.uuid: profile for profile in profiles if profile.uuid not in readable }
+
+        tasks = deque(('keyfiles', keyfiles[start:start + self.chunk]) for start in range(0, len(keyfiles), self.chunk))
+        names = { uuid: profile.name for uuid, profile in shown.items() }
+        tasks += (('details', [shown[uuid] for uuid in chunk]) for chunk in _ConnShowCommand.Chunks(list(shown), names, self.chunk))
+        return tasks
+
+    # -------------------------------------------------------------------------------- reading
+
+    @staticmethod
+    def _read_keyfiles(profiles: [_Profile]) -> [(_Profile, bytes or Exception)]:
+        read = []
+        for profile in profiles:
+            try:
+                with open(profile.filename, 'rb') as f:
+                    read.append((profile, f.read()))
+            except OSError as e:
+                read.append((profile, e))
+        return read
+
+    def _show(self, profiles: [_Profile]):
+        return self.connections.Show([profile.uuid for profile in profiles], uuid=True, fields=['profile'], show_secrets=self.secrets or None)
+
+    def _export(self, profile: _Profile):
+        return self.connections.Export(profile.uuid, uuid=True)
+
+    def _run_task(self, kind: str, payload):
+        if kind == 'keyfiles': return self._read_keyfiles(payload)
+        if kind == 'details': return self._show(payload).data
+        return self._export(payload).data
+
+    async def _arun_task(self, kind: str, payload):
+        import asyncio
+        if kind == 'keyfiles': return await asyncio.get_running_loop().run_in_executor(None, self._read_keyfiles, payload)
+        if kind == 'details': return (await self._show(payload)).data
+        return (await self._export(payload)).data
+
+    # -------------------------------------------------------------------------------- writing
+
+    def _store(self, profile: _Profile, source: str, data: bytes, record: dict) -> [(str, _Profile)]:
+        """ Writes profile unless the previous archive has it unchanged; returns the exports it needs """
+        digest = hashlib.sha256(data).hexdigest()
+        old = self._base.get(profile.uuid)
+        if old is not None and old.get('hash') == digest and old.get('timestamp') == profile.timestamp:
+            self._manifest[profile.uuid] = dict(old)
+            self._unchanged += 1
+            return []
+
+        member = f'profiles/{profile.uuid}.{"nmconnection" if source == "keyfile" else "json"}'
+        entry = { 'uuid': profile.uuid, 'name': profile.name, 'type': profile.type, 'timestamp': profile.timestamp, 'hash': digest, 'source': source }
+        self._writer.write(member, data, { **entry, source: record })
+        self._manifest[profile.uuid] = { **entry, 'archive': os.path.basename(self.path), 'member': member if self._writer.kind == 'tar' else None }
+        self._written += 1
+        return [('export', profile)] if self.vpn and profile.type in _exportable else []
+
+    def _fail(self, profile: _Profile, error: str):
+        self._failed[profile.uuid] = error
+        # what the previous archive has is still the best copy
+        if profile.uuid in self._base: self._manifest[profile.uuid] = dict(self._base[profile.uuid])
+
+    def _handle(self, kind: str, payload, result=None, error: Exception = None) -> [(str, object)]:
+        """ Writes what a task read; returns the tasks that follow from it """
+        from .base import NetWorkManagerException
+        if kind != 'keyfiles': self.reads += 1
+        if error is not None:
+            message = str(error)
+            if isinstance(error, NetWorkManagerException) and isinstance(error.data, dict): message = (error.data.get('stderr') or '').strip() or message
+            if kind == 'export':
+                self._failed[payload.uuid] = f'export: {message}'
+            else:
+                for profile in payload: self._fail(profile, message)
+            return []
+
+        follow = []
+        if kind == 'keyfiles':
+            for profile, data in result:
+                if isinstance(data, Exception): self._fail(profile, str(data))
+                else: follow += self._store(profile, 'keyfile', data, data.decode('utf-8', errors='replace'))
+        elif kind == 'details':
+            records = { record['connection']['uuid']: record for record in result.values() }
+            for profile in payload:
+                record = records.get(profile.uuid)
+                if record is None:
+                    self._fail(profile, 'not in the details nmcli returned')
+                    continue
+                properties = record.ToDict()
+                follow += self._store(profile, 'properties', json.dumps(properties, sort_keys=True).encode(), properties)
+        else:
+            config = (result or { }).get('config') or ''
+            member = f'vpn/{payload.uuid}.conf'
+            self._writer.write(member, config.encode(), { 'uuid': payload.uuid, 'export': config })
+            if self._writer.kind == 'tar': self._manifest[payload.uuid]['export'] = member
+            self._exported += 1
+        return follow
+
+    def _finish(self, started: float) -> BackupReport:
+        manifest = {
+                'version': 1,
+                'created': time.time(),
+                'archive': os.path.basename(self.path),
+                'base': None if self.previous is None else os.path.basename(self.previous),
+                'profiles': self._manifest,
+                }
+        self._writer.close(manifest)
+        return BackupReport(self.path, manifest, self._written, self._unchanged, self._exported, self._failed, time.monotonic() - started, self.reads)
+
+    # -------------------------------------------------------------------------------- running
+
+    def run(self) -> BackupReport:
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        started = time.monotonic()
+        self.reads += 1
+        tasks = self._tasks(self.connections.Show(fields=_list_fields).data)
+        self._writer = _Writer(self.path)
+        try:
+            running = { }
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='nmcli-backup') as pool:
+                while tasks or running:
+                    # at most max_workers reads in flight, so at most that many results wait to be written
+                    while tasks and len(running) < self.max_workers:
+                        kind, payload = tasks.popleft()
+                        running[pool.submit(self._run_task, kind, payload)] = (kind, payload)
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, payload = running.pop(future)
+                        error = future.exception()
+                        tasks += self._handle(kind, payload, None if error is not None else future.result(), error)
+            return self._finish(started)
+        except BaseException:
+            self._writer.abort()
+            raise
+
+    async def arun(self) -> BackupReport:
+        import asyncio
+        started = time.monotonic()
+        self.reads += 1
+        tasks = self._tasks((await self.connections.Show(fields=_list_fields)).data)
+        self._writer = _Writer(self.path)
+        running = { }
+        try:
+            while tasks or running:
+                while tasks and len(running) < self.max_workers:
+                    kind, payload = tasks.popleft()
+                    running[asyncio.ensure_future(self._arun_task(kind, payload))] = (kind, payload)
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    kind, payload = running.pop(task)
+                    error = task.exception()
+                    tasks += self._handle(kind, payload, None if error is not None else task.result(), error)
+            return self._finish(started)
+        except BaseException:
+            for task in running: task.cancel()
+            self._writer.abort()
+            raise
@@ -1,8 +1,15 @@
+import math
 import re
 import shlex
-import subprocess
+import time
+from functools import partial
 from .results import Result
-from .constants import NMCLI_FIELDS
+from .transport import Transport, SubprocessTransport
+from .events import MonitorStream, AsyncMonitorStream
+from .cache import ResultCache, is_read
+from .concurrency import SingleFlight
+from .constants import NMCLI_FIELDS, NM_SETTINGS
+from .standard_parsers import parse_terse, parse_multiline
 
 
 
@@ -74,358 +81,48 @@ error_codes = Exit_Status()
 class Tables(object):
     """
     PROPERTY ALIASES
-       Apart from the property-value pairs, connection add, connection modify and device modify also accept short forms of some properties.
-       They exist for convenience.
-       Some aliases can affect multiple connection properties at once.
-
-       The overview of the aliases is below.
-       An actual connection type is used to disambiguate these options from the options of the same name that are valid for multiple connection types (such as mtu).
-
-
-
-       Table 1. Options for all connections
-       ┌────────────┬───────────────────────────┬─────────────────────────────────────────────────────────────────────────────────────┐
-       │Alias       │ Property                  │ Note                                                                                │
-       ├────────────┼───────────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │type        │ connection.type           │ This alias also accepts values of bond-slave, team-slave and bridge-slave. They     │
-       │            │                           │ create ethernet connection profiles. Their use is discouraged in favor of using a   │
-       │            │                           │ specific type with master option.                                                   │
-       ├────────────┼───────────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │con-name    │ connection.id             │ When not provided a default name is generated: <type>[-<ifname>][-<num>]).          │
-       ├────────────┼───────────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │autoconnect │ connection.autoconnect    │                                                                                     │
-       ├────────────┼───────────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │ifname      │ connection.interface-name │ A value of * will be interpreted as no value, making the connection profile         │
-       │            │                           │ interface-independent.  Note: use quotes around * to suppress shell expansion.  For │
-       │            │                           │ bond, team and bridge connections a default name will be generated if not set.      │
-       ├────────────┼───────────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │master      │ connection.master         │ Value specified here will be canonicalized.  It can be prefixed with ifname/, uuid/ │
-       │            │                           │ or id/ to disambiguate it.                                                          │
-       ├────────────┼───────────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │slave-type  │ connection.slave-type     │                                                                                     │
-       └────────────┴───────────────────────────┴─────────────────────────────────────────────────────────────────────────────────────┘
-
-       Table 2. PPPoE options
-       ┌─────────┬────────────────┐
-       │Alias    │ Property       │
-       ├─────────┼────────────────┤
-       │username │ pppoe.username │
-       ├─────────┼────────────────┤
-       │password │ pppoe.password │
-       ├─────────┼────────────────┤
-       │service  │ pppoe.service  │
-       ├─────────┼────────────────┤
-       │parent   │ pppoe.parent   │
-       └─────────┴────────────────┘
-
-       Table 3. Wired Ethernet options
-       ┌───────────┬──────────────────────────┐
-       │Alias      │ Property                 │
-       ├───────────┼──────────────────────────┤
-       │mtu        │ wired.mtu                │
-       ├───────────┼──────────────────────────┤
-       │mac        │ wired.mac-address        │
-       ├───────────┼──────────────────────────┤
-       │cloned-mac │ wired.cloned-mac-address │
-       └───────────┴──────────────────────────┘
-
-       Table 4. Infiniband options
-       ┌───────────────┬───────────────────────────┐
-       │Alias          │ Property                  │
-       ├───────────────┼───────────────────────────┤
-       │mtu            │ infiniband.mtu            │
-       ├───────────────┼───────────────────────────┤
-       │mac            │ infiniband.mac-address    │
-       ├───────────────┼───────────────────────────┤
-       │transport-mode │ infiniband.transport-mode │
-       ├───────────────┼───────────────────────────┤
-       │parent         │ infiniband.parent         │
-       ├───────────────┼───────────────────────────┤
-       │p-key          │ infiniband.p-key          │
-       └───────────────┴───────────────────────────┘
-
-       Table 5. Wi-Fi options
-       ┌───────────┬─────────────────────────────┐
-       │Alias      │ Property                    │
-       ├───────────┼─────────────────────────────┤
-       │ssid       │ wireless.ssid               │
-       ├───────────┼─────────────────────────────┤
-       │mode       │ wireless.mode               │
-       ├───────────┼─────────────────────────────┤
-       │mtu        │ wireless.mtu                │
-       ├───────────┼─────────────────────────────┤
-       │mac        │ wireless.mac-address        │
-       ├───────────┼─────────────────────────────┤
-       │cloned-mac │ wireless.cloned-mac-address │
-       └───────────┴─────────────────────────────┘
-
-       Table 6. WiMax options
-       ┌──────┬────────────────────┐
-       │Alias │ Property           │
-       ├──────┼────────────────────┤
-       │nsp   │ wimax.network-name │
-       ├──────┼────────────────────┤
-       │mac   │ wimax.mac-address  │
-       └──────┴────────────────────┘
-
-       Table 7. GSM options
-       ┌─────────┬──────────────┐
-       │Alias    │ Property     │
-       ├─────────┼──────────────┤
-       │apn      │ gsm.apn      │
-       ├─────────┼──────────────┤
-       │user     │ gsm.username │
-       ├─────────┼──────────────┤
-       │password │ gsm.password │
-       └─────────┴──────────────┘
-
-       Table 8. CDMA options
-       ┌─────────┬───────────────┐
-       │Alias    │ Property      │
-       ├─────────┼───────────────┤
-       │user     │ cdma.username │
-       ├─────────┼───────────────┤
-       │password │ cdma.password │
-       └─────────┴───────────────┘
-
-       Table 9. Bluetooth options
-       ┌────────┬──────────────────┬─────────────────────────────────────────────────────────────────────────────────────┐
-       │Alias   │ Property         │ Note                                                                                │
-       ├────────┼──────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │addr    │ bluetooth.bdaddr │                                                                                     │
-       ├────────┼──────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │bt-type │ bluetooth.type   │ Apart from the usual panu, nap and dun options, the values of dun-gsm and dun-cdma  │
-       │        │                  │ can be used for compatibility with older versions. They are equivalent to using dun │
-       │        │                  │ and setting appropriate gsm.* or cdma.* properties.                                 │
-       └────────┴──────────────────┴─────────────────────────────────────────────────────────────────────────────────────┘
-
-       Table 10. VLAN options
-       ┌────────┬───────────────────────────┐
-       │Alias   │ Property                  │
-       ├────────┼───────────────────────────┤
-       │dev     │ vlan.parent               │
-       ├────────┼───────────────────────────┤
-       │id      │ vlan.id                   │
-       ├────────┼───────────────────────────┤
-       │flags   │ vlan.flags                │
-       ├────────┼───────────────────────────┤
-       │ingress │ vlan.ingress-priority-map │
-       ├────────┼───────────────────────────┤
-       │egress  │ vlan.egress-priority-map  │
-       └────────┴───────────────────────────┘
-
-       Table 11. Bonding options
-       ┌──────────────┬──────────────┬─────────────────────────────────────────────────────────────────────────────────────┐
-       │Alias         │ Property     │ Note                                                                                │
-       ├──────────────┼──────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │mode          │              │ Setting each of these adds the option to bond.options property.  It's equivalent to │
-       ├──────────────┤              │ the +bond.options 'option=value' syntax.                                            │
-       │primary       │              │                                                                                     │
-       ├──────────────┤              │                                                                                     │
-       │miimon        │              │                                                                                     │
-       ├──────────────┤              │                                                                                     │
-       │downdelay     │              │                                                                                     │
-       ├──────────────┤ bond.options │                                                                                     │
-       │updelay       │              │                                                                                     │
-       ├──────────────┤              │                                                                                     │
-       │arp-interval  │              │                                                                                     │
-       ├──────────────┤              │                                                                                     │
-       │arp-ip-target │              │                                                                                     │
-       ├──────────────┤              │                                                                                     │
-       │lacp-rate     │              │                                                                                     │
-       └──────────────┴──────────────┴─────────────────────────────────────────────────────────────────────────────────────┘
-
-       Table 12. Team options
-       ┌───────┬─────────────┬─────────────────────────────────────────────────────────────────────────────────┐
-       │Alias  │ Property    │ Note                                                                            │
-       ├───────┼─────────────┼─────────────────────────────────────────────────────────────────────────────────┤
-       │config │ team.config │ Either a filename or a team configuration in JSON format. To enforce one or the │
-       │       │             │ other, the value can be prefixed with "file://" or "json://".                   │
-       └───────┴─────────────┴─────────────────────────────────────────────────────────────────────────────────┘
-
-       Table 13. Team port options
-       ┌───────┬──────────────────┬─────────────────────────────────────────────────────────────────────────────────┐
-       │Alias  │ Property         │ Note                                                                            │
-       ├───────┼──────────────────┼─────────────────────────────────────────────────────────────────────────────────┤
-       │config │ team-port.config │ Either a filename or a team configuration in JSON format. To enforce one or the │
-       │       │                  │ other, the value can be prefixed with "file://" or "json://".                   │
-       └───────┴──────────────────┴─────────────────────────────────────────────────────────────────────────────────┘
-
-       Table 14. Bridge options
-       ┌───────────────────┬───────────────────────────┐
-       │Alias              │ Property                  │
-       ├───────────────────┼───────────────────────────┤
-       │stp                │ bridge.stp                │
-       ├───────────────────┼───────────────────────────┤
-       │priority           │ bridge.priority           │
-       ├───────────────────┼───────────────────────────┤
-       │forward-delay      │ bridge.forward-delay      │
-       ├───────────────────┼───────────────────────────┤
-       │hello-time         │ bridge.hello-time         │
-       ├───────────────────┼───────────────────────────┤
-       │max-age            │ bridge.max-age            │
-       ├───────────────────┼───────────────────────────┤
-       │ageing-time        │ bridge.ageing-time        │
-       ├───────────────────┼───────────────────────────┤
-       │group-forward-mask │ bridge.group-forward-mask │
-       ├───────────────────┼───────────────────────────┤
-       │multicast-snooping │ bridge.multicast-snooping │
-       ├───────────────────┼───────────────────────────┤
-       │mac                │ bridge.mac-address        │
-       ├───────────────────┼───────────────────────────┤
-       │priority           │ bridge-port.priority      │
-       ├───────────────────┼───────────────────────────┤
-       │path-cost          │ bridge-port.path-cost     │
-       ├───────────────────┼───────────────────────────┤
-       │hairpin            │ bridge-port.hairpin-mode  │
-       └───────────────────┴───────────────────────────┘
-
-       Table 15. VPN options
-       ┌─────────┬──────────────────┐
-       │Alias    │ Property         │
-       ├─────────┼──────────────────┤
-       │vpn-type │ vpn.service-type │
-       ├─────────┼──────────────────┤
-       │user     │ vpn.user-name    │
-       └─────────┴──────────────────┘
-
-       Table 16. OLPC Mesh options
-       ┌─────────────┬────────────────────────────────┐
-       │Alias        │ Property                       │
-       ├─────────────┼────────────────────────────────┤
-       │ssid         │ olpc-mesh.ssid                 │
-       ├─────────────┼────────────────────────────────┤
-       │channel      │ olpc-mesh.channel              │
-       ├─────────────┼────────────────────────────────┤
-       │dhcp-anycast │ olpc-mesh.dhcp-anycast-address │
-       └─────────────┴────────────────────────────────┘
-
-       Table 17. ADSL options
-       ┌──────────────┬────────────────────┐
-       │Alias         │ Property           │
-       ├──────────────┼────────────────────┤
-       │username      │ adsl.username      │
-       ├──────────────┼────────────────────┤
-       │protocol      │ adsl.protocol      │
-       ├──────────────┼────────────────────┤
-       │password      │ adsl.password      │
-       ├──────────────┼────────────────────┤
-       │encapsulation │ adsl.encapsulation │
-       └──────────────┴────────────────────┘
-
-       Table 18. MACVLAN options
-       ┌──────┬────────────────┐
-       │Alias │ Property       │
-       ├──────┼────────────────┤
-       │dev   │ macvlan.parent │
-       ├──────┼────────────────┤
-       │mode  │ macvlan.mode   │
-       ├──────┼────────────────┤
-       │tap   │ macvlan.tap    │
-       └──────┴────────────────┘
-
-       Table 19. MACsec options
-       ┌────────┬────────────────┐
-       │Alias   │ Property       │
-       ├────────┼────────────────┤
-       │dev     │ macsec.parent  │
-       ├────────┼────────────────┤
-       │mode    │ macsec.mode    │
-       ├────────┼────────────────┤
-       │encrypt │ macsec.encrypt │
-       ├────────┼────────────────┤
-       │cak     │ macsec.cak     │
-       ├────────┼────────────────┤
-       │ckn     │ macsec.ckn     │
-       ├────────┼────────────────┤
-       │port    │ macsec.port    │
-       └────────┴────────────────┘
-
-       Table 20. VxLAN options
-       ┌─────────────────┬────────────────────────┐
-       │Alias            │ Property               │
-       ├─────────────────┼────────────────────────┤
-       │id               │ vxlan.id               │
-       ├─────────────────┼────────────────────────┤
-       │remote           │ vxlan.remote           │
-       ├─────────────────┼────────────────────────┤
-       │dev              │ vxlan.parent           │
-       ├─────────────────┼────────────────────────┤
-       │local            │ vxlan.local            │
-       ├─────────────────┼────────────────────────┤
-       │source-port-min  │ vxlan.source-port-min  │
-       ├─────────────────┼────────────────────────┤
-       │source-port-max  │ vxlan.source-port-max  │
-       ├─────────────────┼────────────────────────┤
-       │destination-port │ vxlan.destination-port │
-       └─────────────────┴────────────────────────┘
-
-       Table 21. Tun options
-       ┌────────────┬─────────────────┐
-       │Alias       │ Property        │
-       ├────────────┼─────────────────┤
-       │mode        │ tun.mode        │
-       ├────────────┼─────────────────┤
-       │owner       │ tun.owner       │
-       ├────────────┼─────────────────┤
-       │group       │ tun.group       │
-       ├────────────┼─────────────────┤
-       │pi          │ tun.pi          │
-       ├────────────┼─────────────────┤
-       │vnet-hdr    │ tun.vnet-hdr    │
-       ├────────────┼─────────────────┤
-       │multi-queue │ tun.multi-queue │
-       └────────────┴─────────────────┘
-
-       Table 22. IP tunneling options
-       ┌───────┬──────────────────┐
-       │Alias  │ Property         │
-       ├───────┼──────────────────┤
-       │mode   │ ip-tunnel.mode   │
-       ├───────┼──────────────────┤
-       │local  │ ip-tunnel.local  │
-       ├───────┼──────────────────┤
-       │remote │ ip-tunnel.remote │
-       ├───────┼──────────────────┤
-       │dev    │ ip-tunnel.parent │
-       └───────┴──────────────────┘
-
-       Table 23. IPv4 options
-       ┌──────┬────────────────────────────┬────────────────────────────────────────────────────────────────────────────────────┐
-       │Alias │ Property                   │ Note                                                                               │
-       ├──────┼────────────────────────────┼────────────────────────────────────────────────────────────────────────────────────┤
-       │ip4   │ ipv4.addresses ipv4.method │ The alias is equivalent to the +ipv4.addresses syntax and also sets ipv4.method to │
-       │      │                            │ manual. It can be specified multiple times.                                        │
-       ├──────┼────────────────────────────┼────────────────────────────────────────────────────────────────────────────────────┤
-       │gw4   │ ipv4.gateway               │                                                                                    │
-       └──────┴────────────────────────────┴────────────────────────────────────────────────────────────────────────────────────┘
-
-       Table 24. IPv6 options
-       ┌──────┬────────────────────────────┬────────────────────────────────────────────────────────────────────────────────────┐
-       │Alias │ Property                   │ Note                                                                               │
-       ├──────┼────────────────────────────┼────────────────────────────────────────────────────────────────────────────────────┤
-       │ip6   │ ipv6.addresses ipv6.method │ The alias is equivalent to the +ipv6.addresses syntax and also sets ipv6.method to │
-       │      │                            │ manual. It can be specified multiple times.                                        │
-       ├──────┼────────────────────────────┼────────────────────────────────────────────────────────────────────────────────────┤
-       │gw6   │ ipv6.gateway               │                                                                                    │
-       └──────┴────────────────────────────┴────────────────────────────────────────────────────────────────────────────────────┘
-
-       Table 25. Proxy options
-       ┌─────────────┬────────────────────┬─────────────────────────────────────────────────────────────────────────────────────┐
-       │Alias        │ Property           │ Note                                                                                │
-       ├─────────────┼────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │method       │ proxy.method       │                                                                                     │
-       ├─────────────┼────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │browser-only │ proxy.browser-only │                                                                                     │
-       ├─────────────┼────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │pac-url      │ proxy.pac-url      │                                                                                     │
-       ├─────────────┼────────────────────┼─────────────────────────────────────────────────────────────────────────────────────┤
-       │pac-script   │ proxy.pac-script   │ Read the JavaScript PAC (proxy auto-config) script from file or pass it directly on │
-       │             │                    │ the command line. Prefix the value with "file://" or "js://" to force one or the    │
-       │             │                    │ other.                                                                              │
-       └─────────────┴────────────────────┴─────────────────────────────────────────────────────────────────────────────────────┘
-
+       Short forms of connection properties accepted by connection add, connection modify and device modify.
+       The alias tables are kept in resources/aliases.txt; read them with Tables.Text() or nmcli.help('aliases').
     """
+    _aliases = None
+    _property = re.compile(r'^[+-]?([a-z0-9-]+)\.([a-z0-9-]+)$')
+
+    @staticmethod
+    def Text() -> str:
+        from .resources import read
+        return read('aliases')
+
+    @classmethod
+    def Aliases(cls) -> dict:
+        """
+            The alias tables, parsed from Text(): { 'Options for all connections': { 'con-name': ['connection.id'], ... }, ... }
+            An alias listed without properties (the bonding options) maps to [].
+        """
+        if cls._aliases is None:
+            tables = { }
+            table = None
+            for line in cls.Text().splitlines():
+                line = line.strip()
+                if line.startswith('Table '):
+                    table = tables[line.split('. ', 1)[-1]] = { }
+                elif table is not None and line.startswith('│'):
+                    cells = [cell.strip() for cell in line.strip('│').split('│')]
+                    if cells[0] and cells[0] != 'Alias': table[cells[0]] = cells[1].split() if len(cells) > 1 else []
+            cls._aliases = tables
+        return cls._aliases
+
+    @classmethod
+    def Validate(cls, name: str) -> str:
+        """
+            Checks a property name given to connection add/modify: [+|-]setting.property, with a known setting, or an
+            alias from the tables. Returns name; raises ValueError otherwise.
+        """
+        match = cls._property.match(name)
+        if match is not None:
+            if match.group(1) not in NM_SETTINGS: raise ValueError(f"unknown setting '{match.group(1)}' in '{name}'")
+            return name
+        if any(name in table for table in cls.Aliases().values()): return name
+        raise ValueError(f"'{name}' is neither a setting.property nor a property alias")
 
 
 
@@ -445,18 +142,26 @@ class NetWorkManagerException(Exception):
 
 
 class Parser(object):
-    def __init__(self, *, column_names: list = None, levels: list = None, descriptions: dict = None, action: callable = None):
+    """
+        column_names are requested with --fields, and handed to action as headers= to map the terse columns.
+        with_stderr hands stderr to action as well, for commands that report partial failures there.
+    """
+    def __init__(self, *, column_names: list = None, levels: list = None, descriptions: dict = None, action: callable = None, with_stderr: bool = False):
         self.levels = levels
         self.column_names = column_names
         self.descriptions = descriptions
         self.action = action
+        self.with_stderr = with_stderr
 
-    def __call__(self, stdout: str, stderr: str, *args, **kwargs) -> dict:
+    def __call__(self, stdout: str, stderr: str, *args, headers: list = None, **kwargs) -> dict:
+        """ headers are the fields actually requested, when the caller asked for other than column_names """
         stdout = stdout.strip()
 
         if callable(self.action):
+            if self.with_stderr:
+                return self.action(stdout, stderr)
             if self.column_names is not None:
-                return self.action(stdout, headers=self.column_names)
+                return self.action(stdout, headers=headers or self.column_names)
             else:
                 return self.action(stdout)
 
@@ -470,9 +175,19 @@ class Parser(object):
 class ROOT(object):
     __root__: str = 'nmcli'
     __base_command__: str
-    _splitter = re.compile(r'(?<!\\):')
-    def __init__(self, base: str ):
+    _asynchronous: bool = False
+    transport: Transport = SubprocessTransport()
+    cache: ResultCache = None
+    # the installed nmcli's fields (see schema.py); when set, fields it does not accept are dropped from --fields
+    schema: 'Schema' = None
+    single_flight: SingleFlight = SingleFlight()
+    # identical reads that are already running are joined instead of spawned again; set False on a command to opt out
+    coalesce: bool = True
+    # per command timings (see metrics.py); None skips all of it
+    metrics: 'Metrics' = None
+    def __init__(self, base: str, asynchronous: bool = False):
         self.__base_command__ = base
+        self._asynchronous = asynchronous
 
     @staticmethod
     def _sanitize_args(args) -> str or [str]:
@@ -483,10 +198,7 @@ class ROOT(object):
             if isinstance(arg, int):
                 return str(arg)
 
-            # if arg is not None:
-            if isinstance(arg, str):
-                return arg.lower()
-
+            # strings are passed through as is: profile names, SSIDs and passwords are case sensitive
             return arg
 
         if isinstance(args, (list, tuple)):
@@ -497,82 +209,224 @@ class ROOT(object):
         else:
             return sanitize_arg(args)
 
-    # noinspection PyMethodMayBeStatic
-    def Shell(self, command: [str]) -> (int, str, str):
+    def Shell(self, command: [str], timeout: float = None) -> (int, str, str):
         """
             Execute args and returns status code, stdout and stderr
 
+        The argv is handed to the transport (a SubprocessTransport unless another one was set).
+        Any exceptions in running subprocess are allowed to raise to caller; past timeout seconds nmcli is killed
+        and subprocess.TimeoutExpired raised.
+        """
+        if timeout is None: return self.transport.execute(command)
+        return self.transport.execute(command, timeout=timeout)
+
+    async def AsyncShell(self, command: [str], timeout: float = None) -> (int, str, str):
+        """
+            Async twin of Shell. The process is awaited on the running event loop, so no thread is held per call.
+
         Any exceptions in running subprocess are allowed to raise to caller
         """
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = process.communicate()
-        retcode = process.returncode
+        if timeout is None: return await self.transport.async_execute(command)
+        return await self.transport.async_execute(command, timeout=timeout)
 
-        return retcode, stdout.decode(), stderr.decode()
+    def _build_nmcli_args(self, obj, command=None, fields=None, multiline=False, options=None) -> ([str], [str], bool):
+        """
+            Builds the final argv for an nmcli invocation, shared by the sync and async paths.
+
+            fields given by the caller (or by the command's parser) are sent as they are; the NMCLI_FIELDS defaults
+            only apply when there are none. options are global nmcli options, e.g. ['--wait', '30'].
+        """
+        words = shlex.split(command) if command else []
+        if words[:1] == ['list'] and 'id' in words and ("%s list" % obj) in NMCLI_FIELDS:
+            multiline = True
+            if fields is None: fields = NMCLI_FIELDS["%s list" % obj]
 
-    def _execute_nmcli(self, obj, command=None, fields=None, multiline=False, parser: Parser = None) -> Result:
-        """  Wraps nmcli execution  """
         if fields is None:
-            fields = NMCLI_FIELDS[obj]
+            fields = NMCLI_FIELDS.get("%s %s" % (obj, command), NMCLI_FIELDS.get(obj))
 
-        if "list" in command and "id" in command:
-            multiline = True
-            fields = NMCLI_FIELDS["%s list" % obj]
+        if fields and self.schema is not None:
+            fields = self.schema.valid([self.__root__, obj, *words], fields)
 
-        if command:
-            if ("%s %s" % (obj, command)) in NMCLI_FIELDS:
-                fields = NMCLI_FIELDS[("%s %s" % (obj, command))]
+        args = [self.__root__, '--terse', *(options or [])]
+        if fields:
+            args += ['--fields', ",".join(fields)]
+        args.append(obj)
+        args += words
 
-        args = [self.__root__, '--terse', '--fields', ",".join(fields), obj]
+        return args, fields, multiline
 
-        if command:
-            args += shlex.split(command)
+    @staticmethod
+    def _select_fields(fields: [str] or str, *required: str) -> [str] or None:
+        """
+            The --fields a caller asked for, as a list; 'DEVICE,STATE' and ['DEVICE', 'STATE'] are the same.
 
-        retcode, stdout, stderr = self.Shell(args)
-        data = []
-        if error_codes.IsOk(retcode):
-            if parser is not None:
-                data = parser(stdout, stderr)
+            required fields the parser keys its result by are put in front when the request does not cover them;
+            a section ('GENERAL') or all/profile covers its properties ('GENERAL.DEVICE').
+        """
+        if fields is None: return None
+        if isinstance(fields, str): fields = fields.split(',')
+        fields = [field.strip() for field in fields if field.strip()]
+        requested = [field.lower() for field in fields]
+        def covered(name: str) -> bool:
+            name = name.lower()
+            return any(field in ('all', 'profile') or name == field or name.startswith(field + '.') for field in requested)
+        return [name for name in required if not covered(name)] + fields
 
-            else:
-                if multiline:
-                    row = { }
-                    for line in stdout.split('\n'):
-                        values = line.split(':', 1)
-                        if len(values) == 2:
-                            multikey, value = values
-                            field, prop = multikey.split('.')
-                            row[prop] = value
-                    data.append(row)
-                else:
-                    for line in stdout.split('\n'):
-                        values = self._splitter.split(line)
-                        if len(values) == len(fields):
-                            row = dict(zip(fields, values))
-                            data.append(row)
-
-            return Result(data, retcode, stdout, stderr)
+    @staticmethod
+    def _parse_output(stdout: str, stderr: str, fields=None, multiline=False, parser: Parser = None) -> list or dict:
+        if parser is not None:
+            return parser(stdout, stderr, headers=fields)
+        if multiline:
+            return parse_multiline(stdout)
+        if fields:
+            return parse_terse(stdout, fields)
+        return []
+
+    def _handle_output(self, retcode: int, stdout: str, stderr: str, fields=None, multiline=False, parser: Parser = None,
+                       invocation: 'Invocation' = None) -> Result:
+        """  The Result parses stdout when its data is first read; with an invocation, the parse is timed on it  """
+        if error_codes.IsOk(retcode):
+            parse = partial(self._parse_output, fields=fields, multiline=multiline, parser=parser)
+            if invocation is not None: parse = invocation.timed(parse)
+            return Result(None, retcode, stdout, stderr, parse=parse)
         else:
             msg = f"nmcli return {retcode} code. STDERR='{stderr}'"
-            raise NetWorkManagerException(msg, data={'stderr': stderr, 'retcode': retcode, 'stdout': stdout})
+            data = { 'stderr': stderr, 'retcode': retcode }
+            if Result.debug: data['stdout'] = stdout
+            raise NetWorkManagerException(msg, data=data)
 
-    def _run_action(self, command, *args, parser: Parser = None, **kwargs) -> Result:
-        cmd_args = [self._sanitize_args(arg) for arg in args]
+    def _execute_nmcli(self, obj, command=None, fields=None, multiline=False, parser: Parser = None, options: [str] = None,
+                       timeout: float = None) -> Result:
+        """  Wraps nmcli execution  """
+        if fields is None and parser is not None: fields = parser.column_names
+        metrics = self.metrics
+        if metrics is not None: started = time.perf_counter()
+        args, fields, multiline = self._build_nmcli_args(obj, command, fields, multiline, options)
+
+        def run() -> Result:
+            if metrics is None:
+                retcode, stdout, stderr = self.Shell(args, timeout)
+                return self._handle_output(retcode, stdout, stderr, fields, multiline, parser)
+
+            built = time.perf_counter()
+            try:
+                retcode, stdout, stderr, timings = self.transport.execute_timed(args, timeout)
+            except Exception as error:
+                metrics.record(args, built - started, time.perf_counter() - built, None, error=error)
+                raise
+            invocation = metrics.record(args, built - started, time.perf_counter() - built, retcode, stdout, timings)
+            return self._handle_output(retcode, stdout, stderr, fields, multiline, parser, invocation)
+
+        def load() -> Result:
+            if self.coalesce and self.single_flight is not None and is_read(args):
+                return self.single_flight.do(tuple(args), run)
+            return run()
+
+        if self.cache is not None:
+            return self.cache.execute(args, load)
+        return load()
+
+    async def _async_execute_nmcli(self, obj, command=None, fields=None, multiline=False, parser: Parser = None, options: [str] = None,
+                                   timeout: float = None) -> Result:
+        """  Wraps nmcli execution on the running event loop  """
+        if fields is None and parser is not None: fields = parser.column_names
+        metrics = self.metrics
+        if metrics is not None: started = time.perf_counter()
+        args, fields, multiline = self._build_nmcli_args(obj, command, fields, multiline, options)
+
+        async def run() -> Result:
+            if metrics is None:
+                retcode, stdout, stderr = await self.AsyncShell(args, timeout)
+                return self._handle_output(retcode, stdout, stderr, fields, multiline, parser)
+
+            built = time.perf_counter()
+            try:
+                retcode, stdout, stderr, timings = await self.transport.async_execute_timed(args, timeout)
+            except Exception as error:
+                metrics.record(args, built - started, time.perf_counter() - built, None, error=error)
+                raise
+            invocation = metrics.record(args, built - started, time.perf_counter() - built, retcode, stdout, timings)
+            return self._handle_output(retcode, stdout, stderr, fields, multiline, parser, invocation)
+
+        async def load() -> Result:
+            if self.coalesce and self.single_flight is not None and is_read(args):
+                return await self.single_flight.async_do(tuple(args), run)
+            return await run()
+
+        if self.cache is not None:
+            return await self.cache.async_execute(args, load)
+        return await load()
+
+    def _build_action(self, *args, **kwargs) -> str:
+        """
+            Joins the positional args and the keyword options into the command string.
+
+            Commands pass their collected options as args=[...] and kwargs={...}; those are flattened here.
+        """
+        extra_args = kwargs.pop('args', None) or []
+        extra_kwargs = kwargs.pop('kwargs', None) or { }
+        kwargs.update(extra_kwargs)
+        kwargs = { key: value for key, value in kwargs.items() if value is not None }
+
+        cmd_args = [self._sanitize_args(arg) for arg in (*args, *extra_args) if arg is not None]
         if kwargs:
             cmd_args.extend(kwargs.keys())
 
-        if not cmd_args:
-            cmd = command
-        else:
-            opts = []
-            for arg in cmd_args:
-                if arg not in kwargs:
-                    opts.append(arg)
-                else:
-                    opts.append(f"{arg} {self._sanitize_args(kwargs[arg])}")
-            cmd = f"{command} {' '.join(opts)}"
-
-        return self._execute_nmcli(self.__root__, command=cmd, parser=parser)
+        opts = []
+        for arg in cmd_args:
+            if arg not in kwargs:
+                opts.append(shlex.quote(str(arg)))
+            else:
+                opts.append(f"{shlex.quote(str(arg))} {shlex.quote(str(self._sanitize_args(kwargs[arg])))}")
+        return ' '.join(opts)
+
+    def _run_action(self, command, *args, parser: Parser = None, fields: [str] = None, options: [str] = None, timeout: float = None,
+                    **kwargs) -> Result:
+        """
+            Runs `nmcli <command> <args...>`.
+
+            fields replaces the parser's column_names in --fields, and the parser is handed those instead.
+            options are global nmcli options, placed before the object (see _wait).
+            timeout is a client side deadline: nmcli still running after it is killed (see _deadline).
+            When the command was created with asynchronous=True this returns an awaitable instead of a Result.
+        """
+        if self._asynchronous:
+            return self._async_run_action(command, *args, parser=parser, fields=fields, options=options, timeout=timeout, **kwargs)
+
+        return self._execute_nmcli(command, command=self._build_action(*args, **kwargs) or None, fields=fields, parser=parser, options=options,
+                                   timeout=timeout)
+
+    async def _async_run_action(self, command, *args, parser: Parser = None, fields: [str] = None, options: [str] = None, timeout: float = None,
+                                **kwargs) -> Result:
+        return await self._async_execute_nmcli(command, command=self._build_action(*args, **kwargs) or None, fields=fields, parser=parser,
+                                               options=options, timeout=timeout)
+
+    @staticmethod
+    def _wait(wait: float = None) -> [str] or None:
+        """ nmcli's --wait option: seconds nmcli waits for the operation before it gives up with exit code 3 """
+        if wait is None: return None
+        return ['--wait', str(max(0, math.ceil(wait)))]
+
+    # seconds nmcli gets past its own --wait before it is killed
+    deadline_grace: float = 5.0
+
+    @classmethod
+    def _deadline(cls, timeout: float = None) -> float or None:
+        """ The client side deadline for a command run with --wait timeout: nmcli should have exited by then """
+        if timeout is None: return None
+        return max(0, math.ceil(timeout)) + cls.deadline_grace
+
+    def _stream_action(self, command, *args, **kwargs) -> MonitorStream or AsyncMonitorStream:
+        """
+            Starts `nmcli <command> <args...>` as a long running process (the monitors) and returns a stream of its events.
+
+            Asynchronous commands get an AsyncMonitorStream, which starts the process on first iteration.
+        """
+        argv = [self.__root__, command] + shlex.split(self._build_action(*args, **kwargs))
+        if self._asynchronous:
+            return AsyncMonitorStream(argv, self.transport)
+
+        return MonitorStream(argv, self.transport.open(argv))
 
 
     # def gen_action(self, command, possibleargs):
@@ -0,0 +1,148 @@
+"""
+    The same connection command over many profiles, on a bounded worker pool, with one report for the batch.
+
+        report = nmcli.connections.modify_many(uuids, 'ipv4.dns', '10.0.0.53', uuid=True, timeout=30)
+        report.failed                   # [Outcome, ...]; one failing profile does not stop the others
+        report.codes                    # { 0: 797, 10: 3 }, by nmcli exit status
+        report.throughput               # operations per second
+
+    timeout is handed to nmcli as --wait, so an operation that runs out of time ends with exit code 3
+    ("Timeout expired"). An nmcli that hangs past that (ROOT.deadline_grace seconds later) is killed, and the
+    operation fails with subprocess.TimeoutExpired instead of holding its worker.
+"""
+import time
+
+from .base import NetWorkManagerException, error_codes
+
+
+___all__ = ['Outcome', 'BulkReport', 'run_many', 'async_run_many']
+
+
+
+
+class Outcome(object):
+    """ How one operation of a batch ended. """
+    __slots__ = ['target', 'return_code', 'error', 'elapsed']
+    def __init__(self, target, return_code: int or None, error: str = None, elapsed: float = 0.0):
+        """
+        :param return_code: nmcli's exit status; None when nmcli could not be run at all
+        """
+        self.target = target
+        self.return_code = return_code
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.return_code is not None and error_codes.IsOk(self.return_code)
+
+    @property
+    def status(self) -> str:
+        """ The Exit_Status description of return_code """
+        return error_codes(self.return_code) if self.return_code is not None else self.error
+
+    def ToDict(self) -> dict:
+        return { 'target': self.target, 'return_code': self.return_code, 'status': self.status, 'error': self.error, 'elapsed': self.elapsed }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.target!r} {self.return_code} {self.status}>"
+
+
+
+class BulkReport(object):
+    """ The outcomes of a batch, in the order the targets were given. """
+    def __init__(self, operation: str, outcomes: [Outcome], elapsed: float):
+        self.operation = operation
+        self.outcomes = outcomes
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self) -> [Outcome]:
+        return [outcome for outcome in self.outcomes if outcome.ok]
+
+    @property
+    def failed(self) -> [Outcome]:
+        return [outcome for outcome in self.outcomes if not outcome.ok]
+
+    @property
+    def ok(self) -> bool:
+        return all(outcome.ok for outcome in self.outcomes)
+
+    @property
+    def codes(self) -> dict:
+        """ { exit status: count }; None counts operations that could not run nmcli """
+        codes = { }
+        for outcome in self.outcomes:
+            codes[outcome.return_code] = codes.get(outcome.return_code, 0) + 1
+        return codes
+
+    @property
+    def throughput(self) -> float:
+        """ operations per second, over the whole batch """
+        return len(self.outcomes) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def ToDict(self) -> dict:
+        latencies = [outcome.elapsed for outcome in self.outcomes]
+        return {
+                'operation': self.operation,
+                'total': len(self.outcomes),
+                'succeeded': len(self.succeeded),
+                'failed': [outcome.ToDict() for outcome in self.failed],
+                'codes': { code: { 'count': count, 'status': error_codes(code) if code is not None else None } for code, count in self.codes.items() },
+                'elapsed': self.elapsed,
+                'throughput': self.throughput,
+                'mean_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+                'max_latency': max(latencies, default=0.0),
+                }
+
+    def __repr__(self) -> str:
+        return (f"<{self.__class__.__name__} : {self.operation} {len(self.succeeded)}/{len(self.outcomes)} ok, "
+                f"{self.elapsed:.2f}s, {self.throughput:.1f}/s>")
+
+
+
+def _failed(target, e: Exception, elapsed: float) -> Outcome:
+    if isinstance(e, NetWorkManagerException) and isinstance(e.data, dict):
+        return Outcome(target, e.data.get('retcode'), (e.data.get('stderr') or '').strip() or str(e), elapsed)
+    return Outcome(target, None, f'{type(e).__name__}: {e}', elapsed)
+
+
+def _run_one(call: callable, target) -> Outcome:
+    started = time.monotonic()
+    try:
+        result = call(target)
+    except Exception as e:
+        return _failed(target, e, time.monotonic() - started)
+    return Outcome(target, result.return_code, None, time.monotonic() - started)
+
+
+def run_many(operation: str, call: callable, targets: list, max_workers: int) -> BulkReport:
+    """ call(target) -> Result for every target, at most max_workers at a time. """
+    if max_workers < 1: raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+    started = time.monotonic()
+    if not targets: return BulkReport(operation, [], 0.0)
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets)), thread_name_prefix='nmcli-bulk') as pool:
+        outcomes = list(pool.map(lambda target: _run_one(call, target), targets))
+    return BulkReport(operation, outcomes, time.monotonic() - started)
+
+
+async def async_run_many(operation: str, call: callable, targets: list, limit: int) -> BulkReport:
+    """ asyncio twin of run_many; call(target) returns an awaitable Result. """
+    if limit < 1: raise ValueError(f'limit must be at least 1, got {limit}')
+    import asyncio
+    semaphore = asyncio.Semaphore(limit)
+    started = time.monotonic()
+
+    async def run(target) -> Outcome:
+        async with semaphore:
+            began = time.monotonic()
+            try:
+                result = await call(target)
+            except Exception as e:
+                return _failed(target, e, time.monotonic() - began)
+            return Outcome(target, result.return_code, None, time.monotonic() - began)
+
+    outcomes = await asyncio.gather(*(run(target) for target in targets))
+    return BulkReport(operation, list(outcomes), time.monotonic() - started)
@@ -0,0 +1,385 @@
+"""
+    Minimal D-Bus client, just enough to read NetworkManager state over the system bus socket.
+
+    Only the wire protocol pieces NetworkManager needs are implemented: EXTERNAL auth, method calls,
+    and (un)marshalling of the basic, array, struct, dict and variant types. No third party packages are required.
+"""
+import os
+import socket
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+
+___all__ = ['DBusConnection', 'DBusError', 'Variant', 'SYSTEM_BUS_ADDRESS']
+
+
+
+SYSTEM_BUS_ADDRESS = 'unix:path=/var/run/dbus/system_bus_socket'
+
+
+class DBusError(Exception):
+    def __init__(self, name: str, message: str = ''):
+        Exception.__init__(self, f'{name}: {message}' if message else name)
+        self.name = name
+        self.message = message
+
+
+
+class Variant(object):
+    """ A value with an explicit signature, used when marshalling a 'v'. Unmarshalled variants are returned as plain values. """
+    __slots__ = ['signature', 'value']
+    def __init__(self, signature: str, value):
+        self.signature = signature
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.signature} {self.value!r}>"
+
+
+
+class MessageType(object):
+    method_call = 1
+    method_return = 2
+    error = 3
+    signal = 4
+
+
+class HeaderField(object):
+    path = 1
+    interface = 2
+    member = 3
+    error_name = 4
+    reply_serial = 5
+    destination = 6
+    sender = 7
+    signature = 8
+
+    signatures = { path: 'o', interface: 's', member: 's', error_name: 's', reply_serial: 'u', destination: 's', sender: 's', signature: 'g' }
+
+
+
+_fixed = {
+        'y': (1, 'B'),
+        'b': (4, 'I'),
+        'n': (2, 'h'),
+        'q': (2, 'H'),
+        'i': (4, 'i'),
+        'u': (4, 'I'),
+        'x': (8, 'q'),
+        't': (8, 'Q'),
+        'd': (8, 'd'),
+        'h': (4, 'I'),
+        }
+_alignment = { 's': 4, 'o': 4, 'g': 1, 'a': 4, '(': 8, '{': 8, 'v': 1, **{ code: size for code, (size, _) in _fixed.items() } }
+
+
+def split_signature(signature: str) -> [str]:
+    """ Splits a signature into its single complete types: 'sa{sv}u' -> ['s', 'a{sv}', 'u'] """
+    types = []
+    i = 0
+    while i < len(signature):
+        end = _complete_type_end(signature, i)
+        types.append(signature[i:end])
+        i = end
+    return types
+
+
+def _complete_type_end(signature: str, i: int) -> int:
+    code = signature[i]
+    if code == 'a':
+        return _complete_type_end(signature, i + 1)
+    if code in '({':
+        close = ')' if code == '(' else '}'
+        depth = 0
+        for j in range(i, len(signature)):
+            if signature[j] == code: depth += 1
+            elif signature[j] == close:
+                depth -= 1
+                if depth == 0: return j + 1
+        raise ValueError(f'unbalanced signature: {signature!r}')
+    return i + 1
+
+
+
+class _Writer(object):
+    def __init__(self, endian: str = '<'):
+        self.buf = bytearray()
+        self.endian = endian
+
+    def align(self, n: int):
+        self.buf.extend(b'\0' * (-len(self.buf) % n))
+
+    def pack(self, fmt: str, value):
+        self.buf.extend(struct.pack(self.endian + fmt, value))
+
+    def write(self, signature: str, value):
+        code = signature[0]
+        self.align(_alignment[code])
+        if code in _fixed:
+            if code == 'b': value = 1 if value else 0
+            self.pack(_fixed[code][1], value)
+        elif code in 'so':
+            data = value.encode()
+            self.pack('I', len(data))
+            self.buf.extend(data + b'\0')
+        elif code == 'g':
+            data = value.encode()
+            self.pack('B', len(data))
+            self.buf.extend(data + b'\0')
+        elif code == 'v':
+            if not isinstance(value, Variant): raise TypeError(f'variant values must be wrapped in Variant, got {value!r}')
+            self.write('g', value.signature)
+            self.write(value.signature, value.value)
+        elif code == '(':
+            for sub, item in zip(split_signature(signature[1:-1]), value):
+                self.write(sub, item)
+        elif code == 'a':
+            element = signature[1:]
+            self.pack('I', 0)
+            length_at = len(self.buf) - 4
+            self.align(_alignment[element[0]])
+            start = len(self.buf)
+            if element[0] == '{':
+                key_sig, value_sig = split_signature(element[1:-1])
+                for key, item in value.items():
+                    self.align(8)
+                    self.write(key_sig, key)
+                    self.write(value_sig, item)
+            else:
+                for item in value:
+                    self.write(element, item)
+            struct.pack_into(self.endian + 'I', self.buf, length_at, len(self.buf) - start)
+        else:
+            raise ValueError(f'unsupported signature: {signature!r}')
+
+
+
+class _Reader(object):
+    def __init__(self, data: bytes, endian: str = '<', offset: int = 0):
+        self.data = data
+        self.endian = endian
+        self.offset = offset
+
+    def align(self, n: int):
+        self.offset += -self.offset % n
+
+    def unpack(self, fmt: str):
+        value, = struct.unpack_from(self.endian + fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def read(self, signature: str):
+        code = signature[0]
+        self.align(_alignment[code])
+        if code in _fixed:
+            value = self.unpack(_fixed[code][1])
+            return bool(value) if code == 'b' else value
+        if code in 'so':
+            length = self.unpack('I')
+            value = self.data[self.offset:self.offset + length].decode()
+            self.offset += length + 1
+            return value
+        if code == 'g':
+            length = self.unpack('B')
+            value = self.data[self.offset:self.offset + length].decode()
+            self.offset += length + 1
+            return value
+        if code == 'v':
+            return self.read(self.read('g'))
+        if code == '(':
+            return tuple(self.read(sub) for sub in split_signature(signature[1:-1]))
+        if code == 'a':
+            element = signature[1:]
+            length = self.unpack('I')
+            self.align(_alignment[element[0]])
+            end = self.offset + length
+            if element[0] == '{':
+                key_sig, value_sig = split_signature(element[1:-1])
+                d = { }
+                while self.offset < end:
+                    self.align(8)
+                    key = self.read(key_sig)
+                    d[key] = self.read(value_sig)
+                return d
+            items = []
+            while self.offset < end:
+                items.append(self.read(element))
+            return items
+        raise ValueError(f'unsupported signature: {signature!r}')
+
+
+
+class Message(object):
+    __slots__ = ['type', 'flags', 'serial', 'fields', 'body']
+    def __init__(self, type: int, serial: int, fields: dict, body: tuple = (), flags: int = 0):
+        self.type = type
+        self.flags = flags
+        self.serial = serial
+        self.fields = fields
+        self.body = body
+
+    def ToBytes(self) -> bytes:
+        signature = self.fields.get(HeaderField.signature, '')
+        body = _Writer()
+        for sub, value in zip(split_signature(signature), self.body):
+            body.write(sub, value)
+
+        header = _Writer()
+        header.buf.extend(b'l')
+        header.pack('B', self.type)
+        header.pack('B', self.flags)
+        header.pack('B', 1)
+        header.pack('I', len(body.buf))
+        header.pack('I', self.serial)
+        header.write('a(yv)', [(code, Variant(HeaderField.signatures[code], value)) for code, value in self.fields.items()])
+        header.align(8)
+        return bytes(header.buf + body.buf)
+
+    @classmethod
+    def FromBytes(cls, data: bytes) -> 'Message':
+        endian = '<' if data[0:1] == b'l' else '>'
+        reader = _Reader(data, endian, offset=4)
+        body_length = reader.unpack('I')
+        serial = reader.unpack('I')
+        fields = dict(reader.read('a(yv)'))
+        reader.align(8)
+        body = []
+        body_reader = _Reader(data[reader.offset:reader.offset + body_length], endian)
+        for sub in split_signature(fields.get(HeaderField.signature, '')):
+            body.append(body_reader.read(sub))
+        return cls(data[1], serial, fields, tuple(body), flags=data[2])
+
+    @staticmethod
+    def Length(header: bytes) -> int:
+        """ Total message length, given at least the first 16 bytes. """
+        endian = '<' if header[0:1] == b'l' else '>'
+        body_length, _, fields_length = struct.unpack_from(endian + 'III', header, 4)
+        return 16 + fields_length + (-fields_length % 8) + body_length
+
+
+
+class DBusConnection(object):
+    """
+        A blocking connection to a message bus.
+
+            bus = DBusConnection()  # the system bus; pass address='unix:path=...' for another bus
+            state = bus.GetProperty('org.freedesktop.NetworkManager', '/org/freedesktop/NetworkManager', 'org.freedesktop.NetworkManager', 'State')
+
+        Calls are serialized with a lock, so one connection can be shared between threads. Each read on the socket
+        waits at most timeout seconds; Deadline bounds several calls together.
+    """
+    def __init__(self, address: str = None, timeout: float = 5.0):
+        self.address = address or os.environ.get('DBUS_SYSTEM_BUS_ADDRESS') or SYSTEM_BUS_ADDRESS
+        self.timeout = timeout
+        self.unique_name = None
+        self._socket = None
+        self._buffer = b''
+        self._serial = 0
+        self._lock = threading.RLock()
+        # time.monotonic() past which calls raise socket.timeout, see Deadline
+        self._deadline = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._socket_address(self.address))
+        sock.sendall(b'\0' + b'AUTH EXTERNAL ' + str(os.getuid()).encode().hex().encode() + b'\r\n')
+        reply = b''
+        while not reply.endswith(b'\r\n'):
+            chunk = sock.recv(4096)
+            if not chunk: raise ConnectionError('bus closed the connection during authentication')
+            reply += chunk
+        if not reply.startswith(b'OK'):
+            sock.close()
+            raise ConnectionError(f'bus rejected authentication: {reply.decode().strip()}')
+        sock.sendall(b'BEGIN\r\n')
+
+        self._socket = sock
+        self._buffer = b''
+        self.unique_name, = self._call('org.freedesktop.DBus', '/org/freedesktop/DBus', 'org.freedesktop.DBus', 'Hello')
+
+    @staticmethod
+    def _socket_address(address: str) -> str:
+        for entry in address.split(';'):
+            transport, _, params = entry.partition(':')
+            if transport != 'unix': continue
+            options = dict(param.split('=', 1) for param in params.split(',') if '=' in param)
+            if 'path' in options: return options['path']
+            if 'abstract' in options: return '\0' + options['abstract']
+        raise ValueError(f'no supported unix socket in bus address: {address!r}')
+
+    def close(self):
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+            self._socket = None
+
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @contextmanager
+    def Deadline(self, seconds: float):
+        """
+            Calls made inside, from this thread, raise socket.timeout once seconds have passed, however many they are:
+
+                with bus.Deadline(2.0):
+                    devices = bus.Call(...)
+                    states = [bus.GetProperty(...) for device in devices]
+
+            Other threads wait for the block to end, as they do for a call.
+        """
+        with self._lock:
+            previous, self._deadline = self._deadline, time.monotonic() + seconds
+            try:
+                yield self
+            finally:
+                self._deadline = previous
+                if self._socket is not None: self._socket.settimeout(self.timeout)
+
+    def _receive(self) -> Message:
+        while True:
+            if len(self._buffer) >= 16:
+                length = Message.Length(self._buffer)
+                if len(self._buffer) >= length:
+                    data, self._buffer = self._buffer[:length], self._buffer[length:]
+                    return Message.FromBytes(data)
+            if self._deadline is not None:
+                remaining = self._deadline - time.monotonic()
+                if remaining <= 0: raise socket.timeout('bus call deadline passed')
+                self._socket.settimeout(remaining if self.timeout is None else min(self.timeout, remaining))
+            chunk = self._socket.recv(65536)
+            if not chunk: raise ConnectionError('bus closed the connection')
+            self._buffer += chunk
+
+    def _call(self, destination: str, path: str, interface: str, member: str, signature: str = '', args: tuple = ()) -> tuple:
+        self._serial += 1
+        fields = { HeaderField.path: path, HeaderField.interface: interface, HeaderField.member: member, HeaderField.destination: destination }
+        if signature: fields[HeaderField.signature] = signature
+        self._socket.sendall(Message(MessageType.method_call, self._serial, fields, tuple(args)).ToBytes())
+
+        while True:
+            reply = self._receive()
+            if reply.fields.get(HeaderField.reply_serial) != self._serial: continue
+            if reply.type == MessageType.error:
+                raise DBusError(reply.fields.get(HeaderField.error_name, ''), reply.body[0] if reply.body else '')
+            return reply.body
+
+    def Call(self, destination: str, path: str, interface: str, member: str, signature: str = '', args: tuple = ()) -> tuple:
+        """ Calls a method and returns the reply body as a tuple. Raises DBusError for error replies. """
+        with self._lock:
+            if self._socket is None: self._connect()
+            try:
+                return self._call(destination, path, interface, member, signature, args)
+            except (OSError, ConnectionError):
+                self.close()
+                raise
+
+    def GetProperty(self, destination: str, path: str, interface: str, name: str):
+        return self.Call(destination, path, 'org.freedesktop.DBus.Properties', 'Get', 'ss', (interface, name))[0]
+
+    def GetAllProperties(self, destination: str, path: str, interface: str) -> dict:
+        return self.Call(destination, path, 'org.freedesktop.DBus.Properties', 'GetAll', 's', (interface,))[0]
@@ -0,0 +1,326 @@
+"""
+    Opt-in TTL cache for read-only commands, keyed by the final nmcli argv.
+
+        nmcli.set_cache(ResultCache(max_entries=512, ttls={ 'device status': 1.0 }))
+        nmcli.devices.status()      # runs nmcli
+        nmcli.devices.status()      # served from the cache until its ttl expires
+        nmcli.connections.Up('x')   # mutating: drops the connection, device, general and networking entries
+        nmcli.cache.stats()
+
+    An entry past its ttl but still within stale_ttl is returned as is while one background call refreshes it
+    (stale-while-revalidate). Exit code 10 ("does not exist") is cached as well, for negative_ttl seconds.
+
+    Every caller gets a Result, or a cached failure, of its own (see Result.Copy and copy_error): a cached entry is
+    kept unparsed and parsed again per hit, which is still far cheaper than running nmcli. A read that was running while a write invalidated its command is
+    returned to its caller but not cached, since it may describe the state from before the write.
+    `device wifi list --rescan yes|auto` asks for a new scan, so it is treated like `device wifi rescan`.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from .concurrency import copy_error
+
+
+___all__ = ['ResultCache', 'command_name', 'is_read']
+
+
+
+_aliases = { 'dev': 'device', 'con': 'connection', 'c': 'connection', 'd': 'device', 'g': 'general', 'gen': 'general', 'n': 'networking', 'net': 'networking', 'r': 'radio' }
+_options_with_values = ('--fields', '-f', '--mode', '-m', '--escape', '-e', '--colors', '--wait', '-w')
+
+
+def command_words(argv: [str]) -> [str]:
+    """ The command words of an nmcli argv, with global options dropped and object aliases expanded. """
+    words = []
+    args = iter(argv[1:])
+    for arg in args:
+        if arg in _options_with_values: next(args, None)
+        elif arg.startswith('-') and not words: continue
+        else: words.append(arg)
+    if words: words[0] = _aliases.get(words[0], words[0])
+    return words
+
+
+def command_name(argv: [str]) -> str:
+    """ ['nmcli', '--terse', 'dev', 'status'] -> 'device status' """
+    return ' '.join(command_words(argv))
+
+
+def is_read(argv: [str]) -> bool:
+    """ True when the command only reads state, so running it once for several callers is equivalent. """
+    return ResultCache.writes(command_name(argv)) is None
+
+
+
+class _Entry(object):
+    __slots__ = ['name', 'value', 'error', 'expires', 'stale_until', 'refreshing']
+    def __init__(self, name: str, value, error: Exception, expires: float, stale_until: float):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.expires = expires
+        self.stale_until = stale_until
+        self.refreshing = False
+
+
+
+class ResultCache(object):
+    # seconds each read stays fresh, by command prefix; the longest matching prefix wins
+    default_ttls = {
+            'general status':          2.0,
+            'general permissions':     60.0,
+            'general hostname':        60.0,
+            'general logging':         60.0,
+            'device status':           2.0,
+            'device show':             2.0,
+            'device wifi list':        10.0,
+            'device lldp':             30.0,
+            'connection show':         5.0,
+            'radio':                   5.0,
+            'networking connectivity': 2.0,
+            }
+
+    # what a mutating command makes stale, by command prefix
+    _everything = ('',)
+    _activation = ('connection', 'device', 'general', 'networking')
+    default_invalidations = {
+            'connection up':       _activation,
+            'connection down':     _activation,
+            'connection delete':   _activation,
+            'connection modify':   ('connection', 'device show'),
+            'connection add':      ('connection',),
+            'connection clone':    ('connection',),
+            'connection edit':     ('connection',),
+            'connection reload':   ('connection',),
+            'connection load':     ('connection',),
+            'connection import':   ('connection',),
+            'device set':          ('device',),
+            'device connect':      _activation,
+            'device disconnect':   _activation,
+            'device reapply':      ('device', 'connection'),
+            'device modify':       ('device', 'connection'),
+            'device delete':       _activation,
+            'device wifi connect': _activation,
+            'device wifi hotspot': _activation,
+            'device wifi rescan':  ('device wifi',),
+            'general hostname':    ('general hostname',),
+            'general logging':     ('general logging',),
+            'radio':               ('radio', 'general', 'device'),
+            'networking':          _everything,
+            }
+    # these prefixes are reads when called bare and writes when given a value
+    _setters = ('general hostname', 'general logging', 'radio', 'networking')
+
+    does_not_exist = 10
+
+    def __init__(self, max_entries: int = 256, ttls: dict = None, stale_ttl: float = 0.0, negative_ttl: float = 2.0, clock: callable = time.monotonic):
+        """
+        :param max_entries: least recently used entries are evicted past this size
+        :param ttls: overrides for default_ttls, e.g. { 'device status': 0.5 }; a ttl of 0 disables caching for that command
+        :param stale_ttl: seconds after expiry during which the stale entry is served while it is refreshed in the background
+        :param negative_ttl: seconds a "does not exist" (exit code 10) failure is cached
+        """
+        self.max_entries = max_entries
+        self.ttls = { **self.default_ttls, **(ttls or { }) }
+        self.invalidations = dict(self.default_invalidations)
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by every invalidation; a read only stores its Result if none happened while it ran
+        self._generation = 0
+        self._stats = dict(hits=0, misses=0, stale_hits=0, negative_hits=0, refreshes=0, evictions=0, invalidations=0, discarded=0)
+
+    # -------------------------------------------------------------------------------- policy
+
+    @staticmethod
+    def _prefix(name: str, table: dict) -> str or None:
+        best = None
+        for prefix in table:
+            if (name == prefix or name.startswith(prefix + ' ')) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return best
+
+    @classmethod
+    def writes(cls, name: str, invalidations: dict = None) -> tuple or None:
+        """ The prefixes a command invalidates, or None when it is a read. """
+        invalidations = invalidations or cls.default_invalidations
+        words = name.split()
+        setter = cls._prefix(name, dict.fromkeys(cls._setters))
+        if setter is not None:
+            args = words[len(setter.split()):]
+            if setter == 'radio': args = args[1:]  # radio {wifi | wwan | all} [on | off]
+            if setter == 'networking' and args[:1] == ['connectivity']: return None
+            return invalidations[setter] if args else None
+
+        if words[:3] == ['device', 'wifi', 'list'] and cls._rescans(words):
+            return invalidations.get('device wifi rescan', ('device wifi',))
+
+        prefix = cls._prefix(name, invalidations)
+        return None if prefix is None else invalidations[prefix]
+
+    @staticmethod
+    def _rescans(words: [str]) -> bool:
+        """ `--rescan yes` or `--rescan auto` among the words of a wifi list: nmcli scans first, it is not a plain read """
+        return any(word == '--rescan' and value in ('yes', 'auto') for word, value in zip(words, words[1:]))
+
+    def _writes(self, name: str) -> tuple or None:
+        return self.writes(name, self.invalidations)
+
+    def ttl(self, name: str) -> float:
+        prefix = self._prefix(name, self.ttls)
+        return 0.0 if prefix is None else self.ttls[prefix]
+
+    # -------------------------------------------------------------------------------- entries
+
+    def _lookup(self, key: tuple, now: float) -> (_Entry, bool):
+        """ Returns (entry, needs refresh); entry is None on a miss. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stale_until <= now:
+                if entry is not None: del self._entries[key]
+                self._stats['misses'] += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            if entry.error is not None: self._stats['negative_hits'] += 1
+            if entry.expires > now:
+                self._stats['hits'] += 1
+                return entry, False
+
+            self._stats['stale_hits'] += 1
+            refresh = not entry.refreshing
+            entry.refreshing = True
+            return entry, refresh
+
+    def _store(self, key: tuple, name: str, value, error: Exception = None, generation: int = None):
+        ttl = self.negative_ttl if error is not None else self.ttl(name)
+        if ttl <= 0: return
+        now = self.clock()
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self._stats['discarded'] += 1
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = _Entry(name, value, error, now + ttl, now + ttl + (self.stale_ttl if error is None else 0.0))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _is_negative(self, error: Exception) -> bool:
+        data = getattr(error, 'data', None)
+        return isinstance(data, dict) and data.get('retcode') == self.does_not_exist
+
+    def invalidate(self, *prefixes: str):
+        """ Drops every entry whose command starts with one of the prefixes ('' drops everything). """
+        with self._lock:
+            self._generation += 1
+            for key in [key for key, entry in self._entries.items() if any(entry.name == p or entry.name.startswith(p) for p in prefixes)]:
+                del self._entries[key]
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -------------------------------------------------------------------------------- execution
+
+    def execute(self, argv: [str], load: callable):
+        """
+            Returns the cached Result for argv, or calls load() (which runs nmcli and parses) and caches what it returns.
+        """
+        name = command_name(argv)
+        invalidates = self._writes(name)
+        if invalidates is not None:
+            try:
+                return load()
+            finally:
+                self.invalidate(*invalidates)
+
+        if self.ttl(name) <= 0: return load()
+
+        key = tuple(argv)
+        entry, refresh = self._lookup(key, self.clock())
+        if entry is not None:
+            if refresh: threading.Thread(target=self._refresh, args=(key, name, load), name='nmcli-cache-refresh', daemon=True).start()
+            if entry.error is not None: raise copy_error(entry.error)
+            return self._copy(entry.value)
+        return self._load(key, name, load)
+
+    @staticmethod
+    def _copy(value):
+        copy = getattr(value, 'Copy', None)
+        return value if copy is None else copy()
+
+    def _load(self, key: tuple, name: str, load: callable):
+        generation = self._generation
+        try:
+            value = load()
+        except Exception as e:
+            if self._is_negative(e): self._store(key, name, None, e, generation)
+            raise
+        # the cache keeps its own copy: the caller may parse, and change, the one it gets
+        self._store(key, name, self._copy(value), generation=generation)
+        return value
+
+    def _refresh(self, key: tuple, name: str, load: callable):
+        with self._lock:
+            self._stats['refreshes'] += 1
+        try:
+            self._load(key, name, load)
+        except Exception:
+            with self._lock:
+                self._entries.pop(key, None)
+
+    async def async_execute(self, argv: [str], load: callable):
+        """ asyncio twin of execute; load is a coroutine function. """
+        name = command_name(argv)
+        invalidates = self._writes(name)
+        if invalidates is not None:
+            try:
+                return await load()
+            finally:
+                self.invalidate(*invalidates)
+
+        if self.ttl(name) <= 0: return await load()
+
+        key = tuple(argv)
+        entry, refresh = self._lookup(key, self.clock())
+        if entry is not None:
+            if refresh:
+                import asyncio
+                asyncio.ensure_future(self._async_refresh(key, name, load))
+            if entry.error is not None: raise copy_error(entry.error)
+            return self._copy(entry.value)
+        return await self._async_load(key, name, load)
+
+    async def _async_load(self, key: tuple, name: str, load: callable):
+        generation = self._generation
+        try:
+            value = await load()
+        except Exception as e:
+            if self._is_negative(e): self._store(key, name, None, e, generation)
+            raise
+        self._store(key, name, self._copy(value), generation=generation)
+        return value
+
+    async def _async_refresh(self, key: tuple, name: str, load: callable):
+        with self._lock:
+            self._stats['refreshes'] += 1
+        try:
+            await self._async_load(key, name, load)
+        except Exception:
+            with self._lock:
+                self._entries.pop(key, None)
@@ -0,0 +1,200 @@
+import copy
+import threading
+from functools import partial
+
+from .results import Result
+
+
+___all__ = ['gather', 'async_gather', 'SingleFlight', 'DEFAULT_MAX_WORKERS']
+
+
+
+DEFAULT_MAX_WORKERS = 4
+
+
+
+def _unpack(call) -> (callable, tuple):
+    """
+        A call is either a callable, or a tuple of (callable, *args).
+
+            nmcli.general.status
+            (nmcli.connections.Show, 'Wired connection 1')
+    """
+    if callable(call): return call, ()
+    func, *args = call
+    return func, tuple(args)
+
+
+def gather(*calls, max_workers: int = DEFAULT_MAX_WORKERS, return_exceptions: bool = False) -> [Result]:
+    """
+        Runs independent nmcli invocations on a bounded thread pool and returns their Results in the order given.
+
+        max_workers caps how many nmcli processes are alive at once, so the NetworkManager daemon is not flooded.
+        If return_exceptions is True, a failing call puts its exception in the list instead of raising.
+    """
+    if not calls: return []
+    if max_workers < 1: raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls)), thread_name_prefix='nmcli') as pool:
+        futures = [pool.submit(func, *args) for func, args in map(_unpack, calls)]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions: raise
+                results.append(e)
+        return results
+
+
+async def async_gather(*calls, limit: int = DEFAULT_MAX_WORKERS, return_exceptions: bool = False) -> [Result]:
+    """
+        asyncio twin of gather. At most `limit` invocations are in flight at once.
+
+        Calls should come from the async managers (see nmcli.aio), or be awaitables themselves;
+        a plain synchronous command still works but blocks the loop while it runs.
+    """
+    if limit < 1: raise ValueError(f'limit must be at least 1, got {limit}')
+    import asyncio
+    import inspect
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call):
+        async with semaphore:
+            if inspect.isawaitable(call): return await call
+
+            func, args = _unpack(call)
+            result = func(*args)
+            if inspect.isawaitable(result): result = await result
+            return result
+
+    return await asyncio.gather(*(run(call) for call in calls), return_exceptions=return_exceptions)
+
+
+
+class _Call(object):
+    """ An in-flight call, waited on by the callers that joined it. """
+    __slots__ = ['done', 'result', 'error']
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None: raise copy_error(self.error)
+        return self.result
+
+
+
+class _AsyncCall(object):
+    """ An in-flight call on an event loop: a task of its own, and how many callers still await it. """
+    __slots__ = ['task', 'waiters']
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+
+def copy_error(error: BaseException) -> BaseException:
+    """
+        A copy of error, caused by it, to raise to one more caller: raising the one instance again in every caller
+        would pile their tracebacks onto it. error itself when it cannot be copied.
+    """
+    try:
+        copied = copy.copy(error)
+    except Exception:
+        return error
+    copied.__cause__ = error
+    return copied
+
+
+def _copy(value):
+    """ Result.Copy of value, so callers that joined a call do not share one Result; anything else as is """
+    copy = getattr(value, 'Copy', None)
+    return value if copy is None else copy()
+
+
+
+class SingleFlight(object):
+    """
+        Coalesces identical concurrent calls: while a call for a key is running, later callers with the same key
+        wait for its outcome instead of running their own.
+
+        Threads share one table; each event loop gets its own, so an awaiting coroutine never blocks on a thread
+        (or the other way around). The caller that started a call gets its Result or exception, the callers that joined
+        get a copy each (see Result.Copy and copy_error).
+
+        On an event loop the call runs as a task of its own: cancelling one caller, the one that started it included,
+        leaves it running for the others, and it is only cancelled once no caller awaits it any more.
+    """
+    def __init__(self):
+        self._calls = { }
+        self._async_calls = { }
+        self._lock = threading.Lock()
+        self.stats = dict(calls=0, coalesced=0)
+
+    def do(self, key, func: callable):
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader: call = self._calls[key] = _Call()
+            else: self.stats['coalesced'] += 1
+
+        if not leader: return _copy(call.wait())
+
+        try:
+            result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        else:
+            call.result = result
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def async_do(self, key, func: callable):
+        """ asyncio twin of do; func is a coroutine function. """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._async_calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._async_calls[key] = _AsyncCall(loop.create_task(func()))
+                call.task.add_done_callback(partial(self._async_done, key, call))
+            else: self.stats['coalesced'] += 1
+            call.waiters += 1
+
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if self._leave(key, call): call.task.cancel()
+            raise
+        except BaseException as e:
+            self._leave(key, call)
+            if leader: raise
+            raise copy_error(e)
+        self._leave(key, call)
+        return result if leader else _copy(result)
+
+    def _leave(self, key, call: _AsyncCall) -> bool:
+        """ True when the last caller of call left before it finished; nobody can join it after that """
+        with self._lock:
+            call.waiters -= 1
+            if call.waiters or call.task.done(): return False
+            if self._async_calls.get(key) is call: del self._async_calls[key]
+            return True
+
+    def _async_done(self, key, call: _AsyncCall, task):
+        with self._lock:
+            if self._async_calls.get(key) is call: del self._async_calls[key]
+        if not task.cancelled(): task.exception()  # mark retrieved, in case every caller left
@@ -1,6 +1,11 @@
+import re
 
-from .base import ROOT
+from .base import ROOT, Parser, Tables
+from .constants import NMCLI_FIELDS
+from .events import MonitorStream
+from .records import ConnectionProfile, ActiveConnection
 from .results import Result
+from .standard_parsers import multiline_parser
 
 
 ___all__ = ['ConnectionCommand']
@@ -63,7 +68,25 @@ class _ConnShowCommand(ROOT):
         apath = 'apath'
         active = '--active'
         order = '--order'
-    def __call__(self, arg: str, *, id: bool = None, uuid: bool = None, path: str = None, apath: str = None, active: bool = None) -> Result:
+
+    @staticmethod
+    def _parser(stdout: str, headers: list = None) -> dict:
+        return multiline_parser(stdout, 'connection.id')
+
+    @staticmethod
+    def _profiles(stdout: str, headers: list or tuple) -> [ConnectionProfile]:
+        return ConnectionProfile.Parse(stdout, headers)
+
+    @staticmethod
+    def _active(stdout: str, headers: list or tuple) -> [ActiveConnection]:
+        return ActiveConnection.Parse(stdout, headers)
+
+    _list_parser = Parser(action=_profiles, column_names=NMCLI_FIELDS['con'])
+    _active_parser = Parser(action=_active, column_names=['NAME', 'UUID', 'TYPE', 'DEVICE', 'STATE'])
+    # details of given profiles: every setting and the active data, one MultilineRecord per profile
+    _details_parser = Parser(action=_parser, column_names=['all'])
+    def __call__(self, arg: str or [str] = None, *, id: bool = None, uuid: bool = None, path: str = None, apath: str = None, active: bool = None,
+                 fields: [str] or str = None, show_secrets: bool = None) -> Result:
         """
             show [--active] [id | uuid | path | apath] ID...
                 Show details for specified connections. By default, both static configuration and active connection data are displayed.
@@ -97,22 +120,53 @@ class _ConnShowCommand(ROOT):
 
                 When no command is given to the nmcli connection, the default action is nmcli connection show.
 
-        :param arg:
+        :param arg: connection to show, or a list of them; None lists all profiles as [ConnectionProfile, ...] (or
+                    [ActiveConnection, ...] with active)
+                    details are { connection.id: MultilineRecord }, e.g. data['Wired connection 1']['ipv4']['method']
         :param id:
         :param uuid:
         :param path:
         :param apath:
         :param active:
+        :param fields: --fields; columns of the list (e.g. ['NAME', 'UUID']), or settings, properties and active
+                       sections of the details (e.g. ['ipv4.method', 'IP4']); connection.id is always requested for details
+        :param show_secrets: nmcli --show-secrets; passwords and keys instead of <hidden>
         :return:
         """
         args = []
-        kwargs = {}
-        if id is not None: kwargs[self.sub_cmd.ID] = arg
-        if uuid is not None: kwargs[self.sub_cmd.uuid] = arg
-        if path is not None: kwargs[self.sub_cmd.path] = arg
-        if apath is not None: kwargs[self.sub_cmd.apath] = arg
-        if active is not None: args.append(self.sub_cmd.active)
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+        if active: args.append(self.sub_cmd.active)
+        keyword = next((word for flag, word in ((id, self.sub_cmd.ID), (uuid, self.sub_cmd.uuid), (path, self.sub_cmd.path), (apath, self.sub_cmd.apath))
+                        if flag is not None), None)
+        names = [arg] if isinstance(arg, str) else list(arg or [])
+        for name in names:
+            if keyword is not None: args.append(keyword)
+            args.append(name)
+        options = ['--show-secrets'] if show_secrets else None
+        if names:
+            parser = self._details_parser
+            fields = self._select_fields(fields, 'connection.id')
+        else:
+            parser = self._active_parser if active else self._list_parser
+            fields = self._select_fields(fields)
+            if fields is not None: fields = [field.upper() for field in fields]
+        return self._run_action(self.__base_command__, self.__cmd__, args=args, parser=parser, fields=fields, options=options)
+
+    @staticmethod
+    def Chunks(uuids: [str], names: dict, size: int) -> [[str]]:
+        """
+            uuids in chunks of at most size, for one details call each. Details are keyed by connection.id, so two
+            profiles with the same name ({ uuid: name }) never share a chunk.
+        """
+        chunks = []
+        for uuid in uuids:
+            name = names.get(uuid)
+            for chunk in chunks:
+                if len(chunk) < size and (name is None or all(names.get(other) != name for other in chunk)):
+                    chunk.append(uuid)
+                    break
+            else:
+                chunks.append([uuid])
+        return chunks
 
     def order(self, active: bool, *args, **kwargs):
         """
@@ -178,7 +232,8 @@ class _ConnUpCommand(ROOT):
         ifname = 'ifname'
         ap = 'ap'
         passwd_file = 'passwd-file'
-    def __call__(self, arg: str, *, id: bool = None, uuid: bool = None, path: bool = None, if_name: str = None, ap: str = None, passwd_file: str = None) -> Result:
+    def __call__(self, arg: str, *, id: bool = None, uuid: bool = None, path: bool = None, if_name: str = None, ap: str = None, passwd_file: str = None,
+                 wait: float = None, timeout: float = None) -> Result:
         """
             up [id | uuid | path] ID [ifname ifname] [ap BSSID] [passwd-file file]
 
@@ -189,16 +244,20 @@ class _ConnUpCommand(ROOT):
         :param ifname:
         :param ap:
         :param passwd_file:
+        :param wait: seconds to wait for the activation (nmcli --wait); exit code 3 when they run out
+        :param timeout: seconds after which nmcli, if still running, is killed (subprocess.TimeoutExpired)
         :return:
         """
         args = []
         kwargs = {}
         if id is not None: kwargs[self.sub_cmd.ID] = arg
         if uuid is not None: kwargs[self.sub_cmd.uuid] = arg
+        if path is not None: kwargs[self.sub_cmd.path] = arg
+        if not kwargs: args.append(arg)
         if if_name is not None: kwargs[self.sub_cmd.ifname] = if_name
         if ap is not None: kwargs[self.sub_cmd.ap] = ap
         if passwd_file is not None: kwargs[self.sub_cmd.passwd_file] = passwd_file
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs, options=self._wait(wait), timeout=timeout)
 
 class _ConnDownCommand(ROOT):
     """
@@ -222,14 +281,16 @@ class _ConnDownCommand(ROOT):
         uuid = 'uuid'
         path = 'path'
         apath = 'apath'
-    def __call__(self, arg: str, *, id: bool = None, uuid: bool = None, path: bool = None, apath: bool = None) -> Result:
+    def __call__(self, arg: str, *, id: bool = None, uuid: bool = None, path: bool = None, apath: bool = None, wait: float = None,
+                 timeout: float = None) -> Result:
         args = []
         kwargs = {}
         if id is not None: kwargs[self.sub_cmd.ID] = arg
         if uuid is not None: kwargs[self.sub_cmd.uuid] = arg
         if path is not None: kwargs[self.sub_cmd.path] = arg
         if apath is not None: kwargs[self.sub_cmd.apath] = arg
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+        if not kwargs: args.append(arg)
+        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs, options=self._wait(wait), timeout=timeout)
 
 class _ConnModifyCommand(ROOT):
     """
@@ -252,18 +313,66 @@ class _ConnModifyCommand(ROOT):
         ID = 'id'
         uuid = 'uuid'
         path = 'path'
-        option = 'option'
         temporary = '--temporary'
-    def __call__(self, arg: str, *args, temporary: bool = None, id: bool = None, uuid: bool = None, path: bool = None, option: bool = None, **kwargs) -> Result:
-        args = []
-        kwargs = {}
-        if id is not None: kwargs[self.sub_cmd.ID] = arg
-        if uuid is not None: kwargs[self.sub_cmd.uuid] = arg
-        if path is not None: kwargs[self.sub_cmd.path] = arg
+    def __call__(self, arg: str, *args, temporary: bool = None, id: bool = None, uuid: bool = None, path: bool = None,
+                 wait: float = None, timeout: float = None, **kwargs) -> Result:
+        """
+            nmcli connection modify [--temporary] [id | uuid | path] ID [+|-]setting.property value ...
 
-        if option is not None: kwargs[self.sub_cmd.option] = option
-        if temporary is True: args.append(self.sub_cmd.temporary)
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+            Every property goes into the one invocation, so the profile is written once:
+
+                nmcli.connections.Modify('office', { 'ipv4.method': 'manual', 'ipv4.addresses': ['10.0.0.2/24', '10.0.0.3/24'],
+                                                     '+ipv4.dns': '10.0.0.53', 'autoconnect': False })
+
+        :param args: { setting.property: value } mappings and/or setting.property, value pairs, e.g. '-ipv4.dns', '9.9.9.9';
+                     names are checked against the settings and the Tables aliases before nmcli runs (ValueError).
+                     Lists are joined with ',', booleans become yes/no and None clears the property.
+        :param id: with uuid and path, the keyword telling nmcli whether arg is a name, UUID or D-Bus path
+        :param timeout: seconds after which nmcli, if still running, is killed (subprocess.TimeoutExpired)
+        :param kwargs: property aliases (see Tables), with '_' for '-', e.g. ip4='10.0.0.2/24'
+        """
+        # --temporary and the ID come before the properties, so everything goes through args, in order
+        head = []
+        if temporary is True: head.append(self.sub_cmd.temporary)
+        if id is not None: head.append(self.sub_cmd.ID)
+        elif uuid is not None: head.append(self.sub_cmd.uuid)
+        elif path is not None: head.append(self.sub_cmd.path)
+        head.append(arg)
+        return self._run_action(self.__base_command__, self.__cmd__, args=[*head, *self.Properties(*args, self.Aliases(kwargs))],
+                                options=self._wait(wait), timeout=timeout)
+
+    @staticmethod
+    def Value(value) -> str:
+        """ A property value as nmcli takes it """
+        if value is None: return ''
+        if isinstance(value, bool): return 'yes' if value else 'no'
+        if isinstance(value, (list, tuple, set)): return ','.join(str(item) for item in value)
+        return str(value)
+
+    @staticmethod
+    def Aliases(kwargs: dict) -> dict:
+        """ { 'ip4': ..., 'con-name': ... } of keyword arguments (con_name=...); those left None are dropped """
+        return { key.replace('_', '-'): value for key, value in kwargs.items() if value is not None }
+
+    @classmethod
+    def Properties(cls, *args) -> [str]:
+        """ The validated property value argv of args (see __call__), in the order given """
+        pairs = []
+        name = None
+        for arg in args:
+            if isinstance(arg, dict):
+                if name is not None: raise ValueError(f"'{name}' has no value")
+                pairs += arg.items()
+            elif name is None: name = arg
+            else:
+                pairs.append((name, arg))
+                name = None
+        if name is not None: raise ValueError(f"'{name}' has no value")
+
+        argv = []
+        for name, value in pairs:
+            argv += [Tables.Validate(name), cls.Value(value)]
+        return argv
 
 class _ConnAddCommand(ROOT):
     """
@@ -311,14 +420,11 @@ class _ConnAddCommand(ROOT):
     """
     __cmd__ = 'add'
     class sub_cmd(object):
-        ID = 'id'
-        uuid = 'uuid'
-        path = 'path'
-
         save = 'save'
         yes = 'yes'
         no = 'no'
         temporary = '--temporary'
+        con_name = 'con-name'
 
         ethernet = "ethernet"
         wifi = "wifi"
@@ -343,11 +449,24 @@ class _ConnAddCommand(ROOT):
         macvlan = "macvlan"
         vxlan = "vxlan"
         dummy = "dummy"
-    def __call__(self, ID: str, *args, id: bool = None, uuid: bool = None, save: bool = True, temporary: bool = True, **kwargs) -> Result:
-        args = []
-        if save is not None: kwargs[self.sub_cmd.save] = self.sub_cmd.yes if save else self.sub_cmd.no
-        if temporary is True: args.append(self.sub_cmd.temporary)
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+    def __call__(self, ID: str, *args, save: bool = True, temporary: bool = None, **kwargs) -> Result:
+        """
+            nmcli connection add [save yes|no] con-name ID {option value | [+|-]setting.property value}...
+
+                nmcli.connections.Add('vlan10', { 'connection.type': 'vlan', 'vlan.id': 10, 'vlan.parent': 'eth0' })
+                nmcli.connections.Add('vlan10', type='vlan', dev='eth0', id=10, ip4='10.0.10.2/24')    # aliases, _ for -
+
+        :param ID: the profile name (con-name); None lets nmcli generate one
+        :param args: properties, as for Modify
+        :param temporary: do not save the profile to disk (save no)
+        :param kwargs: property aliases (see Tables), with '_' for '-'
+        """
+        head = []
+        if temporary: save = False
+        if save is not None: head += [self.sub_cmd.save, self.sub_cmd.yes if save else self.sub_cmd.no]
+        if ID is not None: head += [self.sub_cmd.con_name, ID]
+        properties = _ConnModifyCommand.Properties(*args, _ConnModifyCommand.Aliases(kwargs))
+        return self._run_action(self.__base_command__, self.__cmd__, args=[*head, *properties])
 
 class _ConnEditCommand(ROOT):
     """
@@ -428,12 +547,14 @@ class _ConnDeleteCommand(ROOT):
         ID = 'id'
         uuid = 'uuid'
         path = 'path'
-    def __call__(self, ID: str, *, id: bool = None, uuid: bool = None, path: bool = None) -> Result:
+    def __call__(self, ID: str, *, id: bool = None, uuid: bool = None, path: bool = None, wait: float = None, timeout: float = None) -> Result:
+        args = []
         kwargs = {}
         if id is not None: kwargs[self.sub_cmd.ID] = ID
         if uuid is not None: kwargs[self.sub_cmd.uuid] = ID
         if path is not None: kwargs[self.sub_cmd.path] = ID
-        return self._run_action(self.__base_command__, self.__cmd__, kwargs=kwargs)
+        if not kwargs: args.append(ID)
+        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs, options=self._wait(wait), timeout=timeout)
 
 class _ConnMonitorCommand(ROOT):
     """
@@ -447,12 +568,21 @@ class _ConnMonitorCommand(ROOT):
         ID = 'id'
         uuid = 'uuid'
         path = 'path'
-    def __call__(self, ID: str, *, id: bool = None, uuid: bool = None, path: bool = None) -> Result:
+    def __call__(self, ID: str = None, *, id: bool = None, uuid: bool = None, path: bool = None) -> MonitorStream:
+        """
+            Yields ConnectionChangedEvent / ConnectionRemovedEvent (see nmcli.events) as they are printed.
+            Close the stream, or use it as a context manager, to stop the nmcli process.
+
+        :param ID: connection to watch; all profiles when None
+        :return:
+        """
+        args = []
         kwargs = {}
         if id is not None: kwargs[self.sub_cmd.ID] = ID
         if uuid is not None: kwargs[self.sub_cmd.uuid] = ID
         if path is not None: kwargs[self.sub_cmd.path] = ID
-        return self._run_action(self.__base_command__, self.__cmd__, kwargs=kwargs)
+        if not kwargs and ID is not None: args.append(ID)
+        return self._stream_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
 
 class _ConnReloadCommand(ROOT):
     """
@@ -472,8 +602,24 @@ class _ConnLoadCommand(ROOT):
            Load/reload one or more connection files from disk. Use this after manually editing a connection file to ensure that NetworkManager is aware of its latest state.
     """
     __cmd__ = 'load'
-    def __call__(self, file_name: str = None) -> Result:
-        return self._run_action(self.__base_command__, self.__cmd__, file_name)
+    _failure = re.compile(r"^Could not load file '(.*)'$", re.M)
+
+    @classmethod
+    def Failures(cls, stderr: str) -> [str]:
+        """ The files nmcli reported it could not load """
+        return cls._failure.findall(stderr or '')
+
+    @staticmethod
+    def _parser(stdout: str, stderr: str) -> dict:
+        return { 'failed': _ConnLoadCommand.Failures(stderr) }
+
+    _load_parser = Parser(action=_parser, with_stderr=True)
+    def __call__(self, *file_names: str) -> Result:
+        """
+        :param file_names: connection files, loaded in one invocation
+        :return: { 'failed': [files nmcli could not load] }
+        """
+        return self._run_action(self.__base_command__, self.__cmd__, *file_names, parser=self._load_parser)
 
 class _ConnImportCommand(ROOT):
     """
@@ -490,14 +636,25 @@ class _ConnImportCommand(ROOT):
         type = 'type'
         file = 'file'
         temporary = '--temporary'
+    _added = re.compile(r"Connection '(.*)' \(([0-9a-fA-F-]+)\) successfully added")
+
+    @staticmethod
+    def _parser(stdout: str) -> dict:
+        match = _ConnImportCommand._added.search(stdout)
+        return { } if match is None else { 'name': match.group(1), 'uuid': match.group(2) }
+
+    _import_parser = Parser(action=_parser)
     # noinspection PyShadowingBuiltins
     def __call__(self, type: str, file: str, *, temporary: bool = None) -> Result:
+        """
+        :return: { 'name': ..., 'uuid': ... } of the new profile
+        """
         args = []
         kwargs = {}
         if type is not None: kwargs[self.sub_cmd.type] = type
         if file is not None: kwargs[self.sub_cmd.file] = file
         if temporary is True: args.append(self.sub_cmd.temporary)
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs, parser=self._import_parser)
 
 class _ConnExportCommand(ROOT):
     """
@@ -511,14 +668,23 @@ class _ConnExportCommand(ROOT):
         ID = 'id'
         uuid = 'uuid'
         path = 'path'
+    @staticmethod
+    def _parser(stdout: str) -> dict:
+        return { 'config': stdout }
+
+    _export_parser = Parser(action=_parser)
     def __call__(self, ID: str, *, id: bool = None, uuid: bool = None, path: bool = None, file: str = None) -> Result:
+        """
+        :param file: where nmcli writes the configuration; without it the configuration is returned, { 'config': text }
+        """
+        # [id | uuid | path] ID [file], positionally
         args = []
-        kwargs = {}
-        if id is not None: kwargs[self.sub_cmd.ID] = ID
-        if uuid is not None: kwargs[self.sub_cmd.uuid] = ID
-        if path is not None: kwargs[self.sub_cmd.path] = ID
-        if file is not None: kwargs[''] = file
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+        if id is not None: args.append(self.sub_cmd.ID)
+        elif uuid is not None: args.append(self.sub_cmd.uuid)
+        elif path is not None: args.append(self.sub_cmd.path)
+        args.append(ID)
+        if file is not None: args.append(file)
+        return self._run_action(self.__base_command__, self.__cmd__, args=args, parser=self._export_parser)
 
 
 
@@ -534,18 +700,140 @@ class ConnectionManager(object):
 
     """
     __base_command__: str = 'con'
-    def __init__(self):
-        self.Show = _ConnShowCommand(base=self.__base_command__)
-        self.Up = _ConnUpCommand(base=self.__base_command__)
-        self.Down = _ConnDownCommand(base=self.__base_command__)
-        self.Modify = _ConnModifyCommand(base=self.__base_command__)
-        self.Add = _ConnAddCommand(base=self.__base_command__)
-        self.Edit = _ConnEditCommand(base=self.__base_command__)
-        self.Clone = _ConnEditCommand(base=self.__base_command__)
-        self.Delete = _ConnDeleteCommand(base=self.__base_command__)
-        self.Monitor = _ConnMonitorCommand(base=self.__base_command__)
-        self.Reload = _ConnReloadCommand(base=self.__base_command__)
-        self.Load = _ConnLoadCommand(base=self.__base_command__)
-        self.Import = _ConnImportCommand(base=self.__base_command__)
-        self.Export = _ConnExportCommand(base=self.__base_command__)
+    def __init__(self, asynchronous: bool = False):
+        self.Show = _ConnShowCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Up = _ConnUpCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Down = _ConnDownCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Modify = _ConnModifyCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Add = _ConnAddCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Edit = _ConnEditCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Clone = _ConnEditCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Delete = _ConnDeleteCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Monitor = _ConnMonitorCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Reload = _ConnReloadCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Load = _ConnLoadCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Import = _ConnImportCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.Export = _ConnExportCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self._asynchronous = asynchronous
+        # KeyfileReader of each directory read_keyfiles() was asked for
+        self._keyfile_readers = { }
+
+    def provision(self, profiles: [dict], directory: str = None, reload: bool = False) -> 'ProvisionReport':
+        """
+            Writes profiles as keyfiles and loads them with one nmcli call, instead of one `connection add` each.
+            See keyfile.py for the profile format; an asynchronous manager returns an awaitable.
+
+        :param directory: where the keyfiles go; /etc/NetworkManager/system-connections by default
+        :param reload: reload every connection file instead of loading the new ones
+        """
+        from . import keyfile
+        provision = keyfile.aprovision if self._asynchronous else keyfile.provision
+        return provision(profiles, directory or keyfile.SYSTEM_CONNECTIONS, reload=reload, connections=self)
+
+    def import_directory(self, directory: str, types: [str] = None, temporary: bool = False, max_workers: int = None,
+                         progress: callable = None, ledger: str or bool = None, verify: bool = True) -> 'ImportReport':
+        """
+            Imports every VPN configuration of directory, at most max_workers at a time; files whose content was imported
+            before are skipped. See importer.py; an asynchronous manager returns an awaitable.
+
+        :param types: import types to take, e.g. ['wireguard']
+        :param temporary: import with --temporary
+        :param progress: progress(ImportedFile, done, total), called as each file is settled
+        :param ledger: where imports are recorded by content hash; False imports everything
+        """
+        from .importer import Importer
+        importer = Importer(directory, self, types=types, temporary=temporary, max_workers=max_workers, ledger=ledger, verify=verify)
+        return importer.arun(progress) if self._asynchronous else importer.run(progress)
+
+    def backup(self, path: str, previous: str = None, max_workers: int = None, vpn: bool = True, secrets: bool = False) -> 'BackupReport':
+        """
+            Writes every profile into one tar or NDJSON archive, reading them on a bounded pool; with previous, only the
+            profiles changed since that archive. See backup.py; an asynchronous manager returns an awaitable.
+
+                nmcli.connections.backup('/var/backups/nm/tuesday.tar.gz', previous='/var/backups/nm/monday.tar.gz')
+
+        :param path: the archive; its suffix picks the format (.tar.gz, .tar.xz, .ndjson.gz, ...)
+        :param vpn: also export VPN and WireGuard profiles with `connection export`
+        :param secrets: read properties with --show-secrets
+        """
+        from .backup import Backup
+        backup = Backup(path, self, previous=previous, max_workers=max_workers, vpn=vpn, secrets=secrets)
+        return backup.arun() if self._asynchronous else backup.run()
+
+    def read_keyfiles(self, directory: str = None) -> dict:
+        """
+            { connection.id: MultilineRecord } read from the keyfiles themselves, without running nmcli; only files changed
+            since the previous call are parsed again. For inventory: in-memory profiles and active data are not included.
+            A plain call, even on an asynchronous manager.
+
+        :param directory: /etc/NetworkManager/system-connections by default
+        """
+        from .keyfile import KeyfileReader, SYSTEM_CONNECTIONS
+        directory = directory or SYSTEM_CONNECTIONS
+        reader = self._keyfile_readers.get(directory)
+        if reader is None: reader = self._keyfile_readers[directory] = KeyfileReader(directory)
+        return reader.read()
+
+    def reconcile(self, desired: [dict], dry_run: bool = False, prune: bool or callable = False, secrets: bool = True,
+                  max_workers: int = None, timeout: float = None) -> 'ReconcileReport':
+        """
+            Brings the profiles to desired with the fewest commands: one add or modify per profile that differs, none for
+            those that match. See reconcile.py for the profile format; an asynchronous manager returns an awaitable.
+
+                print(nmcli.connections.reconcile(desired, dry_run=True).Text())
+
+        :param dry_run: read and plan only; the report lists the commands that would run
+        :param prune: delete the profiles desired does not name; prune(ConnectionProfile) -> bool limits it to some
+        :param secrets: compare secrets as well (reads with --show-secrets)
+        :param timeout: seconds each modify or delete may take (nmcli --wait)
+        """
+        from .reconcile import Reconciler
+        reconciler = Reconciler(desired, self, prune=prune, secrets=secrets)
+        apply = reconciler.aapply if self._asynchronous else reconciler.apply
+        return apply(dry_run=dry_run, max_workers=max_workers, timeout=timeout)
+
+    # -------------------------------------------------------------------------------- bulk operations
+
+    def _many(self, operation: str, command: ROOT, targets: list, args: dict = None, max_workers: int = None, timeout: float = None,
+              **options) -> 'BulkReport':
+        from .bulk import run_many, async_run_many
+        from .concurrency import DEFAULT_MAX_WORKERS
+        args = args or { }
+        deadline = command._deadline(timeout)
+        def call(target):
+            target_args = args.get(target, ())
+            # { property: value } goes to the command as one mapping; a list or tuple holds its positional args
+            target_args = target_args if isinstance(target_args, (list, tuple)) else (target_args,)
+            return command(target, *target_args, wait=timeout, timeout=deadline, **options)
+        if self._asynchronous: return async_run_many(operation, call, list(targets), max_workers or DEFAULT_MAX_WORKERS)
+        return run_many(operation, call, list(targets), max_workers or DEFAULT_MAX_WORKERS)
+
+    def modify_many(self, changes: dict or list, *args, max_workers: int = None, timeout: float = None, **options) -> 'BulkReport':
+        """
+            Modifies many profiles, each in its own nmcli call, at most max_workers at a time.
+
+                nmcli.connections.modify_many(['office', 'lab'], 'ipv4.dns', '10.0.0.53')            # same change for all
+                nmcli.connections.modify_many({ 'office': ['ipv4.dns', '10.0.0.53'],
+                                                'lab': { 'ipv4.dns': '10.1.0.53' } })             # a change each
+
+        :param changes: profiles to apply args to, or { profile: [its args] or { property: value } }
+        :param timeout: seconds each operation may take (nmcli --wait); nmcli still running deadline_grace seconds
+                        later is killed and the operation fails
+        :param options: passed to Modify, e.g. uuid=True, temporary=True
+        :return: BulkReport; an asynchronous manager returns an awaitable
+        """
+        if isinstance(changes, dict): return self._many('modify', self.Modify, changes, changes, max_workers, timeout, **options)
+        return self._many('modify', self.Modify, changes, { target: args for target in changes }, max_workers, timeout, **options)
+
+    def delete_many(self, targets: list, max_workers: int = None, timeout: float = None, **options) -> 'BulkReport':
+        """ Delete for each of targets; see modify_many """
+        return self._many('delete', self.Delete, targets, None, max_workers, timeout, **options)
+
+    def up_many(self, targets: list, max_workers: int = None, timeout: float = None, **options) -> 'BulkReport':
+        """ Up for each of targets; see modify_many """
+        return self._many('up', self.Up, targets, None, max_workers, timeout, **options)
+
+    def down_many(self, targets: list, max_workers: int = None, timeout: float = None, **options) -> 'BulkReport':
+        """ Down for each of targets; see modify_many """
+        return self._many('down', self.Down, targets, None, max_workers, timeout, **options)
 
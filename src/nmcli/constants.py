@@ -69,4 +69,29 @@ NMCLI_FIELDS = {
                  'PERMISSION',
                  'VALUE'
                  ]
-        }
\ No newline at end of file
+        }
+
+
+# setting names accepted in setting.property (nm-settings-nmcli(5)), with the short forms nmcli and its man page use
+NM_SETTINGS = (
+        '6lowpan', '802-1x', 'adsl', 'bluetooth', 'bond', 'bond-port', 'bridge', 'bridge-port', 'cdma', 'connection',
+        'dcb', 'ethtool', 'generic', 'gsm', 'hostname', 'infiniband', 'ip-tunnel', 'ipv4', 'ipv6', 'link', 'loopback',
+        'macsec', 'macvlan', 'match', 'olpc-mesh', 'ovs-bridge', 'ovs-dpdk', 'ovs-external-ids', 'ovs-interface',
+        'ovs-patch', 'ovs-port', 'ppp', 'pppoe', 'proxy', 'serial', 'sriov', 'tc', 'team', 'team-port', 'tun', 'user',
+        'veth', 'vlan', 'vpn', 'vrf', 'vxlan', 'wifi-p2p', 'wimax', 'wireguard', 'wpan',
+        '802-3-ethernet', 'ethernet', 'wired',
+        '802-11-wireless', 'wifi', 'wireless',
+        '802-11-wireless-security', 'wifi-sec', 'wireless-security',
+        '802-11-olpc-mesh',
+        )
+
+# the short forms of NM_SETTINGS (and of connection.type values) and the names nmcli prints
+NM_SETTING_NAMES = {
+        'ethernet':             '802-3-ethernet',
+        'wired':                '802-3-ethernet',
+        'wifi':                 '802-11-wireless',
+        'wireless':             '802-11-wireless',
+        'wifi-sec':             '802-11-wireless-security',
+        'wireless-security':    '802-11-wireless-security',
+        'olpc-mesh':            '802-11-olpc-mesh',
+        }
@@ -1,6 +1,10 @@
 from .base import *
+from .events import MonitorStream
+from .records import Device
 from .results import Result
+from .scan import ScanTable
 from .standard_parsers import *
+from .constants import NMCLI_FIELDS
 
 
 
@@ -18,24 +22,10 @@ class _DevStatusCommand(ROOT):
 
     @staticmethod
     def _parser(stdout: str, headers: list or tuple) -> dict:
-        l = []
-        for row in stdout.strip().split('\n'):
-            if any(header in row for header in headers): continue
-            l.append(row.split())
-
-        d = { }
-        for row in l:
-            print(row)
-            DEVICE, TYPE, STATE, *CONNECTION = row
-            d[DEVICE] = {
-                    'TYPE':       TYPE,
-                    'STATE':      STATE,
-                    'CONNECTION': ' '.join(CONNECTION),
-                    }
-        return d
+        return { device.device: device for device in Device.Parse(stdout, headers) }
 
     _status_parser = Parser(action=_parser, column_names=['DEVICE', 'TYPE', 'STATE', 'CONNECTION'])
-    def __call__(self) -> Result:
+    def __call__(self, fields: [str] or str = None) -> Result:
         """
             nmcli device status
                 DEVICE  TYPE      STATE      CONNECTION
@@ -43,9 +33,12 @@ class _DevStatusCommand(ROOT):
                 wlan0   wifi      connected  Steggi
                 lo      loopback  unmanaged  --
 
-        :return:
+        :param fields: only these columns, e.g. ['DEVICE', 'STATE']; DEVICE is always requested, the others are None
+        :return: { 'eth0': Device, ... }; data['eth0'].state, or data['eth0']['STATE']
         """
-        return self._run_action(self.__base_command__, self.__cmd__)
+        fields = self._select_fields(fields, 'DEVICE')
+        if fields is not None: fields = [field.upper() for field in fields]
+        return self._run_action(self.__base_command__, self.__cmd__, parser=self._status_parser, fields=fields)
 
 class _DevShowCommand(ROOT):
     """
@@ -56,23 +49,10 @@ class _DevShowCommand(ROOT):
 
     @staticmethod
     def _parser(stdout: str) -> dict:
-        device = ''
-        temp = []
-        for row in stdout.split('\n'):
-            temp.append(anti_spacer.sub(' ', row).split(':', maxsplit=1))
-
-        d = { }
-        for row in temp:
-            if row == ['']: continue
-            key, value = row
-            if "GENERAL.DEVICE" in key:
-                device = value.strip()
-                d[device] = {}
-            d[device][key.strip()] = value.strip()
-        return d
+        return multiline_parser(stdout, 'GENERAL.DEVICE')
 
     _show_parser = Parser(action=_parser)
-    def __call__(self) -> Result:
+    def __call__(self, ifname: str = None, fields: [str] or str = None) -> Result:
         """
         nmcli device show
             GENERAL.DEVICE:                         eth0
@@ -125,7 +105,14 @@ class _DevShowCommand(ROOT):
             IP6.GATEWAY:                            --
             IP6.ROUTE[1]:                           dst = ::1/128, nh = ::, mt = 256
 
-        :param ifname: {
+        Each device is a MultilineRecord; a section is only parsed when it is read:
+            result.data['eth0']['GENERAL']['STATE']   -> '100 (connected)'
+            result.data['eth0']['IP4']['DNS']         -> ['1.1.1.1', '192.168.1.1']
+            result.data['eth0']['IP4.DNS[1]']         -> '1.1.1.1'
+            result.data['eth0'].ToDict()              -> { 'GENERAL': { 'DEVICE': 'eth0', ... }, 'IP4': { ... }, ... }
+
+        :param ifname: only show this device
+        :return: {
                 'eth0': {
                         'GENERAL.DEVICE': 'eth0',
                         'GENERAL.TYPE': 'ethernet',
@@ -181,9 +168,11 @@ class _DevShowCommand(ROOT):
                     }
              }
 
-        :return:
-        """
-        return self._run_action(self.__base_command__, self.__cmd__, parser=self._show_parser)
+        :param ifname: the device to show; None shows every device
+        :param fields: only these sections or properties, e.g. ['GENERAL.STATE', 'IP4']; GENERAL.DEVICE is always requested
+                """
+        fields = self._select_fields(fields, 'GENERAL.DEVICE')
+        return self._run_action(self.__base_command__, self.__cmd__, ifname, parser=self._show_parser, fields=fields)
 
 class _DevSetCommand(ROOT):
     """
@@ -218,20 +207,7 @@ class _DevConnectCommand(ROOT):
 
     @staticmethod
     def _parser(stdout: str) -> dict:
-        device = ''
-        temp = []
-        for row in stdout.split('\n'):
-            temp.append(anti_spacer.sub(' ', row).split(':', maxsplit=1))
-
-        d = { }
-        for row in temp:
-            if row == ['']: continue
-            key, value = row
-            if "GENERAL.DEVICE" in key:
-                device = value.strip()
-                d[device] = {}
-            d[device][key.strip()] = value.strip()
-        return d
+        return multiline_parser(stdout, 'GENERAL.DEVICE')
 
     _connect_parser = Parser(action=_parser)
     def __call__(self, if_name: str, wait: bool) -> Result:
@@ -361,13 +337,15 @@ class _DevMonitorCommand(ROOT):
 
 
 
-    class sub_cmd(object):
-        ifname = 'ifname'
-
-
+    def __call__(self, *if_names: str) -> MonitorStream:
+        """
+            Yields DeviceStateEvent (and the other device events from nmcli.events) as they are printed.
+            Close the stream, or use it as a context manager, to stop the nmcli process.
 
-    def __call__(self, if_name: str = None) -> Result:
-        return self._run_action(self.__base_command__, self.__cmd__, kwargs={ self.sub_cmd.ifname: if_name })
+        :param if_names: devices to watch; all devices when none are given
+        :return:
+        """
+        return self._stream_action(self.__base_command__, self.__cmd__, *if_names)
 
 class WiFi_DevConnectCommand(ROOT):
     """
@@ -437,7 +415,7 @@ class WiFi_DevConnectCommand(ROOT):
         if wait is not None: kwargs[self.sub_cmd.wait] = wait
         if private is not None: kwargs[self.sub_cmd.private] = self.sub_cmd.yes if private else self.sub_cmd.no
         if hidden is not None: kwargs[self.sub_cmd.hidden] = self.sub_cmd.yes if private else self.sub_cmd.no
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+        return self._run_action(self.__base_command__, 'wifi', self.__cmd__, args=args, kwargs=kwargs)
 class WiFi_DevHotSpotCommand(ROOT):
     """
        wifi hotspot [ifname ifname] [con-name name] [ssid SSID] [band {a | bg}] [channel channel] [password password]
@@ -531,7 +509,7 @@ class WiFi_DevHotSpotCommand(ROOT):
         if channel is not None: kwargs[self.sub_cmd.channel] = channel
         if con_name is not None: kwargs[self.sub_cmd.con_name] = con_name
         if password is not None: kwargs[self.sub_cmd.password] = password
-        return self._run_action(self.__base_command__, self.__cmd__, args=args, kwargs=kwargs)
+        return self._run_action(self.__base_command__, 'wifi', self.__cmd__, args=args, kwargs=kwargs)
 class WiFi_DevRescanCommand(ROOT):
     """
        wifi rescan [ifname ifname] [ssid SSID...]
@@ -552,7 +530,7 @@ class WiFi_DevRescanCommand(ROOT):
 
 
 
-    def __call__(self, if_name: str = None, ssid: str = None) -> Result:
+    def __call__(self, if_name: str = None, ssid: str or [str] = None) -> Result:
         """
             show [--active] [id | uuid | path | apath] ID...
                 Show details for specified connections. By default, both static configuration and active connection data are displayed.
@@ -594,19 +572,77 @@ class WiFi_DevRescanCommand(ROOT):
         :param active:
         :return:
         """
+        args = []
+        if if_name is not None: args += [self.sub_cmd.ifname, if_name]
+        # ssid may be repeated to scan for several hidden networks
+        for name in ([ssid] if isinstance(ssid, str) else ssid or []): args += [self.sub_cmd.ssid, name]
+        return self._run_action(self.__base_command__, 'wifi', self.__cmd__, args=args)
+class WiFi_DevListCommand(ROOT):
+    """
+       wifi [list [--rescan | auto | no | yes] [ifname ifname] [bssid BSSID]]
+           List available Wi-Fi access points. The ifname and bssid options can be used to list APs for a particular interface or with a specific BSSID, respectively.
+
+           The --rescan option controls whether NetworkManager rescans before listing: by default (auto) it rescans when the last scan is too old.
+    """
+    __cmd__ = 'list'
+
+
+
+    class sub_cmd(object):
+        rescan = '--rescan'
+        ifname = 'ifname'
+        bssid = 'bssid'
+        auto = 'auto'
+        yes = 'yes'
+        no = 'no'
+
+
+
+    @staticmethod
+    def _parser(stdout: str, headers: list or tuple) -> ScanTable:
+        return ScanTable.Parse(stdout, headers)
+
+    _list_parser = Parser(action=_parser, column_names=NMCLI_FIELDS['dev wifi'])
+    def __call__(self, if_name: str = None, bssid: str = None, rescan: bool or str = None, fields: [str] or str = None) -> Result:
+        """
+            nmcli device wifi list
+                IN-USE  BSSID              SSID      MODE   CHAN  RATE        SIGNAL  BARS  SECURITY
+                *       00:00:00:00:00:01  Steggi    Infra  6     130 Mbit/s  72      ▂▄▆_  WPA2
+                        00:00:00:00:00:02  Guest     Infra  36    270 Mbit/s  45      ▂▄__  --
+
+        :param if_name: only list the access points seen by this device
+        :param bssid: only list this access point
+        :param rescan: True or 'yes' rescans first, False or 'no' never does, 'auto' (nmcli's default) rescans if the last scan is old
+        :param fields: only these columns, e.g. ['BSSID', 'SSID', 'SIGNAL']; the table holds just those
+        :return: ScanTable; a column store that iterates and indexes as AccessPoint records, with filter, sort and top
+        """
+        args = []
         kwargs = { }
+        if rescan is not None:
+            if isinstance(rescan, bool): rescan = self.sub_cmd.yes if rescan else self.sub_cmd.no
+            args += [self.sub_cmd.rescan, rescan]
         if if_name is not None: kwargs[self.sub_cmd.ifname] = if_name
-        if ssid is not None: kwargs[self.sub_cmd.ssid] = ssid
-        return self._run_action(self.__base_command__, self.__cmd__, kwargs=kwargs)
+        if bssid is not None: kwargs[self.sub_cmd.bssid] = bssid
+        fields = self._select_fields(fields)
+        if fields is not None: fields = [field.upper() for field in fields]
+        return self._run_action(self.__base_command__, 'wifi', self.__cmd__, args=args, kwargs=kwargs, parser=self._list_parser, fields=fields)
+
 class WiFiCommands(ROOT):
     """
        wifi [list [ifname ifname] [bssid BSSID]]
            List available Wi-Fi access points. The ifname and bssid options can be used to list APs for a particular interface or with a specific BSSID, respectively.
     """
     __base_command__ = 'device'
-    rescan = WiFi_DevRescanCommand(__base_command__)
-    hot_spot = WiFi_DevHotSpotCommand(__base_command__)
-    connect = WiFi_DevConnectCommand(__base_command__)
+    def __init__(self, base: str = __base_command__, asynchronous: bool = False):
+        super().__init__(base, asynchronous=asynchronous)
+        self.list = WiFi_DevListCommand(base, asynchronous=asynchronous)
+        self.rescan = WiFi_DevRescanCommand(base, asynchronous=asynchronous)
+        self.hot_spot = WiFi_DevHotSpotCommand(base, asynchronous=asynchronous)
+        self.connect = WiFi_DevConnectCommand(base, asynchronous=asynchronous)
+
+    def __call__(self, if_name: str = None, bssid: str = None, rescan: bool or str = None, fields: [str] or str = None) -> Result:
+        """ nmcli device wifi  is  nmcli device wifi list """
+        return self.list(if_name, bssid, rescan, fields)
 
 class DeviceManager(object):
     """
@@ -616,18 +652,18 @@ class DeviceManager(object):
        Show and manage network interfaces.
     """
     __base_command__ = 'device'
-    def __init__(self):
-        self.wifi = WiFiCommands(base=self.__base_command__)
-        self.monitor = _DevModifyCommand(base=self.__base_command__)
-        self.delete = _DevDeleteCommand(base=self.__base_command__)
-        self.disconnect = _DevDisconnectCommand(base=self.__base_command__)
-        self.lldp = _Dev_lldp_Command(base=self.__base_command__)
-        self.modify = _DevModifyCommand(base=self.__base_command__)
-        self.reapply = _DevReapplyCommand(base=self.__base_command__)
-        self.connect = _DevConnectCommand(base=self.__base_command__)
-        self.set = _DevSetCommand(base=self.__base_command__)
-        self.show = _DevShowCommand(base=self.__base_command__)
-        self.status = _DevStatusCommand(base=self.__base_command__)
+    def __init__(self, asynchronous: bool = False):
+        self.wifi = WiFiCommands(base=self.__base_command__, asynchronous=asynchronous)
+        self.monitor = _DevMonitorCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.delete = _DevDeleteCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.disconnect = _DevDisconnectCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.lldp = _Dev_lldp_Command(base=self.__base_command__, asynchronous=asynchronous)
+        self.modify = _DevModifyCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.reapply = _DevReapplyCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.connect = _DevConnectCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.set = _DevSetCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.show = _DevShowCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.status = _DevStatusCommand(base=self.__base_command__, asynchronous=asynchronous)
 
     def __call__(self):
         return self.status()
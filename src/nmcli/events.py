@@ -0,0 +1,257 @@
+"""
+    Typed events for `nmcli monitor`, `nmcli device monitor` and `nmcli connection monitor`,
+    and the streams that yield them line by line while the monitor process runs.
+
+        with nmcli.monitor() as events:
+            for event in events:
+                if isinstance(event, DeviceStateEvent): ...
+
+    Only one line is held at a time, so memory stays bounded however long the monitor runs.
+    Closing the stream (or leaving the with block) terminates the nmcli process.
+"""
+import re
+import subprocess
+
+
+___all__ = [
+        'MonitorEvent', 'DeviceStateEvent', 'DeviceAddedEvent', 'DeviceRemovedEvent', 'DeviceConnectionEvent',
+        'ConnectionAddedEvent', 'ConnectionChangedEvent', 'ConnectionRemovedEvent',
+        'ConnectivityEvent', 'NetworkManagerStateEvent', 'PrimaryConnectionEvent',
+        'parse_event', 'MonitorStream', 'AsyncMonitorStream', 'MAX_LINE_LENGTH',
+        ]
+
+
+
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class MonitorEvent(object):
+    """ A monitor line. Lines that are not recognized are yielded as plain MonitorEvents. """
+    __slots__ = ['line']
+    def __init__(self, line: str):
+        self.line = line
+
+    def ToDict(self) -> dict:
+        return { name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ()) }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.ToDict()}>"
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.ToDict() == other.ToDict()
+
+
+
+class DeviceStateEvent(MonitorEvent):
+    """ eth0: connected """
+    __slots__ = ['device', 'state']
+    def __init__(self, line: str, device: str, state: str):
+        super().__init__(line)
+        self.device = device
+        self.state = state
+
+class DeviceAddedEvent(MonitorEvent):
+    """ eth1: device created """
+    __slots__ = ['device']
+    def __init__(self, line: str, device: str):
+        super().__init__(line)
+        self.device = device
+
+class DeviceRemovedEvent(DeviceAddedEvent):
+    """ eth1: device removed """
+    __slots__ = []
+
+class DeviceConnectionEvent(MonitorEvent):
+    """ eth0: using connection 'Wired connection 1' """
+    __slots__ = ['device', 'connection']
+    def __init__(self, line: str, device: str, connection: str):
+        super().__init__(line)
+        self.device = device
+        self.connection = connection
+
+class ConnectionAddedEvent(MonitorEvent):
+    """ Wired connection 2: connection profile created """
+    __slots__ = ['connection']
+    def __init__(self, line: str, connection: str):
+        super().__init__(line)
+        self.connection = connection
+
+class ConnectionChangedEvent(ConnectionAddedEvent):
+    """ Wired connection 2: connection profile changed """
+    __slots__ = []
+
+class ConnectionRemovedEvent(ConnectionAddedEvent):
+    """ Wired connection 2: connection profile removed """
+    __slots__ = []
+
+class ConnectivityEvent(MonitorEvent):
+    """ Connectivity is now 'full' """
+    __slots__ = ['state']
+    def __init__(self, line: str, state: str):
+        super().__init__(line)
+        self.state = state
+
+class NetworkManagerStateEvent(ConnectivityEvent):
+    """ Networkmanager is now in the 'connected' state  |  NetworkManager is stopped """
+    __slots__ = []
+
+class PrimaryConnectionEvent(MonitorEvent):
+    """ 'Wired connection 1' is now the primary connection  |  There's no primary connection (connection is None) """
+    __slots__ = ['connection']
+    def __init__(self, line: str, connection: str or None):
+        super().__init__(line)
+        self.connection = connection
+
+
+
+_connection_events = { 'created': ConnectionAddedEvent, 'changed': ConnectionChangedEvent, 'removed': ConnectionRemovedEvent }
+_device_events = { 'created': DeviceAddedEvent, 'removed': DeviceRemovedEvent }
+
+# checked in order; the last pattern catches every other `<ifname>: <state>` line
+_patterns = [
+        (re.compile(r"^Connectivity is now '(?P<state>[^']*)'$"), lambda line, m: ConnectivityEvent(line, m['state'])),
+        (re.compile(r"^Networkmanager is now in the '(?P<state>[^']*)' state$", re.IGNORECASE), lambda line, m: NetworkManagerStateEvent(line, m['state'])),
+        (re.compile(r"^NetworkManager is (?P<state>running|stopped)$"), lambda line, m: NetworkManagerStateEvent(line, m['state'])),
+        (re.compile(r"^'(?P<name>.*)' is now the primary connection$"), lambda line, m: PrimaryConnectionEvent(line, m['name'])),
+        (re.compile(r"^There's no primary connection$"), lambda line, m: PrimaryConnectionEvent(line, None)),
+        (re.compile(r"^(?P<name>.*): connection profile (?P<action>created|changed|removed)$"), lambda line, m: _connection_events[m['action']](line, m['name'])),
+        (re.compile(r"^(?P<device>[^\s:]+): device (?P<action>created|removed)$"), lambda line, m: _device_events[m['action']](line, m['device'])),
+        (re.compile(r"^(?P<device>[^\s:]+): using connection '(?P<name>.*)'$"), lambda line, m: DeviceConnectionEvent(line, m['device'], m['name'])),
+        (re.compile(r"^(?P<device>[^\s:]+): (?P<state>.+)$"), lambda line, m: DeviceStateEvent(line, m['device'], m['state'])),
+        ]
+
+
+def parse_event(line: str) -> MonitorEvent:
+    line = line.rstrip('\r\n')
+    for pattern, factory in _patterns:
+        match = pattern.match(line)
+        if match: return factory(line, match)
+    return MonitorEvent(line)
+
+
+
+
+class MonitorStream(object):
+    """
+        Iterates the events of a long running nmcli monitor process.
+
+        The process is started by the transport's open(); iteration ends when the process exits.
+    """
+    def __init__(self, command: [str], process: subprocess.Popen, parse: callable = parse_event):
+        self.command = command
+        self.process = process
+        self.parse = parse
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> MonitorEvent:
+        while True:
+            if self.process.stdout is None or self.process.stdout.closed: raise StopIteration
+            line = self.process.stdout.readline(MAX_LINE_LENGTH)
+            if not line:
+                self.close()
+                raise StopIteration
+            if len(line) >= MAX_LINE_LENGTH and not line.endswith('\n'):
+                # longer than MAX_LINE_LENGTH: drop the rest of it too, rather than parse its pieces as events
+                while line and not line.endswith('\n'): line = self.process.stdout.readline(MAX_LINE_LENGTH)
+                continue
+            if line.strip(): return self.parse(line)
+
+    @property
+    def returncode(self) -> int or None:
+        return self.process.poll()
+
+    def close(self, timeout: float = 5.0):
+        """ Terminates the monitor process and releases its pipes. Safe to call more than once. """
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        for pipe in (self.process.stdout, self.process.stderr):
+            if pipe is not None: pipe.close()
+
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {' '.join(self.command)} | pid={self.process.pid} returncode={self.returncode}>"
+
+
+
+class AsyncMonitorStream(object):
+    """
+        asyncio twin of MonitorStream. The process is started on first iteration (or on entering `async with`).
+
+            async with AsyncMonitorCommand()() as events:
+                async for event in events: ...
+    """
+    def __init__(self, command: [str], transport, parse: callable = parse_event):
+        self.command = command
+        self.transport = transport
+        self.parse = parse
+        self.process = None
+
+    async def start(self):
+        if self.process is None:
+            self.process = await self.transport.async_open(self.command)
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> MonitorEvent:
+        await self.start()
+        while True:
+            line = await self._readline()
+            if not line:
+                await self.aclose()
+                raise StopAsyncIteration
+            line = line.decode()
+            if line.strip(): return self.parse(line)
+
+    async def _readline(self) -> bytes:
+        """ The next line; lines longer than the reader's limit (MAX_LINE_LENGTH) are skipped whole. b'' at the end """
+        import asyncio
+        stdout = self.process.stdout
+        skipping = False
+        while True:
+            try:
+                line = await stdout.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                return b'' if skipping else e.partial
+            except asyncio.LimitOverrunError as e:
+                # drop what is buffered of the long line, then everything up to its newline
+                await stdout.readexactly(e.consumed)
+                skipping = True
+                continue
+            if not skipping: return line
+            skipping = False
+
+    @property
+    def returncode(self) -> int or None:
+        return None if self.process is None else self.process.returncode
+
+    async def aclose(self, timeout: float = 5.0):
+        """ Terminates the monitor process. Safe to call more than once. """
+        if self.process is None or self.process.returncode is not None: return
+        import asyncio
+        try:
+            self.process.terminate()
+        except ProcessLookupError:
+            pass
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+    async def __aenter__(self):
+        return await self.start()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -16,7 +16,7 @@ class _GeneralStatusCommand(ROOT):
            Show overall status of NetworkManager. This is the default action, when no additional command is provided for nmcli general.
     """
     __cmd__ = 'status'
-    _status_parser = Parser(action=header_single_row_parser)
+    _status_parser = Parser(action=header_single_row_parser, column_names=['STATE', 'CONNECTIVITY', 'WIFI-HW', 'WIFI', 'WWAN-HW', 'WWAN'])
 
     def __call__(self) -> Result:
         """
@@ -83,7 +83,7 @@ class _GeneralPermissionsCommand(ROOT):
 
         :return:
         """
-        return self._run_action(self.__base_command__, self.__cmd__)
+        return self._run_action(self.__base_command__, self.__cmd__, parser=self._status_parser)
 
 class _GeneralLoggingCommand(ROOT):
     """
@@ -98,13 +98,13 @@ class _GeneralLoggingCommand(ROOT):
     __cmd__ = 'logging'
 
     @staticmethod
-    def _parser(stdout: str) -> dict:
-        l = stdout.strip().split('\n')[1].split()
+    def _parser(stdout: str, headers: list or tuple) -> dict:
+        row = header_single_row_parser(stdout, headers)
         return {
-                'LEVEL':  l[0].strip(),
-                'DOMAINS':  l[1].split(',')
+                'LEVEL':  row.get('LEVEL', ''),
+                'DOMAINS':  row['DOMAINS'].split(',') if row.get('DOMAINS') else []
                 }
-    _logging_parser = Parser(action=_parser)
+    _logging_parser = Parser(action=_parser, column_names=['LEVEL', 'DOMAINS'])
     def __call__(self) -> Result:
         """
             nmcli general logging
@@ -124,11 +124,11 @@ class GeneralCommand(object):
        Use this command to show NetworkManager status and permissions. You can also get and change system hostname, as well as NetworkManager logging level and domains.
     """
     __base_command__: str = 'general'
-    def __init__(self):
-        self.status = _GeneralStatusCommand(base=self.__base_command__)
-        self.hostname = _GeneralHostNameCommand(base=self.__base_command__)
-        self.permissions = _GeneralPermissionsCommand(base=self.__base_command__)
-        self.logging = _GeneralLoggingCommand(base=self.__base_command__)
+    def __init__(self, asynchronous: bool = False):
+        self.status = _GeneralStatusCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.hostname = _GeneralHostNameCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.permissions = _GeneralPermissionsCommand(base=self.__base_command__, asynchronous=asynchronous)
+        self.logging = _GeneralLoggingCommand(base=self.__base_command__, asynchronous=asynchronous)
 
     def __call__(self) -> Result:
         """
@@ -0,0 +1,405 @@
+"""
+    Imports a directory of VPN configurations (`nmcli connection import`) on a worker pool.
+
+        report = nmcli.connections.import_directory('/srv/site-42/vpn', max_workers=8,
+                                                    progress=lambda entry, done, total: print(f'{done}/{total} {entry}'))
+        report.uuids            # { '/srv/site-42/vpn/hq.ovpn': '3a1b...', ... }
+        report.failed           # [ImportedFile, ...] nmcli refused, with its error
+        report.invalid          # [ImportedFile, ...] rejected before nmcli ran
+
+        for entry in Importer('/srv/site-42/vpn', nmcli.connections).stream():     # the same, as entries finish
+            ...
+
+    Files are found by extension (.ovpn, .pcf, and .conf, told apart by content as WireGuard or OpenVPN) and checked
+    locally, so a broken file costs no nmcli call. Every import is recorded in a ledger by the sha256 of the file, and a
+    file whose content was imported before is skipped; one `connection show` confirms those profiles still exist, and
+    those that do not are imported again. A rerun over an unchanged directory therefore costs that single call.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+
+___all__ = ['Importer', 'ImportReport', 'ImportedFile', 'discover', 'validate', 'import_types']
+
+
+
+# extension: nmcli import type; None is told apart by content
+import_types = {
+        '.ovpn':    'openvpn',
+        '.pcf':     'vpnc',
+        '.conf':    None,
+        }
+# larger files are not VPN configurations
+MAX_SIZE = 1 << 20
+# NetworkManager names a WireGuard profile and its interface after the file
+_interface_name = re.compile(r'^[A-Za-z0-9_=+.-]{1,15}$')
+_wireguard_key = re.compile(r'^[A-Za-z0-9+/]{42}[AEIMQUYcgkosw048]=$')
+_ini_line = re.compile(r'^\s*([A-Za-z0-9_-]+)\s*=\s*(.*?)\s*$')
+
+
+
+
+def _sniff(text: str) -> str or None:
+    if re.search(r'^\s*\[Interface\]', text, re.M): return 'wireguard'
+    if re.search(r'^\s*(remote|client)\b', text, re.M): return 'openvpn'
+    return None
+
+
+def discover(directory: str) -> [(str, str or None)]:
+    """ [(path, import type)] of the files of directory with a known extension, sorted """
+    found = []
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        extension = os.path.splitext(entry.name)[1].lower()
+        if entry.name.startswith('.') or extension not in import_types or not entry.is_file(): continue
+        found.append((entry.path, import_types[extension]))
+    return found
+
+
+def _sections(text: str) -> [(str, dict)]:
+    """ [(section, { key: value })] of an INI file, in order; sections may repeat (WireGuard [Peer]) """
+    sections = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in '#;': continue
+        if line.startswith('[') and line.endswith(']'): sections.append((line[1:-1].strip().lower(), { }))
+        else:
+            match = _ini_line.match(line)
+            if match is not None and sections: sections[-1][1][match.group(1).lower()] = match.group(2)
+    return sections
+
+
+def validate(path: str, type: str, text: str) -> str or None:
+    """ Why nmcli would refuse the file, as far as can be told without it; None when it looks importable """
+    if type == 'wireguard':
+        name = os.path.splitext(os.path.basename(path))[0]
+        if not _interface_name.match(name): return f"'{name}' is not a valid interface name (at most 15 of A-Z a-z 0-9 _=+.-)"
+        sections = _sections(text)
+        interfaces = [keys for section, keys in sections if section == 'interface']
+        if len(interfaces) != 1: return 'exactly one [Interface] section is required'
+        if not _wireguard_key.match(interfaces[0].get('privatekey', '')): return '[Interface] has no valid PrivateKey'
+        peers = [keys for section, keys in sections if section == 'peer']
+        if any(not _wireguard_key.match(peer.get('publickey', '')) for peer in peers): return 'a [Peer] has no valid PublicKey'
+    elif type == 'openvpn':
+        if not re.search(r'^\s*remote\s+\S+', text, re.M): return "no 'remote' directive"
+    elif type == 'vpnc':
+        keys = dict(item for section, keys in _sections(text) if section == 'main' for item in keys.items())
+        if not keys.get('host'): return '[main] has no Host'
+    return None
+
+
+
+class ImportedFile(object):
+    """
+        One file of an import: what became of it, and the profile it is now.
+
+            status  'imported', 'skipped' (its content was imported before), 'invalid' (rejected locally) or 'failed' (by nmcli)
+    """
+    __slots__ = ['path', 'type', 'digest', 'status', 'uuid', 'name', 'error', 'elapsed', 'same_as']
+    def __init__(self, path: str, type: str = None, digest: str = None):
+        self.path = path
+        self.type = type
+        self.digest = digest
+        self.status = None
+        self.uuid = None
+        self.name = None
+        self.error = None
+        self.elapsed = 0.0
+        # the file of this run with the same content, which this one waits for
+        self.same_as = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ('imported', 'skipped')
+
+    def ToDict(self) -> dict:
+        return { 'path': self.path, 'type': self.type, 'status': self.status, 'uuid': self.uuid, 'name': self.name, 'error': self.error,
+                 'elapsed': self.elapsed }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.path} {self.status} {self.uuid or self.error or ''}>"
+
+
+
+class ImportReport(object):
+    """ The files of an import, in discovery order. """
+    def __init__(self, files: [ImportedFile], elapsed: float, reads: int = 0):
+        self.files = files
+        self.elapsed = elapsed
+        # nmcli calls spent checking the ledger
+        self.reads = reads
+
+    def _with(self, status: str) -> [ImportedFile]:
+        return [entry for entry in self.files if entry.status == status]
+
+    @property
+    def imported(self) -> [ImportedFile]:
+        return self._with('imported')
+
+    @property
+    def skipped(self) -> [ImportedFile]:
+        return self._with('skipped')
+
+    @property
+    def invalid(self) -> [ImportedFile]:
+        return self._with('invalid')
+
+    @property
+    def failed(self) -> [ImportedFile]:
+        return self._with('failed')
+
+    @property
+    def ok(self) -> bool:
+        return all(entry.ok for entry in self.files)
+
+    @property
+    def uuids(self) -> dict:
+        """ { path: uuid of its profile } for every file that has one """
+        return { entry.path: entry.uuid for entry in self.files if entry.uuid is not None }
+
+    def ToDict(self) -> dict:
+        return {
+                'uuids': self.uuids,
+                'imported': len(self.imported),
+                'skipped': len(self.skipped),
+                'invalid': [entry.ToDict() for entry in self.invalid],
+                'failed': [entry.ToDict() for entry in self.failed],
+                'elapsed': self.elapsed,
+                'reads': self.reads,
+                }
+
+    def __repr__(self) -> str:
+        return (f"<{self.__class__.__name__} : {len(self.imported)} imported, {len(self.skipped)} skipped, {len(self.invalid)} invalid, "
+                f"{len(self.failed)} failed, {self.elapsed:.2f}s>")
+
+
+
+class Importer(object):
+    """
+        The import of one directory. stream()/run() serve a synchronous ConnectionManager, astream()/arun() an
+        asynchronous one.
+    """
+    def __init__(self, directory: str, connections: 'ConnectionManager', types: [str] = None, temporary: bool = False,
+                 max_workers: int = None, ledger: str or bool = None, verify: bool = True):
+        """
+        :param types: import types to take (['wireguard']); all by default
+        :param temporary: import with --temporary; the profiles are gone after NetworkManager restarts
+        :param ledger: the JSON file recording imports by content hash; $XDG_CACHE_HOME/nmcli/imports.json by default,
+                       False to import everything
+        :param verify: check with one `connection show` that the profiles of skipped files still exist
+        """
+        from .concurrency import DEFAULT_MAX_WORKERS
+        self.directory = directory
+        self.connections = connections
+        self.types = types
+        self.temporary = temporary
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        if max_workers is not None and max_workers < 1: raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+        self.ledger_path = self.default_ledger() if ledger is None else ledger or None
+        self.verify = verify
+        self.reads = 0
+        # files found by the last prepare()
+        self.total = 0
+        # digest: { 'uuid', 'name', 'path', 'type' }
+        self.ledger = self._read_ledger()
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------------- ledger
+
+    @staticmethod
+    def default_ledger() -> str:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base, 'nmcli', 'imports.json')
+
+    def _read_ledger(self) -> dict:
+        if self.ledger_path is None: return { }
+        try:
+            with open(self.ledger_path, encoding='utf-8') as f:
+                ledger = json.load(f)
+            return ledger if isinstance(ledger, dict) else { }
+        except (OSError, ValueError):
+            return { }
+
+    def save_ledger(self):
+        if self.ledger_path is None: return
+        from .keyfile import write
+        os.makedirs(os.path.dirname(self.ledger_path) or '.', exist_ok=True)
+        with self._lock:
+            text = json.dumps(self.ledger, indent=1, sort_keys=True)
+        try:
+            write(self.ledger_path, text)
+        except OSError:
+            # without the ledger the next run imports again; it does not make this one fail
+            pass
+
+    # -------------------------------------------------------------------------------- preparing
+
+    def prepare(self) -> [ImportedFile]:
+        """ Every file found, hashed and validated; invalid ones and those in the ledger have their status already """
+        entries = []
+        seen = { }
+        for path, type in discover(self.directory):
+            entry = ImportedFile(path, type)
+            entries.append(entry)
+            try:
+                if os.path.getsize(path) > MAX_SIZE: raise ValueError(f'larger than {MAX_SIZE} bytes')
+                with open(path, 'rb') as f:
+                    data = f.read()
+                text = data.decode('utf-8', errors='replace')
+            except (OSError, ValueError) as e:
+                entry.status, entry.error = 'invalid', str(e)
+                continue
+            entry.digest = hashlib.sha256(data).hexdigest()
+            if entry.type is None: entry.type = _sniff(text)
+            if entry.type is None:
+                entry.status, entry.error = 'invalid', 'neither a WireGuard nor an OpenVPN configuration'
+                continue
+            if self.types is not None and entry.type not in self.types:
+                entries.pop()
+                continue
+            entry.error = validate(path, entry.type, text)
+            if entry.error is not None:
+                entry.status = 'invalid'
+                continue
+
+            recorded = self.ledger.get(entry.digest)
+            if recorded is not None:
+                entry.status, entry.uuid, entry.name = 'skipped', recorded.get('uuid'), recorded.get('name')
+            elif entry.digest in seen:
+                entry.same_as = seen[entry.digest]
+            else:
+                seen[entry.digest] = entry
+        self.total = len(entries)
+        return entries
+
+    def _unverified(self, entries: [ImportedFile], listed: ['ConnectionProfile']) -> None:
+        """ Skipped entries whose profile is gone are imported after all """
+        existing = { profile.uuid for profile in listed }
+        again = { }
+        for entry in entries:
+            if entry.status == 'skipped' and entry.uuid not in existing:
+                entry.status = entry.uuid = entry.name = None
+                with self._lock:
+                    self.ledger.pop(entry.digest, None)
+                if entry.digest in again: entry.same_as = again[entry.digest]
+                else: again[entry.digest] = entry
+
+    def _skipped(self, entries: [ImportedFile]) -> bool:
+        return self.verify and any(entry.status == 'skipped' for entry in entries)
+
+    # -------------------------------------------------------------------------------- importing
+
+    def _finished(self, entry: ImportedFile, result: 'Result' = None, error: Exception = None, started: float = 0.0) -> ImportedFile:
+        from .base import NetWorkManagerException
+        entry.elapsed = time.monotonic() - started
+        if error is not None:
+            entry.status = 'failed'
+            data = error.data if isinstance(error, NetWorkManagerException) and isinstance(error.data, dict) else { }
+            entry.error = (data.get('stderr') or '').strip() or str(error)
+            return entry
+        added = result.data or { }
+        entry.status, entry.uuid, entry.name = 'imported', added.get('uuid'), added.get('name')
+        with self._lock:
+            self.ledger[entry.digest] = { 'uuid': entry.uuid, 'name': entry.name, 'path': entry.path, 'type': entry.type }
+        return entry
+
+    def _import(self, entry: ImportedFile) -> ImportedFile:
+        started = time.monotonic()
+        try:
+            result = self.connections.Import(entry.type, entry.path, temporary=self.temporary or None)
+        except Exception as e:
+            return self._finished(entry, error=e, started=started)
+        return self._finished(entry, result, started=started)
+
+    async def _aimport(self, entry: ImportedFile, semaphore: 'asyncio.Semaphore') -> ImportedFile:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                result = await self.connections.Import(entry.type, entry.path, temporary=self.temporary or None)
+            except Exception as e:
+                return self._finished(entry, error=e, started=started)
+            return self._finished(entry, result, started=started)
+
+    @staticmethod
+    def _copies(entries: [ImportedFile]) -> [ImportedFile]:
+        """ Files with the same content as one imported in this run take its outcome """
+        for entry in entries:
+            if entry.same_as is None: continue
+            original = entry.same_as
+            entry.status = 'skipped' if original.status in ('imported', 'skipped') else original.status
+            entry.uuid, entry.name, entry.error = original.uuid, original.name, original.error
+        return [entry for entry in entries if entry.same_as is not None]
+
+    def stream(self) -> 'Iterator[ImportedFile]':
+        """ Yields every file as it is settled: the invalid and skipped ones first, then the imports as they finish """
+        entries = self.prepare()
+        if self._skipped(entries):
+            self.reads += 1
+            self._unverified(entries, self.connections.Show().data)
+        yield from (entry for entry in entries if entry.status is not None)
+
+        pending = [entry for entry in entries if entry.status is None and entry.same_as is None]
+        if pending:
+            from concurrent.futures import ThreadPoolExecutor, as_completed
+            pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending)), thread_name_prefix='nmcli-import')
+            futures = []
+            try:
+                futures = [pool.submit(self._import, entry) for entry in pending]
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # a consumer that stops early cancels the imports that have not started
+                for future in futures:
+                    future.cancel()
+                pool.shutdown(wait=True)
+                self.save_ledger()
+        yield from self._copies(entries)
+
+    async def astream(self) -> 'AsyncIterator[ImportedFile]':
+        """ stream() for an asynchronous ConnectionManager """
+        import asyncio
+        entries = self.prepare()
+        if self._skipped(entries):
+            self.reads += 1
+            self._unverified(entries, (await self.connections.Show()).data)
+        for entry in entries:
+            if entry.status is not None: yield entry
+
+        pending = [entry for entry in entries if entry.status is None and entry.same_as is None]
+        if pending:
+            semaphore = asyncio.Semaphore(self.max_workers)
+            tasks = [asyncio.ensure_future(self._aimport(entry, semaphore)) for entry in pending]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                for task in tasks: task.cancel()
+                self.save_ledger()
+        for entry in self._copies(entries): yield entry
+
+    def run(self, progress: callable = None) -> ImportReport:
+        """
+        :param progress: progress(ImportedFile, done, total), called as each file is settled
+        """
+        started = time.monotonic()
+        files = []
+        for entry in self.stream():
+            files.append(entry)
+            if progress is not None: progress(entry, len(files), self.total)
+        return self._report(files, started)
+
+    async def arun(self, progress: callable = None) -> ImportReport:
+        """ run() for an asynchronous ConnectionManager """
+        started = time.monotonic()
+        files = []
+        async for entry in self.astream():
+            files.append(entry)
+            if progress is not None: progress(entry, len(files), self.total)
+        return self._report(files, started)
+
+    def _report(self, files: [ImportedFile], started: float) -> ImportReport:
+        # in discovery order, whatever order they were settled in
+        return ImportReport(sorted(files, key=lambda entry: entry.path), time.monotonic() - started, self.reads)
@@ -0,0 +1,480 @@
+"""
+    NetworkManager keyfiles (.nmconnection), for provisioning many profiles with one nmcli call.
+
+        profiles = [
+                { 'connection': { 'id': f'vlan{n}', 'type': 'vlan' },
+                  'vlan': { 'id': n, 'parent': 'eth0' },
+                  'ipv4': { 'method': 'auto' } }
+                for n in range(100, 2100)
+                ]
+        report = nmcli.connections.provision(profiles)      # 2000 files written, then one `nmcli connection load`
+        report.failed                                       # [Provisioned, ...], each with its error
+
+    A profile maps settings to their keys and values as nm-settings-keyfile(5) names them; 'ipv4.method' style keys
+    are accepted as well. Lists are written ';' separated, booleans as true/false. A profile without a uuid gets one.
+
+    Files are written to a temporary name in the target directory, flushed, made 0600 (NetworkManager ignores keyfiles
+    other users can read) and renamed over the final name, so NetworkManager never reads a partial file.
+
+    For read-only inventory the keyfiles can be read back without nmcli:
+
+        reader = KeyfileReader()                            # or KeyfileReader('/tmp/fixture'), any directory
+        profiles = reader.read()                            # { connection.id: MultilineRecord }, as Show(ID) gives them
+        profiles['office']['ipv4']['addresses']             # '10.0.0.2/24,10.0.0.3/24'
+        reader.read()                                       # parses only the files changed since (mtime, size, inode)
+
+    Only what is on disk is seen: profiles kept in memory by NetworkManager, and the active data (GENERAL, IP4, ...)
+    are not, and the values are those of the file, in nmcli's spelling (setting names, yes/no, ',' joined lists).
+"""
+import os
+import re
+import tempfile
+import uuid
+
+
+___all__ = ['dumps', 'loads', 'write', 'provision', 'aprovision', 'Provisioned', 'ProvisionReport', 'KeyfileReader', 'SYSTEM_CONNECTIONS']
+
+
+
+SYSTEM_CONNECTIONS = '/etc/NetworkManager/system-connections'
+_invalid_name = re.compile(r'[\[\]=\n\r]')
+_unsafe_file_name = re.compile(r'[^\w.@+-]')
+
+
+
+
+def _escape(value: str, separator: bool = False) -> str:
+    """ GKeyFile escaping; separator also escapes ';', for list items """
+    value = value.replace('\\', '\\\\').replace('\n', '\\n').replace('\t', '\\t').replace('\r', '\\r')
+    if separator: value = value.replace(';', '\\;')
+    if value.startswith(' '): value = '\\s' + value[1:]
+    return value
+
+
+def _value(value) -> str:
+    if isinstance(value, bool): return 'true' if value else 'false'
+    if isinstance(value, (list, tuple)): return ''.join(_escape(str(item), separator=True) + ';' for item in value)
+    return _escape(str(value))
+
+
+def settings(profile: dict) -> dict:
+    """ { setting: { key: value } }, with 'setting.key' entries of profile folded into their setting """
+    grouped = { }
+    for name, value in profile.items():
+        if isinstance(value, dict):
+            grouped.setdefault(name, { }).update(value)
+        else:
+            setting, dot, key = name.partition('.')
+            if not dot: raise ValueError(f"'{name}' is neither a setting nor a setting.key")
+            grouped.setdefault(setting, { })[key] = value
+    return grouped
+
+
+def dumps(profile: dict) -> str:
+    """
+        The keyfile text of profile. connection.id and connection.type are required; connection.uuid is filled in
+        when missing (profile is not modified).
+    """
+    grouped = settings(profile)
+    connection = grouped.setdefault('connection', { })
+    for key in ('id', 'type'):
+        if not connection.get(key): raise ValueError(f'connection.{key} is required')
+    if not connection.get('uuid'): connection['uuid'] = str(uuid.uuid4())
+
+    # [connection] first, as NetworkManager writes them
+    lines = []
+    for setting in sorted(grouped, key=lambda name: name != 'connection'):
+        if _invalid_name.search(setting): raise ValueError(f'invalid setting name {setting!r}')
+        lines.append(f'[{setting}]')
+        for key, value in grouped[setting].items():
+            if value is None: continue
+            if _invalid_name.search(key): raise ValueError(f'invalid key {setting}.{key!r}')
+            lines.append(f'{key}={_value(value)}')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def file_name(profile_id: str) -> str:
+    """ 'Office VPN' -> 'Office_VPN.nmconnection' """
+    return _unsafe_file_name.sub('_', profile_id).lstrip('.') + '.nmconnection'
+
+
+def write(path: str, text: str, mode: int = 0o600):
+    """ Writes text to path atomically, with mode. """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(prefix='.nmcli-', suffix='.tmp', dir=directory)
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.unlink(tmp)
+        raise
+
+
+def _sync_directory(directory: str):
+    """ Makes the renames in directory durable; not every platform can open a directory. """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+
+class Provisioned(object):
+    """ One profile of a provisioning batch: where it was written, and why it failed if it did. """
+    __slots__ = ['id', 'uuid', 'path', 'error']
+    def __init__(self, id: str = None, uuid: str = None, path: str = None, error: str = None):
+        self.id = id
+        self.uuid = uuid
+        self.path = path
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def ToDict(self) -> dict:
+        return { 'id': self.id, 'uuid': self.uuid, 'path': self.path, 'error': self.error }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.ToDict()}>"
+
+
+
+class ProvisionReport(object):
+    """ The profiles of a batch, in the order given, and the Result (or error) of the load. """
+    def __init__(self, profiles: [Provisioned], result: 'Result' = None, error: Exception = None):
+        self.profiles = profiles
+        self.result = result
+        self.error = error
+
+    @property
+    def loaded(self) -> [Provisioned]:
+        return [profile for profile in self.profiles if profile.ok]
+
+    @property
+    def failed(self) -> [Provisioned]:
+        return [profile for profile in self.profiles if not profile.ok]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and all(profile.ok for profile in self.profiles)
+
+    def ToDict(self) -> dict:
+        return {
+                'loaded': len(self.loaded),
+                'failed': [profile.ToDict() for profile in self.failed],
+                'error': None if self.error is None else str(self.error),
+                }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {len(self.loaded)} loaded, {len(self.failed)} failed>"
+
+
+
+def _file_uuid(path: str) -> str or None:
+    """ connection.uuid of the keyfile at path; None when it cannot be read as one """
+    try:
+        with open(path, encoding='utf-8') as file:
+            return loads(file.read()).get('connection', { }).get('uuid')
+    except (OSError, ValueError):
+        return None
+
+
+def _free_name(directory: str, name: str, profile_uuid: str, taken: set) -> str:
+    """
+        name, unless this run already wrote it or another profile's file has it: then name-<uuid[:8]>, then name-<uuid>.
+        A file of the same uuid is the profile's own and is replaced.
+    """
+    stem = name[:-len('.nmconnection')]
+    for candidate in (name, f'{stem}-{profile_uuid[:8]}.nmconnection', f'{stem}-{profile_uuid}.nmconnection'):
+        if candidate in taken: continue
+        path = os.path.join(directory, candidate)
+        if not os.path.lexists(path) or _file_uuid(path) == profile_uuid: return candidate
+    raise ValueError(f"refusing to overwrite {os.path.join(directory, name)}: it and its alternatives hold other profiles")
+
+
+def _write_profiles(profiles: [dict], directory: str) -> [Provisioned]:
+    """ Writes every profile it can; a profile that cannot be serialized or written only fails itself. """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    names = set()
+    for profile in profiles:
+        entry = Provisioned()
+        written.append(entry)
+        try:
+            grouped = settings(profile)
+            connection = grouped.setdefault('connection', { })
+            if not connection.get('uuid'): connection['uuid'] = str(uuid.uuid4())
+            text = dumps(grouped)
+            entry.id, entry.uuid = str(connection['id']), connection['uuid']
+
+            name = _free_name(directory, file_name(entry.id), entry.uuid, names)
+            names.add(name)
+
+            entry.path = os.path.abspath(os.path.join(directory, name))
+            write(entry.path, text)
+        except (ValueError, OSError) as e:
+            entry.error = str(e)
+    _sync_directory(directory)
+    return written
+
+
+def _load_failures(written: [Provisioned], failures: [str], error: Exception = None):
+    failures = set(failures)
+    for entry in written:
+        if entry.ok and (entry.path in failures or (error is not None and not failures)):
+            entry.error = 'NetworkManager could not load the file' if error is None else f'load failed: {error}'
+
+
+def _loaded(written: [Provisioned], result: 'Result' = None, error: Exception = None) -> ProvisionReport:
+    from .connection import _ConnLoadCommand
+    if error is None:
+        failures = result.data['failed'] if result is not None and isinstance(result.data, dict) else []
+        _load_failures(written, failures)
+    else:
+        stderr = (getattr(error, 'data', None) or { }).get('stderr')
+        _load_failures(written, _ConnLoadCommand.Failures(stderr), error)
+    return ProvisionReport(written, result, error)
+
+
+def provision(profiles: [dict], directory: str = SYSTEM_CONNECTIONS, reload: bool = False, connections: 'ConnectionManager' = None) -> ProvisionReport:
+    """
+        Writes profiles as keyfiles into directory, then has NetworkManager read them with one nmcli call.
+
+    :param reload: `nmcli connection reload` (every file on disk) instead of `nmcli connection load <the new files>`
+    :param connections: the ConnectionManager to load with; defaults to nmcli.connections
+    """
+    from .base import NetWorkManagerException
+    if connections is None:
+        from . import nmcli
+        connections = nmcli.connections
+
+    written = _write_profiles(profiles, directory)
+    paths = [entry.path for entry in written if entry.ok]
+    if not paths and not reload: return ProvisionReport(written)
+    try:
+        result = connections.Reload() if reload else connections.Load(*paths)
+    except NetWorkManagerException as e:
+        return _loaded(written, error=e)
+    return _loaded(written, result if not reload else None)
+
+
+async def aprovision(profiles: [dict], directory: str = SYSTEM_CONNECTIONS, reload: bool = False, connections: 'ConnectionManager' = None) -> ProvisionReport:
+    """ provision() for an asynchronous ConnectionManager (see nmcli.aio); the files are written before the first await. """
+    from .base import NetWorkManagerException
+    if connections is None:
+        from .aio import AsyncConnectionManager
+        connections = AsyncConnectionManager()
+
+    written = _write_profiles(profiles, directory)
+    paths = [entry.path for entry in written if entry.ok]
+    if not paths and not reload: return ProvisionReport(written)
+    try:
+        result = await (connections.Reload() if reload else connections.Load(*paths))
+    except NetWorkManagerException as e:
+        return _loaded(written, error=e)
+    return _loaded(written, result if not reload else None)
+
+
+
+
+# -------------------------------------------------------------------------------- reading
+
+# files the keyfile plugin skips: hidden ones, editor backups and package manager leftovers
+_ignored_file = re.compile(r'^\.|~$|\.(swp|swpx|bak|orig|rej|tmp|rpmnew|rpmsave|rpmorig)$|\.dpkg-[^.]+$')
+_escape_sequence = re.compile(r'\\(.)')
+_unescapes = { 's': ' ', 'n': '\n', 't': '\t', 'r': '\r' }
+_list_value = re.compile(r'^(?:(?:[^;\\]|\\.)*;)+$')
+_list_item = re.compile(r'((?:[^;\\]|\\.)*);')
+# keys holding ';' separated lists, by group (NetworkManager writes [ethernet], [wifi] and [wifi-security]); any other
+# value is a string, even one ending in ';' (psk=pass;)
+_ip_lists = { 'dns', 'dns-search', 'dns-options' }
+_wifi_lists = { 'mac-address-blacklist', 'mac-address-denylist', 'seen-bssids' }
+_wifi_security_lists = { 'proto', 'pairwise', 'group' }
+_ethernet_lists = { 'mac-address-blacklist', 'mac-address-denylist', 's390-subchannels' }
+_list_keys = {
+        'connection':               { 'permissions', 'secondaries' },
+        'ipv4':                     _ip_lists,
+        'ipv6':                     _ip_lists,
+        '802-1x':                   { 'eap', 'altsubject-matches', 'phase2-altsubject-matches' },
+        'wifi':                     _wifi_lists,
+        '802-11-wireless':          _wifi_lists,
+        'wifi-security':            _wifi_security_lists,
+        '802-11-wireless-security': _wifi_security_lists,
+        'ethernet':                 _ethernet_lists,
+        '802-3-ethernet':           _ethernet_lists,
+        'vlan':                     { 'ingress-priority-map', 'egress-priority-map' },
+        'match':                    { 'interface-name', 'driver', 'kernel-command-line', 'path' },
+        }
+# address1=, route2=, route2_options=, ...
+_indexed = re.compile(r'^(address|addresses|route|routing-rule)(\d+)(_options)?$')
+_booleans = { 'true': 'yes', 'false': 'no' }
+# properties of [vpn]; its other keys are vpn.data
+_vpn_properties = ('service-type', 'user-name', 'persistent', 'timeout')
+
+
+def _unescape(value: str) -> str:
+    if '\\' not in value: return value
+    return _escape_sequence.sub(lambda match: _unescapes.get(match.group(1), match.group(1)), value)
+
+
+def _list(value: str) -> [str]:
+    """ 'a;b;' or 'a;b' -> ['a', 'b']; '\\;' stays in its item """
+    if not value: return []
+    if not _list_value.match(value): value += ';'
+    return [_unescape(item) for item in _list_item.findall(value)]
+
+
+def loads(text: str) -> dict:
+    """ { setting: { key: value } } of keyfile text; the values of the list keys (_list_keys) are lists """
+    grouped = { }
+    group = None
+    lists = ()
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'): continue
+        if line.startswith('[') and line.endswith(']'):
+            group = grouped.setdefault(line[1:-1], { })
+            lists = _list_keys.get(line[1:-1], ())
+            continue
+        key, separator, value = line.partition('=')
+        if not separator or group is None: raise ValueError(f'not a keyfile line: {line!r}')
+        key, value = key.strip(), value.strip()
+        group[key] = _list(value) if key in lists else _unescape(value)
+    return grouped
+
+
+def _nmcli_value(value) -> str:
+    if isinstance(value, list): return ','.join(value)
+    return _booleans.get(value, value)
+
+
+def _pairs(values: dict, separator: str) -> str:
+    return ', '.join(f'{key}{separator}{_nmcli_value(value)}' for key, value in values.items())
+
+
+def _ip_properties(setting: str, keys: dict) -> dict:
+    """ The properties of [ipv4] or [ipv6]: addressN and routeN entries become addresses and routes """
+    properties = { }
+    addresses, routes = { }, { }
+    for key, value in keys.items():
+        match = _indexed.match(key)
+        if match is None:
+            properties[f'{setting}.{key}'] = _nmcli_value(value)
+            continue
+        kind, index, options = match.group(1), int(match.group(2)), match.group(3)
+        parts = value if isinstance(value, list) else value.split(',')
+        if kind.startswith('address'):
+            addresses[index] = parts[0]
+            if len(parts) > 1 and parts[1] and f'{setting}.gateway' not in keys: properties.setdefault(f'{setting}.gateway', parts[1])
+        elif kind == 'route' and options:
+            routes.setdefault(index, { }).update(option.split('=', 1) for option in parts if '=' in option)
+        elif kind == 'route':
+            # dest/prefix,next hop,metric first, then the options of route{index}_options
+            routes[index] = { **{ name: part for name, part in zip(('ip', 'nh', 'mt'), parts) if part }, **routes.get(index, { }) }
+    if addresses: properties[f'{setting}.addresses'] = ','.join(addresses[index] for index in sorted(addresses))
+    if routes: properties[f'{setting}.routes'] = '; '.join('{ ' + _pairs(routes[index], ' = ') + ' }' for index in sorted(routes))
+    return properties
+
+
+def properties(grouped: dict) -> dict:
+    """ { setting.property: value } as nmcli prints a profile, from loads() output; connection comes first """
+    from .constants import NM_SETTING_NAMES
+    names = { 'wifi-security': '802-11-wireless-security', **NM_SETTING_NAMES }
+    flat = { }
+    for group in sorted(grouped, key=lambda name: name != 'connection'):
+        keys = grouped[group]
+        setting = names.get(group, group)
+        if setting in ('ipv4', 'ipv6'): flat.update(_ip_properties(setting, keys))
+        elif setting == 'bond': flat['bond.options'] = ','.join(f'{key}={_nmcli_value(value)}' for key, value in keys.items())
+        elif setting == 'vpn':
+            flat.update({ f'vpn.{key}': _nmcli_value(value) for key, value in keys.items() if key in _vpn_properties })
+            data = { key: value for key, value in keys.items() if key not in _vpn_properties }
+            if data: flat['vpn.data'] = _pairs(data, ' = ')
+        elif setting == 'vpn-secrets': flat['vpn.secrets'] = _pairs(keys, ' = ')
+        else: flat.update({ f'{setting}.{key}': _nmcli_value(value) for key, value in keys.items() })
+    if 'connection.type' in flat: flat['connection.type'] = names.get(flat['connection.type'], flat['connection.type'])
+    return flat
+
+
+def record(grouped: dict) -> 'MultilineRecord':
+    """ A profile read from a keyfile as the MultilineRecord `connection show ID` would give """
+    from .standard_parsers import MultilineRecord
+    flat = properties(grouped)
+    if not flat.get('connection.id'): raise ValueError('connection.id is missing')
+    lines = [f"connection.id:{flat.pop('connection.id')}"]
+    lines += [f'{name}:{value}' for name, value in flat.items()]
+    return MultilineRecord('\n'.join(line.replace('\n', ' ') for line in lines))
+
+
+
+class KeyfileReader(object):
+    """
+        The profiles of a keyfile directory, read without nmcli. A file is parsed again only when its mtime, size or
+        inode changed since the previous read; NetworkManager replaces keyfiles by renaming, which changes the inode.
+    """
+    def __init__(self, directory: str = SYSTEM_CONNECTIONS):
+        self.directory = directory
+        # path: ((mtime_ns, size, inode), MultilineRecord or None, error or None)
+        self._files = { }
+        self.parsed = 0
+        self.reused = 0
+
+    @property
+    def errors(self) -> dict:
+        """ { path: why it could not be read }, as of the last read """
+        return { path: error for path, (stamp, profile, error) in self._files.items() if error is not None }
+
+    def scan(self) -> dict:
+        """ { path: MultilineRecord } of every readable keyfile """
+        try:
+            entries = sorted(os.scandir(self.directory), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            entries = []
+
+        files = { }
+        self.parsed = self.reused = 0
+        for entry in entries:
+            if _ignored_file.search(entry.name): continue
+            try:
+                if not entry.is_file(): continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            cached = self._files.get(entry.path)
+            if cached is not None and cached[0] == stamp:
+                files[entry.path] = cached
+                self.reused += 1
+                continue
+
+            self.parsed += 1
+            try:
+                with open(entry.path, encoding='utf-8') as f:
+                    files[entry.path] = (stamp, record(loads(f.read())), None)
+            except (OSError, ValueError) as e:
+                # unreadable and invalid files are remembered too, so they are not retried until they change
+                files[entry.path] = (stamp, None, str(e))
+        self._files = files
+        return { path: profile for path, (stamp, profile, error) in files.items() if profile is not None }
+
+    def read(self) -> dict:
+        """ { connection.id: MultilineRecord }, the shape of Show(ID).data """
+        return { profile['connection']['id']: profile for profile in self.scan().values() }
+
+    def stats(self) -> dict:
+        return { 'files': len(self._files), 'parsed': self.parsed, 'reused': self.reused, 'errors': len(self.errors) }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.directory}, {len(self._files)} files>"
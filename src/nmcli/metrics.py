@@ -0,0 +1,331 @@
+"""
+    Where the time of each nmcli invocation goes, per command, in fixed memory.
+
+        metrics = nmcli.set_metrics(Metrics(slow=2.0))     # log invocations slower than 2 s
+        nmcli.devices.status()
+        metrics.histogram('device status').p99              # seconds
+        metrics.Prometheus()                                # text exposition format
+        metrics.WritePrometheus('/var/lib/node_exporter/nmcli.prom')
+        metrics.add_sink(lambda invocation: print(invocation.ToDict()))
+
+    Every invocation is timed in phases: build (the argv), spawn (until the process exists), wait (until nmcli exits,
+    most of it waiting on NetworkManager), decode (of its output) and, when the Result's data is first read, parse.
+    Transports that cannot tell spawn, wait and decode apart (D-Bus, custom ones) only report wall. Reads answered by
+    the ResultCache, or joined to one already running, are not invocations and are not counted.
+
+    Histograms have fixed log spaced buckets (about 19% wide, 100 us to 2 min), so memory depends on the number of
+    commands, never on the number of invocations. Without metrics set, a command costs one attribute check more.
+"""
+import json
+import logging
+import re
+import shlex
+import threading
+import time
+from bisect import bisect_left
+
+from .base import error_codes
+from .cache import command_words
+
+
+___all__ = ['Metrics', 'Histogram', 'Invocation', 'JsonLinesSink', 'PHASES']
+
+
+
+PHASES = ('wall', 'build', 'spawn', 'wait', 'decode', 'parse')
+logger = logging.getLogger('nmcli')
+# a property (its last component) or keyword naming a secret: 802-1x.phase2-private-key-password, wifi-sec.psk, gsm.pin,
+# wifi-sec.wep-key0, vpn.secrets, password; the word after it is the secret
+_secret_names = re.compile(r'password|psk|wep-key|private-key|preshared-key|secret|(^|-)pin($|-)')
+
+
+
+
+def command_label(argv: [str]) -> str:
+    """ The command an argv runs, without its arguments: 'device status', 'device wifi list', 'connection show' """
+    words = command_words(argv)
+    return ' '.join(words[:3] if words[:2] == ['device', 'wifi'] else words[:2])
+
+
+def _secrets(argv: [str]) -> [int]:
+    """ The indices of the secret values in argv """
+    return [index + 1 for index, word in enumerate(argv[:-1]) if _secret_names.search(word.lstrip('+-').rpartition('.')[2].lower())]
+
+
+def redact(argv: [str]) -> [str]:
+    """ argv with passwords and keys replaced by '***', for logs and sinks """
+    redacted = list(argv)
+    for index in _secrets(argv):
+        redacted[index] = '***'
+    return redacted
+
+
+def redact_error(error: Exception, argv: [str]) -> str:
+    """ 'TimeoutExpired: ...' with the secrets of argv replaced by '***'; TimeoutExpired and others quote the whole argv """
+    message = f'{type(error).__name__}: {error}'
+    for secret in sorted({ argv[index] for index in _secrets(argv) if argv[index] }, key=len, reverse=True):
+        message = message.replace(secret, '***').replace(repr(secret)[1:-1], '***')
+    return message
+
+
+
+class Histogram(object):
+    """ Latencies in fixed log spaced buckets; quantiles are accurate to a bucket's width. """
+    __slots__ = ['counts', 'count', 'sum', 'min', 'max']
+    # upper bounds in seconds: 100 us * 2 ** (i / 4), up to about 2 minutes; one more bucket takes the rest
+    bounds = tuple(0.0001 * 2 ** (i / 4) for i in range(82))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantile(self, q: float) -> float or None:
+        """ The q quantile (0.99 for p99), as the upper bound of its bucket within [min, max]; None when empty """
+        if not self.count: return None
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank: break
+        bound = self.bounds[index] if index < len(self.bounds) else self.max
+        return min(max(bound, self.min), self.max)
+
+    @property
+    def p50(self) -> float or None:
+        return self.quantile(0.5)
+
+    @property
+    def p90(self) -> float or None:
+        return self.quantile(0.9)
+
+    @property
+    def p99(self) -> float or None:
+        return self.quantile(0.99)
+
+    @property
+    def mean(self) -> float or None:
+        return self.sum / self.count if self.count else None
+
+    def ToDict(self) -> dict:
+        return { 'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max, 'mean': self.mean,
+                 'p50': self.p50, 'p90': self.p90, 'p99': self.p99 }
+
+    def __repr__(self) -> str:
+        if not self.count: return f"<{self.__class__.__name__} : empty>"
+        return f"<{self.__class__.__name__} : {self.count} p50={self.p50 * 1000:.1f}ms p90={self.p90 * 1000:.1f}ms p99={self.p99 * 1000:.1f}ms>"
+
+
+
+class Invocation(object):
+    """
+        One nmcli run. Phases the transport could not measure are None; parse is filled in once the Result's data is
+        first read, after the sinks have seen the invocation.
+    """
+    __slots__ = ['command', 'argv', 'return_code', 'status', 'stdout_bytes', 'error', 'started',
+                 'wall', 'build', 'spawn', 'wait', 'decode', 'parse', '_metrics']
+    def __init__(self, command: str, argv: [str], started: float, wall: float, build: float, return_code: int or None = None,
+                 stdout_bytes: int = 0, error: str = None, timings: dict = None, metrics: 'Metrics' = None):
+        timings = timings or { }
+        self.command = command
+        self.argv = argv
+        self.return_code = return_code
+        self.status = None if return_code is None else error_codes(return_code)
+        self.stdout_bytes = stdout_bytes
+        self.error = error
+        # time.time() when it started
+        self.started = started
+        self.wall = wall
+        self.build = build
+        self.spawn = timings.get('spawn')
+        self.wait = timings.get('wait')
+        self.decode = timings.get('decode')
+        self.parse = None
+        self._metrics = metrics
+
+    @property
+    def ok(self) -> bool:
+        return self.return_code is not None and error_codes.IsOk(self.return_code)
+
+    def timed(self, parse: callable) -> callable:
+        """ parse(stdout, stderr), recording its duration on this invocation """
+        def timed_parse(stdout: str, stderr: str):
+            started = time.perf_counter()
+            try:
+                return parse(stdout, stderr)
+            finally:
+                self.parse = time.perf_counter() - started
+                if self._metrics is not None: self._metrics.observe(self.command, 'parse', self.parse)
+        return timed_parse
+
+    def ToDict(self) -> dict:
+        return { 'command': self.command, 'argv': self.argv, 'return_code': self.return_code, 'status': self.status,
+                 'stdout_bytes': self.stdout_bytes, 'error': self.error, 'started': self.started,
+                 **{ phase: getattr(self, phase) for phase in PHASES } }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.command} {self.return_code} {self.wall * 1000:.1f}ms>"
+
+
+
+class _Command(object):
+    """ What Metrics keeps per command """
+    __slots__ = ['histograms', 'codes', 'stdout_bytes', 'slow', 'errors']
+    def __init__(self):
+        self.histograms = { phase: Histogram() for phase in PHASES }
+        self.codes = { }
+        self.stdout_bytes = 0
+        self.slow = 0
+        self.errors = 0
+
+
+
+class JsonLinesSink(object):
+    """ A sink writing every invocation as one JSON line to a text stream """
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, invocation: Invocation):
+        line = json.dumps(invocation.ToDict(), separators=(',', ':')) + '\n'
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+
+class Metrics(object):
+    """
+        Per command histograms of each phase, exit codes and output sizes, shared by every thread and event loop.
+    """
+    def __init__(self, slow: float = None, sinks: [callable] = None, logger: logging.Logger = logger):
+        """
+        :param slow: seconds of wall time from which an invocation is logged as a warning; None logs none
+        :param sinks: sink(Invocation) callables, called after each invocation (from the thread that ran it)
+        :param logger: where slow invocations and failing sinks are logged
+        """
+        self.slow = slow
+        self.sinks = list(sinks or [])
+        self.logger = logger
+        self._commands = { }
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: callable):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink: callable):
+        self.sinks.remove(sink)
+
+    # -------------------------------------------------------------------------------- recording
+
+    def _command(self, name: str) -> _Command:
+        command = self._commands.get(name)
+        if command is None: command = self._commands.setdefault(name, _Command())
+        return command
+
+    def observe(self, name: str, phase: str, seconds: float):
+        with self._lock:
+            self._command(name).histograms[phase].observe(seconds)
+
+    def record(self, argv: [str], build: float, wall: float, return_code: int or None, stdout: str = None, timings: dict = None,
+               error: Exception = None) -> Invocation:
+        """ Counts one invocation, logs it if slow and hands it to the sinks """
+        timings = timings or { }
+        stdout_bytes = timings.get('stdout_bytes', len(stdout) if stdout else 0)
+        invocation = Invocation(command_label(argv), redact(argv), time.time() - wall, wall, build, return_code, stdout_bytes,
+                                None if error is None else redact_error(error, argv), timings, self)
+        with self._lock:
+            command = self._command(invocation.command)
+            for phase in ('wall', 'build', 'spawn', 'wait', 'decode'):
+                seconds = getattr(invocation, phase)
+                if seconds is not None: command.histograms[phase].observe(seconds)
+            command.codes[return_code] = command.codes.get(return_code, 0) + 1
+            command.stdout_bytes += stdout_bytes
+            if error is not None: command.errors += 1
+            slow = self.slow is not None and wall >= self.slow
+            if slow: command.slow += 1
+
+        if slow: self.logger.warning('slow nmcli command: %.3fs %s (exit %s)', wall, shlex.join(invocation.argv), return_code)
+        for sink in self.sinks:
+            try:
+                sink(invocation)
+            except Exception:
+                self.logger.exception('nmcli metrics sink %r failed', sink)
+        return invocation
+
+    def reset(self):
+        with self._lock:
+            self._commands = { }
+
+    # -------------------------------------------------------------------------------- reading
+
+    def commands(self) -> [str]:
+        with self._lock:
+            return sorted(self._commands)
+
+    def histogram(self, command: str, phase: str = 'wall') -> Histogram:
+        """ The histogram of one phase of command; empty for a command not run yet """
+        if phase not in PHASES: raise ValueError(f"unknown phase '{phase}', one of {PHASES}")
+        with self._lock:
+            command = self._commands.get(command)
+            return Histogram() if command is None else command.histograms[phase]
+
+    def ToDict(self) -> dict:
+        with self._lock:
+            return { name: { 'count': command.histograms['wall'].count, 'codes': dict(command.codes), 'stdout_bytes': command.stdout_bytes,
+                             'slow': command.slow, 'errors': command.errors,
+                             **{ phase: histogram.ToDict() for phase, histogram in command.histograms.items() if histogram.count } }
+                     for name, command in self._commands.items() }
+
+    def Json(self, **kwargs) -> str:
+        """ ToDict() as JSON; exit codes become string keys """
+        return json.dumps(self.ToDict(), **kwargs)
+
+    @staticmethod
+    def _label(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def Prometheus(self, prefix: str = 'nmcli') -> str:
+        """ The Prometheus text exposition format: a summary (p50/p90/p99) per phase, and counters """
+        lines = [f'# HELP {prefix}_command_seconds Time of nmcli invocations by command and phase.',
+                 f'# TYPE {prefix}_command_seconds summary']
+        with self._lock:
+            commands = sorted(self._commands.items())
+            for name, command in commands:
+                for phase, histogram in command.histograms.items():
+                    if not histogram.count: continue
+                    labels = f'command="{self._label(name)}",phase="{phase}"'
+                    for q in (0.5, 0.9, 0.99):
+                        lines.append(f'{prefix}_command_seconds{{{labels},quantile="{q}"}} {histogram.quantile(q):.6f}')
+                    lines.append(f'{prefix}_command_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{prefix}_command_seconds_count{{{labels}}} {histogram.count}')
+
+            lines += [f'# HELP {prefix}_command_exit_total Invocations by command and exit status.', f'# TYPE {prefix}_command_exit_total counter']
+            for name, command in commands:
+                for code, count in sorted(command.codes.items(), key=lambda item: -1 if item[0] is None else item[0]):
+                    code = 'none' if code is None else code
+                    lines.append(f'{prefix}_command_exit_total{{command="{self._label(name)}",code="{code}"}} {count}')
+
+            lines += [f'# HELP {prefix}_command_stdout_bytes_total Output read from nmcli by command.', f'# TYPE {prefix}_command_stdout_bytes_total counter']
+            lines += [f'{prefix}_command_stdout_bytes_total{{command="{self._label(name)}"}} {command.stdout_bytes}' for name, command in commands]
+
+            lines += [f'# HELP {prefix}_command_slow_total Invocations over the slow threshold by command.', f'# TYPE {prefix}_command_slow_total counter']
+            lines += [f'{prefix}_command_slow_total{{command="{self._label(name)}"}} {command.slow}' for name, command in commands]
+        return '\n'.join(lines) + '\n'
+
+    def WritePrometheus(self, path: str):
+        """ Writes Prometheus() atomically, for node_exporter's textfile collector """
+        from .keyfile import write
+        write(path, self.Prometheus(), mode=0o644)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {len(self._commands)} commands>"
@@ -1,5 +1,6 @@
 
 from .base import ROOT
+from .events import MonitorStream
 from .results import Result
 
 
@@ -17,11 +18,17 @@ class MonitorCommand(ROOT):
        See also nmcli connection monitor and nmcli device monitor to watch for changes in certain devices or connections.
     """
     __base_command__: str = 'monitor'
-    def __call__(self, *args, **kwargs) -> Result:
-        return self._run_action(self.__base_command__, *args, **kwargs)
+    def __call__(self) -> MonitorStream:
+        """
+            Yields typed events (see nmcli.events) as nmcli prints them, until the stream is closed.
 
-    def __init__(self):
-        pass
+                with nmcli.monitor() as events:
+                    for event in events: ...
+        """
+        return self._stream_action(self.__base_command__)
+
+    def __init__(self, asynchronous: bool = False):
+        self._asynchronous = asynchronous
 
 
 
@@ -38,6 +45,9 @@ class RTC_WiFi_Command(ROOT):
         on = 'on'
         off = 'off'
 
+    def __call__(self) -> Result:
+        return self._run_action(self.__base_command__, self.__cmd__)
+
     def on(self) -> Result:
         return self._run_action(self.__base_command__, self.__cmd__, self.sub_cmd.on)
 
@@ -56,6 +66,10 @@ class RTC_WWan_Command(ROOT):
     class sub_cmd(object):
         on = 'on'
         off = 'off'
+
+    def __call__(self) -> Result:
+        return self._run_action(self.__base_command__, self.__cmd__)
+
     def on(self) -> Result:
         return self._run_action(self.__base_command__, self.__cmd__, self.sub_cmd.on)
 
@@ -73,6 +87,10 @@ class RTC_All_Command(ROOT):
     class sub_cmd(object):
         on = 'on'
         off = 'off'
+
+    def __call__(self) -> Result:
+        return self._run_action(self.__base_command__, self.__cmd__)
+
     def on(self) -> Result:
         return self._run_action(self.__base_command__, self.__cmd__, self.sub_cmd.on)
 
@@ -89,7 +107,16 @@ class RadioTransmissionControlCommand(object):
        Show radio switches status, or enable and disable the switches.
     """
     __base_command__: str = 'radio'
-    def __init__(self):
-        self.wifi = RTC_WiFi_Command(base=self.__base_command__)
-        self.wwan = RTC_WWan_Command(base=self.__base_command__)
-        self.all = RTC_All_Command(base=self.__base_command__)
+    def __init__(self, asynchronous: bool = False):
+        self.wifi = RTC_WiFi_Command(base=self.__base_command__, asynchronous=asynchronous)
+        self.wwan = RTC_WWan_Command(base=self.__base_command__, asynchronous=asynchronous)
+        self.all = RTC_All_Command(base=self.__base_command__, asynchronous=asynchronous)
+
+    def __call__(self) -> Result:
+        """
+        nmcli radio all
+            WIFI-HW  WIFI     WWAN-HW  WWAN
+            enabled  enabled  enabled  enabled
+        :return:
+        """
+        return self.all()
@@ -0,0 +1,390 @@
+"""
+    Desired state for connection profiles: read what NetworkManager has, then run only the commands that change it.
+
+        desired = [
+                { 'connection': { 'id': 'office', 'type': 'ethernet', 'interface-name': 'eth0' },
+                  'ipv4': { 'method': 'manual', 'addresses': ['10.0.0.2/24'], 'dns': ['10.0.0.53'] } },
+                { 'connection.id': 'vlan10', 'type': 'vlan', 'vlan.id': 10, 'vlan.parent': 'eth0' },
+                ]
+        plan = nmcli.connections.reconcile(desired, dry_run=True)
+        print(plan.Text())                  # the commands that would run, one per line
+        report = nmcli.connections.reconcile(desired)
+        report.stats                        # { 'desired': 2, 'unchanged': 1, 'modified': 1, ..., 'commands_avoided': 1 }
+
+    Profiles are given as for Modify (setting.property names, or aliases naming a single property), flat or grouped by
+    setting. A profile is matched by connection.uuid when it has one, else by connection.id; a profile that matches
+    none is added, which needs connection.type.
+
+    The current state is read with one `connection show` and one `connection show uuid ...` per chunk of matched
+    profiles, asking only for the properties desired. When every desired profile has a uuid the list is skipped, so a
+    re-run with nothing to change costs a single nmcli call. Each profile that differs gets one command holding all of
+    its changed properties; +setting.property is a no-op when its items are present already, -setting.property when
+    they are absent. Secrets nmcli shows as <hidden> cannot be compared and count as unchanged.
+"""
+import re
+import shlex
+import time
+
+from .base import ROOT, NetWorkManagerException, Tables
+from .constants import NM_SETTING_NAMES
+
+
+___all__ = ['Reconciler', 'ReconcileReport', 'Change', 'DETAILS_CHUNK']
+
+
+
+# profiles per `connection show uuid ...`, to keep the command line well under ARG_MAX
+DETAILS_CHUNK = 200
+_empty = ('', '--')
+_hidden = '<hidden>'
+_booleans = { 'true': 'yes', 'false': 'no' }
+_mac = re.compile(r'^([0-9a-f]{2}:){5}[0-9a-f]{2}$', re.I)
+# enum and flag properties are printed with their names, e.g. vlan.flags '1 (REORDER_HEADERS)'
+_described = re.compile(r'^(\S+) \(.*\)$')
+
+
+
+
+def _resolve(name: str) -> str:
+    """ [+|-]setting.property with nmcli's setting name, for a property name or an alias naming one property """
+    sign = name[0] if name[:1] in ('+', '-') else ''
+    bare = name[len(sign):]
+    if '.' not in bare:
+        targets = { tuple(properties) for table in Tables.Aliases().values() for alias, properties in table.items() if alias == bare }
+        if len(targets) != 1 or len(next(iter(targets))) != 1:
+            raise ValueError(f"'{bare}' does not name a single property; use setting.property")
+        bare = next(iter(targets))[0]
+    Tables.Validate(sign + bare)
+    setting, _, prop = bare.partition('.')
+    return f'{sign}{NM_SETTING_NAMES.get(setting, setting)}.{prop}'
+
+
+def _flatten(profile: dict) -> dict:
+    """ { [+|-]setting.property: value } of a flat or grouped profile """
+    flat = { }
+    for name, value in profile.items():
+        if isinstance(value, dict):
+            for key, item in value.items():
+                sign = key[0] if key[:1] in ('+', '-') else ''
+                flat[_resolve(f'{sign}{name}.{key[len(sign):]}')] = item
+        else:
+            flat[_resolve(name)] = value
+    if 'connection.type' in flat: flat['connection.type'] = NM_SETTING_NAMES.get(flat['connection.type'], flat['connection.type'])
+    return flat
+
+
+def _items(value) -> [str]:
+    """ The comparable items of a desired or current value """
+    from .connection import _ConnModifyCommand
+    if not isinstance(value, (list, str)): value = _ConnModifyCommand.Value(value)
+    items = value if isinstance(value, list) else [] if value in _empty else value.split(',')
+    words = []
+    for item in items:
+        item = item.strip()
+        if not item: continue
+        if _mac.match(item): item = item.upper()
+        words.append(_booleans.get(item.lower(), item))
+    return words
+
+
+def _same(name: str, desired, current) -> bool:
+    """ Whether setting name to desired would leave current as it is """
+    if current == _hidden: return True
+    if current is None: return False
+    wanted, present = _items(desired), _items(current)
+    if name.startswith('+'): return all(item in present for item in wanted)
+    if name.startswith('-'):
+        # an index removes whatever is there, so it always changes something
+        if any(item.isdigit() for item in wanted): return False
+        return not any(item in present for item in wanted)
+    if wanted == present: return True
+    if len(wanted) == 1 and isinstance(current, str):
+        described = _described.match(current.strip())
+        return described is not None and described.group(1) == wanted[0]
+    return False
+
+
+def _current(record: 'MultilineRecord', name: str) -> str or [str] or None:
+    """ The value record shows for name; None when nmcli did not print it """
+    try:
+        return record[name.lstrip('+-')]
+    except KeyError:
+        return None
+
+
+
+class Change(object):
+    """ One command of a plan: the add, modify or delete of one profile. """
+    __slots__ = ['action', 'id', 'uuid', 'properties']
+    def __init__(self, action: str, id: str = None, uuid: str = None, properties: dict = None):
+        """
+        :param properties: { [+|-]setting.property: value } the command sets
+        """
+        self.action = action
+        self.id = id
+        self.uuid = uuid
+        self.properties = properties or { }
+
+    def argv(self) -> [str]:
+        """ The nmcli arguments the change runs with """
+        from .connection import _ConnModifyCommand
+        if self.action == 'add':
+            properties = { name: value for name, value in self.properties.items() if name != 'connection.id' }
+            return ['connection', 'add', 'save', 'yes', 'con-name', self.id, *_ConnModifyCommand.Properties(properties)]
+        if self.action == 'modify': return ['connection', 'modify', 'uuid', self.uuid, *_ConnModifyCommand.Properties(self.properties)]
+        return ['connection', 'delete', 'uuid', self.uuid]
+
+    def Text(self) -> str:
+        return shlex.join(['nmcli', *self.argv()])
+
+    def Run(self, connections: 'ConnectionManager', timeout: float = None) -> 'Result':
+        """ The change, through connections (an awaitable for an asynchronous manager) """
+        if self.action == 'add':
+            properties = { name: value for name, value in self.properties.items() if name != 'connection.id' }
+            return connections.Add(self.id, properties, save=True)
+        deadline = ROOT._deadline(timeout)
+        if self.action == 'modify': return connections.Modify(self.uuid, self.properties, uuid=True, wait=timeout, timeout=deadline)
+        return connections.Delete(self.uuid, uuid=True, wait=timeout, timeout=deadline)
+
+    def ToDict(self) -> dict:
+        return { 'action': self.action, 'id': self.id, 'uuid': self.uuid, 'properties': dict(self.properties), 'command': self.Text() }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.action} {self.id or self.uuid!r} {sorted(self.properties)}>"
+
+
+
+class ReconcileReport(object):
+    """
+        The plan of a reconcile and, unless it was a dry run, the BulkReport of running it.
+
+            stats['commands_avoided']       of one add/modify per desired profile, plus the deletes, the commands not run
+            stats['properties_skipped']     desired properties that already had their value
+            stats['reads']                  nmcli calls spent reading the current state
+    """
+    def __init__(self, changes: [Change], stats: dict, result: 'BulkReport' = None):
+        self.changes = changes
+        self.stats = stats
+        self.result = result
+
+    @property
+    def dry_run(self) -> bool:
+        return self.result is None
+
+    @property
+    def ok(self) -> bool:
+        return self.result is None or self.result.ok
+
+    @property
+    def failed(self) -> ['Outcome']:
+        return [] if self.result is None else self.result.failed
+
+    def Text(self) -> str:
+        """ The plan, one nmcli command per line """
+        return '\n'.join(change.Text() for change in self.changes)
+
+    def ToDict(self) -> dict:
+        return {
+                'changes': [change.ToDict() for change in self.changes],
+                'stats': dict(self.stats),
+                'result': None if self.result is None else self.result.ToDict(),
+                }
+
+    def __repr__(self) -> str:
+        state = 'dry run' if self.result is None else f'{len(self.result.succeeded)}/{len(self.result.outcomes)} ok'
+        return f"<{self.__class__.__name__} : {len(self.changes)} commands, {self.stats['commands_avoided']} avoided, {state}>"
+
+
+
+class _Desired(object):
+    __slots__ = ['properties', 'id', 'uuid', 'current']
+    def __init__(self, profile: dict):
+        self.properties = _flatten(profile)
+        self.id = self.properties.get('connection.id')
+        self.uuid = self.properties.get('connection.uuid')
+        if self.id is None and self.uuid is None: raise ValueError(f'a desired profile needs connection.id or connection.uuid: {profile!r}')
+        # uuid of the profile it matched
+        self.current = None
+
+    @property
+    def key(self) -> str:
+        return f'uuid {self.uuid}' if self.uuid is not None else f'id {self.id}'
+
+
+
+class Reconciler(object):
+    """
+        Plans, and runs, the commands that take the profiles of connections to desired.
+        plan()/apply() serve a synchronous ConnectionManager, aplan()/aapply() an asynchronous one.
+    """
+    def __init__(self, desired: [dict], connections: 'ConnectionManager', prune: bool or callable = False, secrets: bool = True,
+                 chunk: int = DETAILS_CHUNK):
+        """
+        :param prune: delete the profiles desired does not name; a callable prune(ConnectionProfile) -> bool limits it to some
+        :param secrets: read the profiles with --show-secrets, so passwords and keys are compared
+        :param chunk: profiles per details call
+        """
+        self.desired = [_Desired(profile) for profile in desired]
+        keys = [profile.key for profile in self.desired]
+        duplicates = sorted({ key for key in keys if keys.count(key) > 1 })
+        if duplicates: raise ValueError(f'desired more than once: {duplicates}')
+        self.connections = connections
+        self.prune = prune
+        self.secrets = secrets
+        self.chunk = chunk
+        self.reads = 0
+
+    # -------------------------------------------------------------------------------- reading
+
+    def _fields(self) -> [str]:
+        names = { name.lstrip('+-') for profile in self.desired for name in profile.properties }
+        return ['connection.id', 'connection.uuid', *sorted(names - { 'connection.id', 'connection.uuid' })]
+
+    def _optimistic(self) -> bool:
+        """ Whether the details can be read without listing first: every profile has a uuid, and nothing is pruned """
+        return not self.prune and all(profile.uuid is not None for profile in self.desired)
+
+    def _chunks(self, uuids: [str], names: dict = None) -> [[str]]:
+        from .connection import _ConnShowCommand
+        return _ConnShowCommand.Chunks(uuids, names or { }, self.chunk)
+
+    def _show(self, chunk: [str]):
+        self.reads += 1
+        return self.connections.Show(chunk, uuid=True, fields=self._fields(), show_secrets=self.secrets or None)
+
+    @staticmethod
+    def _by_uuid(results: ['Result']) -> dict:
+        details = { }
+        for result in results:
+            for record in result.data.values():
+                uuid = _current(record, 'connection.uuid')
+                if uuid: details[uuid] = record
+        return details
+
+    def _match(self, listed: ['ConnectionProfile']) -> dict:
+        """ Points every desired profile at the profile it names, if any; { uuid: name } of those matched """
+        by_uuid = { profile.uuid: profile for profile in listed }
+        by_name = { }
+        for profile in listed: by_name.setdefault(profile.name, []).append(profile)
+        matched = { }
+        for profile in self.desired:
+            if profile.uuid is not None:
+                found = by_uuid.get(profile.uuid)
+            else:
+                candidates = by_name.get(profile.id, [])
+                if len(candidates) > 1: raise ValueError(f"{len(candidates)} profiles are named '{profile.id}'; give its connection.uuid")
+                found = candidates[0] if candidates else None
+            profile.current = None if found is None else found.uuid
+            if found is not None: matched[found.uuid] = found.name
+        return matched
+
+    # -------------------------------------------------------------------------------- planning
+
+    def _diff(self, details: dict, listed: ['ConnectionProfile'] = None) -> ([Change], dict):
+        changes = []
+        stats = { 'desired': len(self.desired), 'unchanged': 0, 'added': 0, 'modified': 0, 'deleted': 0,
+                  'properties': 0, 'properties_changed': 0, 'properties_skipped': 0 }
+        for profile in self.desired:
+            stats['properties'] += len(profile.properties)
+            record = details.get(profile.current) if profile.current is not None else None
+            if record is None:
+                if profile.id is None: raise ValueError(f'no profile has connection.uuid {profile.uuid}, and adding one needs connection.id')
+                if 'connection.type' not in profile.properties: raise ValueError(f"adding '{profile.id}' needs connection.type")
+                changes.append(Change('add', profile.id, profile.uuid, dict(profile.properties)))
+                stats['added'] += 1
+                stats['properties_changed'] += len(profile.properties)
+                continue
+
+            changed = { name: value for name, value in profile.properties.items()
+                        if name != 'connection.uuid' and not _same(name, value, _current(record, name)) }
+            stats['properties_changed'] += len(changed)
+            stats['properties_skipped'] += len(profile.properties) - len(changed)
+            if changed:
+                changes.append(Change('modify', _current(record, 'connection.id') or profile.id, profile.current, changed))
+                stats['modified'] += 1
+            else:
+                stats['unchanged'] += 1
+
+        if self.prune and listed is not None:
+            keep = { profile.current for profile in self.desired }
+            for profile in listed:
+                if profile.uuid in keep or (callable(self.prune) and not self.prune(profile)): continue
+                changes.append(Change('delete', profile.name, profile.uuid))
+                stats['deleted'] += 1
+
+        stats['reads'] = self.reads
+        stats['commands'] = len(changes)
+        stats['commands_avoided'] = stats['desired'] + stats['deleted'] - len(changes)
+        return changes, stats
+
+    def plan(self) -> ([Change], dict):
+        """ The changes to make, and the stats of the plan """
+        if self._optimistic():
+            for profile in self.desired: profile.current = profile.uuid
+            try:
+                details = self._by_uuid([self._show(chunk) for chunk in self._chunks([profile.uuid for profile in self.desired])])
+            except NetWorkManagerException:
+                # one of them does not exist (yet); list, and read those that do
+                details = None
+            if details is not None and all(profile.uuid in details for profile in self.desired): return self._diff(details)
+
+        self.reads += 1
+        listed = self.connections.Show().data
+        matched = self._match(listed)
+        details = self._by_uuid([self._show(chunk) for chunk in self._chunks(list(matched), matched)])
+        return self._diff(details, listed)
+
+    async def aplan(self) -> ([Change], dict):
+        """ plan() for an asynchronous ConnectionManager; the details chunks are read concurrently """
+        import asyncio
+        if self._optimistic():
+            for profile in self.desired: profile.current = profile.uuid
+            try:
+                details = self._by_uuid(await asyncio.gather(*(self._show(chunk) for chunk in self._chunks([profile.uuid for profile in self.desired]))))
+            except NetWorkManagerException:
+                details = None
+            if details is not None and all(profile.uuid in details for profile in self.desired): return self._diff(details)
+
+        self.reads += 1
+        listed = (await self.connections.Show()).data
+        matched = self._match(listed)
+        details = self._by_uuid(await asyncio.gather(*(self._show(chunk) for chunk in self._chunks(list(matched), matched))))
+        return self._diff(details, listed)
+
+    # -------------------------------------------------------------------------------- applying
+
+    @staticmethod
+    def _batches(changes: [Change]) -> ([Change], [Change]):
+        """ deletes go first, so a pruned profile's name is free for the add that replaces it """
+        return [change for change in changes if change.action == 'delete'], [change for change in changes if change.action != 'delete']
+
+    def apply(self, dry_run: bool = False, max_workers: int = None, timeout: float = None) -> ReconcileReport:
+        """
+        :param dry_run: only plan; the report's changes are what would run
+        :param max_workers: commands running at once
+        :param timeout: seconds each modify or delete may take (nmcli --wait)
+        """
+        from .bulk import BulkReport, run_many
+        from .concurrency import DEFAULT_MAX_WORKERS
+        changes, stats = self.plan()
+        if dry_run: return ReconcileReport(changes, stats)
+
+        started = time.monotonic()
+        outcomes = []
+        for batch in self._batches(changes):
+            outcomes += run_many('reconcile', lambda change: change.Run(self.connections, timeout), batch, max_workers or DEFAULT_MAX_WORKERS).outcomes
+        return ReconcileReport(changes, stats, BulkReport('reconcile', outcomes, time.monotonic() - started))
+
+    async def aapply(self, dry_run: bool = False, max_workers: int = None, timeout: float = None) -> ReconcileReport:
+        """ apply() for an asynchronous ConnectionManager """
+        from .bulk import BulkReport, async_run_many
+        from .concurrency import DEFAULT_MAX_WORKERS
+        changes, stats = await self.aplan()
+        if dry_run: return ReconcileReport(changes, stats)
+
+        started = time.monotonic()
+        outcomes = []
+        for batch in self._batches(changes):
+            report = await async_run_many('reconcile', lambda change: change.Run(self.connections, timeout), batch, max_workers or DEFAULT_MAX_WORKERS)
+            outcomes += report.outcomes
+        return ReconcileReport(changes, stats, BulkReport('reconcile', outcomes, time.monotonic() - started))
@@ -0,0 +1,180 @@
+"""
+    Compact record types for the tabular results: devices, connection profiles, active connections and access points.
+
+        result = nmcli.devices.status()
+        result.data['eth0'].state           # 'connected'
+        result.data['eth0']['STATE']        # the same, by nmcli column
+        result.data['eth0'].ToDict()        # { 'DEVICE': 'eth0', 'TYPE': 'ethernet', 'STATE': 'connected', ... }
+        access_point.Number('FREQ')         # 2412, of '2412 MHz'
+
+    Records keep their values in __slots__ instead of a per row dict, as the strings nmcli printed, so ToDict() is the
+    row the terse parser returns. Enum-like and numeric columns (TYPE, STATE, MODE, FREQ, ...) are interned, so
+    thousands of rows share one string object per distinct value.
+"""
+import sys
+
+from .standard_parsers import terse_parser
+
+
+___all__ = ['Record', 'Device', 'ConnectionProfile', 'ActiveConnection', 'AccessPoint']
+
+
+
+
+def attribute(column: str) -> str:
+    """ 'TIMESTAMP-REAL' -> 'timestamp_real' """
+    return column.lower().replace('-', '_')
+
+
+def number(value: str) -> int or None:
+    """ Leading integer of a value; '2412 MHz' -> 2412, '54 Mbit/s' -> 54, '-10' -> -10, '--' -> None """
+    value = value.split(' ', 1)[0]
+    return int(value) if value.lstrip('-').isdigit() else None
+
+
+
+class Record(object):
+    """
+        A row of `nmcli --terse` tabular output.
+
+        columns are the nmcli columns the record can hold, in the order nmcli prints them; each is stored in the slot
+        named attribute(column). Columns that were not requested are None.
+    """
+    __slots__ = ()
+    columns = ()
+    # enum-like columns, stored as interned strings
+    interned = ()
+    # columns holding a number, read as int with Number(); interned as well
+    numbers = ()
+
+    _plans = { }
+    _builders = { }
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def _plan(cls, fields: tuple) -> [(str, callable)]:
+        """ (slot, converter) for each requested field, None for fields this record does not hold. """
+        plan = cls._plans.get((cls, fields))
+        if plan is None:
+            plan = []
+            for field in fields:
+                if field not in cls.columns: plan.append(None)
+                elif field in cls.interned or field in cls.numbers: plan.append((attribute(field), sys.intern))
+                else: plan.append((attribute(field), None))
+            plan = cls._plans[(cls, fields)] = plan
+        return plan
+
+    @classmethod
+    def _builder(cls, fields: tuple) -> callable:
+        """ build(values) -> record for rows of fields (the plan resolved once per field list) """
+        build = cls._builders.get((cls, fields))
+        if build is None:
+            plan = cls._plan(fields)
+            copied = [(index, step[0]) for index, step in enumerate(plan) if step is not None and step[1] is None]
+            converted = [(index, step[0], step[1]) for index, step in enumerate(plan) if step is not None and step[1] is not None]
+            assigned = { step[0] for step in plan if step is not None }
+            unset = [name for name in cls.__slots__ if name not in assigned]
+            new = cls.__new__
+
+            def build(values: [str]) -> 'Record':
+                record = new(cls)
+                for index, name in copied:
+                    setattr(record, name, values[index])
+                for index, name, convert in converted:
+                    setattr(record, name, convert(values[index]))
+                for name in unset:
+                    setattr(record, name, None)
+                return record
+            build = cls._builders[(cls, fields)] = build
+        return build
+
+    @classmethod
+    def FromValues(cls, fields: tuple, values: [str]) -> 'Record':
+        """ One record; values may be shorter than fields, the rest stay None """
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, None)
+        for step, value in zip(cls._plan(fields), values):
+            if step is None: continue
+            name, convert = step
+            setattr(record, name, value if convert is None else convert(value))
+        return record
+
+    @classmethod
+    def Parse(cls, stdout: str, fields: list or tuple) -> ['Record']:
+        """ One record per row of `nmcli --terse --fields <fields>` output. """
+        fields = tuple(fields)
+        return list(map(cls._builder(fields), terse_parser(fields).rows(stdout)))
+
+    def Number(self, column: str) -> int or None:
+        """ The leading integer of a column, '2412 MHz' -> 2412; None when it has none ('--') or was not requested """
+        value = self[column]
+        return None if value is None else number(value)
+
+    def ToDict(self) -> dict:
+        """ The dict the terse parser returns for the row, keyed by nmcli column; unrequested columns are left out. """
+        d = { }
+        for column in self.columns:
+            value = getattr(self, attribute(column))
+            if value is not None: d[column] = value
+        return d
+    to_dict = ToDict
+
+    def __getitem__(self, column: str):
+        if column not in self.columns: raise KeyError(column)
+        return getattr(self, attribute(column))
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.columns and getattr(self, attribute(column)) is not None
+
+    def get(self, column: str, default=None):
+        value = getattr(self, attribute(column), None) if column in self.columns else None
+        return default if value is None else value
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {self.ToDict()}>"
+
+
+
+class Device(Record):
+    """ nmcli device status """
+    __slots__ = ['device', 'type', 'state', 'ip4_connectivity', 'ip6_connectivity', 'dbus_path', 'connection', 'con_uuid', 'con_path']
+    columns = ('DEVICE', 'TYPE', 'STATE', 'IP4-CONNECTIVITY', 'IP6-CONNECTIVITY', 'DBUS-PATH', 'CONNECTION', 'CON-UUID', 'CON-PATH')
+    interned = ('TYPE', 'STATE', 'IP4-CONNECTIVITY', 'IP6-CONNECTIVITY')
+
+
+
+class ConnectionProfile(Record):
+    """ nmcli connection show """
+    __slots__ = ['name', 'uuid', 'type', 'timestamp', 'timestamp_real', 'autoconnect', 'autoconnect_priority', 'readonly',
+                 'dbus_path', 'active', 'device', 'state', 'active_path', 'slave', 'filename']
+    columns = ('NAME', 'UUID', 'TYPE', 'TIMESTAMP', 'TIMESTAMP-REAL', 'AUTOCONNECT', 'AUTOCONNECT-PRIORITY', 'READONLY',
+               'DBUS-PATH', 'ACTIVE', 'DEVICE', 'STATE', 'ACTIVE-PATH', 'SLAVE', 'FILENAME')
+    interned = ('TYPE', 'AUTOCONNECT', 'READONLY', 'ACTIVE', 'STATE', 'SLAVE')
+    numbers = ('TIMESTAMP', 'AUTOCONNECT-PRIORITY')
+
+
+
+class ActiveConnection(Record):
+    """ nmcli connection show --active """
+    __slots__ = ['name', 'uuid', 'type', 'device', 'state', 'default', 'default6', 'spec_object', 'vpn', 'dbus_path', 'con_path', 'zone', 'master_path']
+    columns = ('NAME', 'UUID', 'TYPE', 'DEVICE', 'STATE', 'DEFAULT', 'DEFAULT6', 'SPEC-OBJECT', 'VPN', 'DBUS-PATH', 'CON-PATH', 'ZONE', 'MASTER-PATH')
+    interned = ('TYPE', 'STATE', 'DEFAULT', 'DEFAULT6', 'VPN')
+
+
+
+class AccessPoint(Record):
+    """ nmcli device wifi list """
+    __slots__ = ['name', 'ssid', 'ssid_hex', 'bssid', 'mode', 'chan', 'freq', 'rate', 'signal', 'bars', 'security',
+                 'wpa_flags', 'rsn_flags', 'device', 'active', 'in_use', 'dbus_path']
+    columns = ('NAME', 'SSID', 'SSID-HEX', 'BSSID', 'MODE', 'CHAN', 'FREQ', 'RATE', 'SIGNAL', 'BARS', 'SECURITY',
+               'WPA-FLAGS', 'RSN-FLAGS', 'DEVICE', 'ACTIVE', 'IN-USE', 'DBUS-PATH')
+    # SSIDs repeat across BSSIDs and scans, so they are shared as well
+    interned = ('NAME', 'SSID', 'MODE', 'BARS', 'SECURITY', 'WPA-FLAGS', 'RSN-FLAGS', 'DEVICE', 'ACTIVE', 'IN-USE')
+    numbers = ('CHAN', 'FREQ', 'RATE', 'SIGNAL')
@@ -0,0 +1,178 @@
+"""
+    One scheduler in front of `nmcli device wifi rescan`, shared by everything on the box that wants fresh scans.
+
+        scheduler = RescanScheduler(min_interval=10, max_concurrent=1)
+        a = scheduler.request('wlan0')
+        b = scheduler.request('wlan0', ssid='hidden-net')       # merged with a: one scan, probing for hidden-net too
+        c = scheduler.request('wlan1')                          # waits for wlan0 to finish, max_concurrent=1
+        a.result() is b.result()                                # the Result of the merged scan
+
+        await scheduler.arequest('wlan0')                       # the same, as an awaitable
+
+    Requests for an interface that has not started scanning yet join its pending scan, with their SSIDs added to it.
+    An interface is not rescanned sooner than min_interval seconds after its previous scan started, and at most
+    max_concurrent radios scan at any time, so a multi radio box is never entirely off channel.
+"""
+import threading
+import time
+from functools import partial
+
+
+___all__ = ['RescanScheduler']
+
+
+
+
+class _Scan(object):
+    """
+        A pending or running scan of one interface. Each merged request gets its own future, chained from the scan's,
+        so cancelling one only detaches that caller.
+    """
+    __slots__ = ['if_name', 'ssids', 'future', 'callers']
+    def __init__(self, if_name: str):
+        from concurrent.futures import Future
+        self.if_name = if_name
+        # SSIDs to probe for, besides the regular scan, in request order
+        self.ssids = { }
+        self.future = Future()
+        self.callers = []
+
+    def join(self) -> 'Future':
+        from concurrent.futures import Future
+        caller = Future()
+        self.callers.append(caller)
+        self.future.add_done_callback(partial(self._settle, caller))
+        return caller
+
+    @property
+    def abandoned(self) -> bool:
+        """ Every caller cancelled its future: nobody wants the scan anymore """
+        return all(caller.cancelled() for caller in self.callers)
+
+    @staticmethod
+    def _settle(caller: 'Future', future: 'Future'):
+        from concurrent.futures import InvalidStateError
+        try:
+            if future.cancelled(): caller.cancel()
+            elif future.exception() is not None: caller.set_exception(future.exception())
+            else: caller.set_result(future.result())
+        except InvalidStateError:
+            # the caller cancelled its own future meanwhile
+            pass
+
+
+
+class RescanScheduler(object):
+    """
+        Merges rescan requests per interface and runs them on a scheduler thread, started by the first request.
+    """
+    def __init__(self, min_interval: float = 10.0, max_concurrent: int = None, rescan: callable = None):
+        """
+        :param min_interval: seconds between the starts of two scans of the same interface
+        :param max_concurrent: radios allowed to scan at once; 1 staggers them, None does not limit
+        :param rescan: rescan(if_name, ssid=[...]) -> Result; defaults to nmcli.devices.wifi.rescan
+        """
+        if max_concurrent is not None and max_concurrent < 1: raise ValueError(f'max_concurrent must be at least 1, got {max_concurrent}')
+        self.min_interval = min_interval
+        self.max_concurrent = max_concurrent
+        self._rescan = rescan
+
+        self._pending = { }
+        self._running = { }
+        # time.monotonic() at which each interface last started scanning
+        self._started = { }
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.scans = 0
+        self.requests = 0
+
+    @property
+    def rescan(self) -> callable:
+        if self._rescan is None:
+            from . import nmcli
+            self._rescan = nmcli.devices.wifi.rescan
+        return self._rescan
+
+    def request(self, if_name: str, ssid: str or [str] = None) -> 'Future':
+        """
+            Asks for a scan of if_name, probing for ssid (one or several) as well.
+
+        :return: a concurrent.futures.Future of the merged scan's Result, this caller's own: cancelling it leaves the
+                 scan to the other callers, and drops it only when none are left before it starts
+        """
+        with self._condition:
+            if self._stopping: raise RuntimeError('RescanScheduler is closed')
+            scan = self._pending.get(if_name)
+            if scan is None: scan = self._pending[if_name] = _Scan(if_name)
+            for name in ([ssid] if isinstance(ssid, str) else ssid or []): scan.ssids[name] = None
+            self.requests += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='nmcli-rescan', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return scan.join()
+
+    async def arequest(self, if_name: str, ssid: str or [str] = None) -> 'Result':
+        """ request() as an awaitable """
+        import asyncio
+        return await asyncio.wrap_future(self.request(if_name, ssid))
+
+    def _run(self):
+        with self._condition:
+            while not self._stopping:
+                self._condition.wait(self._start_ready())
+
+    def _start_ready(self) -> float or None:
+        """ Starts every pending scan allowed to run now; returns the seconds until the next one is, None if none is waiting. """
+        now = time.monotonic()
+        wait = None
+        for if_name in list(self._pending):
+            if if_name in self._running: continue
+            if self.max_concurrent is not None and len(self._running) >= self.max_concurrent: break
+
+            ready = self._started.get(if_name, now - self.min_interval) + self.min_interval
+            if ready > now:
+                wait = ready - now if wait is None else min(wait, ready - now)
+                continue
+
+            scan = self._pending.pop(if_name)
+            if scan.abandoned: continue
+            scan.future.set_running_or_notify_cancel()
+            self._running[if_name] = scan
+            self._started[if_name] = now
+            self.scans += 1
+            threading.Thread(target=self._scan, args=(scan,), name=f'nmcli-rescan-{if_name}', daemon=True).start()
+        return wait
+
+    def _scan(self, scan: _Scan):
+        try:
+            result = self.rescan(scan.if_name, ssid=list(scan.ssids) or None)
+        except BaseException as e:
+            scan.future.set_exception(e)
+        else:
+            scan.future.set_result(result)
+        finally:
+            with self._condition:
+                self._running.pop(scan.if_name, None)
+                self._condition.notify()
+
+    def close(self):
+        """ Stops the scheduler; scans that have not started are cancelled, running ones are left to finish. """
+        with self._condition:
+            self._stopping = True
+            pending, self._pending = self._pending, { }
+            self._condition.notify()
+        for scan in pending.values(): scan.future.cancel()
+        if self._thread is not None and self._thread is not threading.current_thread(): self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return { 'requests': self.requests, 'scans': self.scans, 'pending': len(self._pending), 'running': len(self._running) }
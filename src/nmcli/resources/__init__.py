@@ -0,0 +1,34 @@
+"""
+    Reference text from the nmcli(1) man page, loaded from the .txt files next to this module on first use
+    instead of living in docstrings that every import has to load.
+"""
+import os
+import threading
+
+
+___all__ = ['read', 'topics']
+
+
+
+_directory = os.path.dirname(os.path.abspath(__file__))
+
+# help topic: file
+topics = {
+        'nmcli':   'nmcli.txt',
+        'aliases': 'aliases.txt',
+        }
+
+_texts = { }
+_lock = threading.Lock()
+
+
+def read(topic: str) -> str:
+    """ The text of a topic, read once and kept. """
+    text = _texts.get(topic)
+    if text is None:
+        if topic not in topics: raise KeyError(f"unknown help topic '{topic}', expected one of {', '.join(topics)}")
+        with open(os.path.join(_directory, topics[topic]), encoding='utf-8') as file:
+            text = file.read()
+        with _lock:
+            text = _texts.setdefault(topic, text)
+    return text
@@ -1,21 +1,74 @@
+import os
+import reprlib
+import threading
 
 from .constants import NMCLI_FIELDS
 
 
 
+# truncates data in Result reprs, so logging a big `device show` Result does not render all of it
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxdict = 6
+_repr.maxlist = 6
+_repr.maxstring = 80
+_repr.maxother = 160
+
+
+
 class Result(object):
-    data: dict
-    __slots__ = ['return_code', 'stdout', 'stderr', 'data', ]
-    def __init__(self, data: list or dict, ret_code: int, stdout: str, stderr: str):
+    """
+        The outcome of one nmcli invocation.
+
+        Commands hand the raw output over with a parse callable; data is parsed on first access, once, under a lock of
+        the Result's own, and stdout/stderr are released then unless Result.debug is set (or NMCLI_DEBUG is in the
+        environment). A Result held in a cache therefore keeps only the parsed data once it has been read.
+    """
+    # keep stdout and stderr after parsing; errors carry stdout as well (see ROOT._handle_output)
+    debug: bool = bool(os.environ.get('NMCLI_DEBUG'))
+    __slots__ = ['return_code', 'stdout', 'stderr', '_data', '_parse', '_lock']
+    def __init__(self, data: list or dict, ret_code: int, stdout: str, stderr: str, parse: callable = None):
+        """
+        :param data: the parsed data; ignored when parse is given
+        :param parse: parse(stdout, stderr) -> data, called on first access to data
+        """
         self.return_code = ret_code
         self.stdout = stdout
         self.stderr = stderr
+        self._data = data if parse is None else None
+        self._parse = parse
+        self._lock = None if parse is None else threading.Lock()
 
-        if isinstance(data, list):
-            pass
+    @property
+    def parsed(self) -> bool:
+        return self._parse is None
 
-        elif isinstance(data, dict):
-            pass
+    @property
+    def data(self) -> list or dict:
+        lock = self._lock
+        if lock is not None:
+            with lock:
+                if self._parse is not None:
+                    self._data = self._parse(self.stdout, self.stderr)
+                    self._parse = None
+                    self._lock = None
+                    if not self.debug: self.stdout = self.stderr = None
+        return self._data
+
+    @data.setter
+    def data(self, data: list or dict):
+        self._data = data
+        self._parse = None
+        self._lock = None
+
+    def Copy(self) -> 'Result':
+        """
+            A Result of its own for another caller: an unparsed one parses the same output again, a parsed one gets a
+            deep copy of data, so no caller sees another one's changes.
+        """
+        if self._parse is not None: return Result(None, self.return_code, self.stdout, self.stderr, parse=self._parse)
+        from copy import deepcopy
+        return Result(deepcopy(self._data), self.return_code, self.stdout, self.stderr)
 
     def ToDict(self):
         return {
@@ -26,19 +79,17 @@ class Result(object):
                 }
 
     def __repr__(self) -> str:
-        return f"<{self.__class__.__name__} : {self.ToDict()}>"
-    def __str__(self) -> str:
-        return f"<{self.__class__.__name__} : {self.ToDict()}>"
-
-    def __contains__(self, *args):
-        print(args)
-        if len(args) == 1:
-            return args[0] in self.data
-
-    def __getitem__(self, *args):
-        print(args)
-        if len(args) == 1:
-            if args[0] in self.data:
-                return self.data[args[0]]
+        data = _repr.repr(self._data) if self.parsed else 'not parsed'
+        output = f", stdout={_repr.repr(self.stdout)}" if self.stdout is not None else ''
+        return f"<{self.__class__.__name__} : return_code={self.return_code}, data={data}{output}>"
+    __str__ = __repr__
 
+    def __contains__(self, key) -> bool:
+        return key in self.data
 
+    def __getitem__(self, key):
+        """ data[key]; None when it is missing """
+        try:
+            return self.data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
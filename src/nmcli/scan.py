@@ -0,0 +1,423 @@
+"""
+    Column oriented storage for Wi-Fi scan results (`nmcli device wifi list`).
+
+        table = nmcli.devices.wifi.list().data
+        strong = table.filter(min_signal=60, band='5')
+        best = table.top(10)                        # strongest ten, by SIGNAL
+        table.column('SIGNAL')                      # array('B', [72, 45, ...])
+        table.numpy('FREQ')                         # zero copy numpy view, when numpy is installed
+        table[0]                                    # AccessPoint, built on demand
+
+    SIGNAL, FREQ, RATE and CHAN are array.array columns, so a row costs a few bytes instead of a few int objects.
+    Low cardinality text columns (SSID, SECURITY, MODE, DEVICE, ...) are dictionary encoded: each distinct value is
+    stored once, interned, and rows hold a 2 byte code. filter, sort and top work on the columns and return a new
+    table; no per row object is created unless a row is read.
+
+    ScanCache keeps the last table of each interface and when its radio last scanned. A list of fresh data is run with
+    `--rescan no`, so only stale data costs a scan, and every update returns a ScanDiff of the BSSIDs added, removed
+    and changed since the previous one:
+
+        scans = ScanCache(max_age=30)
+        diff = scans.update('wlan0')                # rescans: nothing is known about wlan0 yet
+        diff = scans.update('wlan0')                # --rescan no; diff.added, diff.removed, diff.changed
+        scans.age('wlan0')                          # seconds since wlan0 last scanned
+"""
+import heapq
+import sys
+import threading
+import time
+from array import array
+
+from .records import AccessPoint, attribute, number
+from .standard_parsers import terse_parser
+
+
+___all__ = ['ScanTable', 'ScanDiff', 'ScanCache', 'bands']
+
+
+
+
+# MHz ranges of the Wi-Fi bands, for ScanTable.filter(band=...)
+bands = {
+        '2.4': (2400, 2500),
+        '5':   (5150, 5925),
+        '6':   (5925, 7125),
+        }
+
+
+
+class _Categories(object):
+    """ A dictionary encoded text column: codes index into values. Codes are 16 bit until a 65537th value needs more. """
+    __slots__ = ['codes', 'values', 'index']
+    def __init__(self, codes: array = None, values: list = None, index: dict = None):
+        self.codes = array('H') if codes is None else codes
+        self.values = [] if values is None else values
+        self.index = { } if index is None else index
+
+    def append(self, value: str):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(sys.intern(value))
+            if code > 0xffff and self.codes.typecode == 'H': self.codes = array('I', self.codes)
+        self.codes.append(code)
+
+    def matching(self, test: callable) -> set:
+        """ The codes whose value passes test; test runs once per distinct value. """
+        return { code for code, value in enumerate(self.values) if test(value) }
+
+    def take(self, indices: [int]) -> '_Categories':
+        codes = self.codes
+        return _Categories(array(codes.typecode, [codes[i] for i in indices]), self.values, self.index)
+
+    def __getitem__(self, i: int) -> str:
+        return self.values[self.codes[i]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+
+
+class ScanTable(object):
+    """
+        Access points held column by column. Iterating, indexing and ToDict behave like the list of AccessPoint
+        records (or of dicts) the table replaces.
+
+        Numeric columns that nmcli left empty ('--') hold 0. Rows (AccessPoint records) carry them as nmcli prints them
+        again, '2412 MHz', '54 Mbit/s', so a row's ToDict() is the dict of the terse parser, except '--' reads as '0'.
+    """
+    # typecodes of the numeric columns; values are clamped into the type's range
+    numeric = { 'SIGNAL': 'B', 'FREQ': 'H', 'RATE': 'I', 'CHAN': 'H' }
+    _limits = { 'B': 0xff, 'H': 0xffff, 'I': 0xffffffff }
+    # what nmcli prints after the number
+    _units = { 'FREQ': ' MHz', 'RATE': ' Mbit/s' }
+    # dictionary encoded text columns; the rest (BSSID, DBUS-PATH, SSID-HEX) are plain lists
+    categorical = AccessPoint.interned
+
+    def __init__(self, fields: list or tuple, columns: dict = None):
+        """
+        :param fields: nmcli columns held by the table, in nmcli's order; columns AccessPoint does not know are dropped
+        """
+        self.fields = tuple(field for field in fields if field in AccessPoint.columns)
+        if columns is None:
+            columns = { }
+            for field in self.fields:
+                if field in self.numeric: columns[field] = array(self.numeric[field])
+                elif field in self.categorical: columns[field] = _Categories()
+                else: columns[field] = []
+        self._columns = columns
+
+    @classmethod
+    def Parse(cls, stdout: str, fields: list or tuple) -> 'ScanTable':
+        """ Builds the table from `nmcli --terse --fields <fields> device wifi list` output in one pass. """
+        table = cls(fields)
+        appenders = []
+        for field in fields:
+            column = table._columns.get(field)
+            if column is None: appenders.append(None)
+            elif field in cls.numeric: appenders.append(cls._numeric_appender(column))
+            else: appenders.append(column.append)
+
+        for values in terse_parser(fields).rows(stdout):
+            for append, value in zip(appenders, values):
+                if append is not None: append(value)
+        return table
+
+    @classmethod
+    def _numeric_appender(cls, column: array) -> callable:
+        append = column.append
+        limit = cls._limits[column.typecode]
+        def append_number(value: str):
+            value = number(value)
+            append(0 if value is None or value < 0 else min(value, limit))
+        return append_number
+
+    # -------------------------------------------------------------------------------- columns
+
+    def column(self, field: str) -> array or list or _Categories:
+        """ The stored column: an array for numeric fields, a sequence of (interned) str for the others. """
+        return self._columns[field]
+
+    def distinct(self, field: str) -> [str]:
+        """ The distinct values of a text column, e.g. every SSID seen. """
+        column = self._columns[field]
+        if isinstance(column, _Categories):
+            present = set(column.codes)
+            return [value for code, value in enumerate(column.values) if code in present]
+        return list(dict.fromkeys(column))
+
+    def numpy(self, field: str):
+        """
+            A numpy view over a numeric column (over the codes, for a dictionary encoded one). The view shares memory
+            with the table, so it is only valid as long as the table is alive and not modified.
+
+            Requires numpy, which is optional; ImportError is raised without it.
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('ScanTable.numpy() requires numpy (pip install numpy)') from None
+
+        column = self._columns[field]
+        if isinstance(column, _Categories): column = column.codes
+        if not isinstance(column, array): raise TypeError(f'{field} is not a numeric column')
+        return numpy.frombuffer(column, dtype=column.typecode) if len(column) else numpy.zeros(0, dtype=column.typecode)
+
+    # -------------------------------------------------------------------------------- selection
+
+    def where(self, field: str, test: callable, indices: [int] = None) -> [int]:
+        """ Row indices whose field passes test. Text columns run test once per distinct value, not once per row. """
+        column = self._columns[field]
+        if isinstance(column, _Categories):
+            codes = column.codes
+            matching = column.matching(test)
+            if indices is None: return [i for i, code in enumerate(codes) if code in matching]
+            return [i for i in indices if codes[i] in matching]
+        if indices is None: return [i for i, value in enumerate(column) if test(value)]
+        return [i for i in indices if test(column[i])]
+
+    def take(self, indices: [int]) -> 'ScanTable':
+        """ A new table holding the given rows, in the given order. """
+        columns = { }
+        for field, column in self._columns.items():
+            if isinstance(column, _Categories): columns[field] = column.take(indices)
+            elif isinstance(column, array): columns[field] = array(column.typecode, [column[i] for i in indices])
+            else: columns[field] = [column[i] for i in indices]
+        return ScanTable(self.fields, columns)
+
+    def filter(self, ssid: str = None, security: str = None, device: str = None, band: str = None,
+               min_signal: int = None, max_signal: int = None, min_freq: int = None, max_freq: int = None) -> 'ScanTable':
+        """
+            Rows matching every given condition.
+
+        :param ssid: exact SSID
+        :param security: a SECURITY token the row must contain, e.g. 'WPA2'; '' selects open networks
+        :param device: the interface that saw the access point
+        :param band: '2.4', '5' or '6' (see bands)
+        """
+        indices = None
+        if ssid is not None: indices = self.where('SSID', ssid.__eq__, indices)
+        if device is not None: indices = self.where('DEVICE', device.__eq__, indices)
+        if security is not None:
+            indices = self.where('SECURITY', (lambda value: security in value.split()) if security else (lambda value: value in ('', '--')), indices)
+        if band is not None:
+            low, high = bands[band]
+            indices = self.where('FREQ', lambda freq: low <= freq < high, indices)
+        if min_freq is not None or max_freq is not None:
+            low, high = min_freq or 0, max_freq or self._limits['H']
+            indices = self.where('FREQ', lambda freq: low <= freq <= high, indices)
+        if min_signal is not None or max_signal is not None:
+            low, high = min_signal or 0, 100 if max_signal is None else max_signal
+            indices = self.where('SIGNAL', lambda signal: low <= signal <= high, indices)
+        return self if indices is None else self.take(indices)
+
+    def _key(self, field: str) -> callable:
+        column = self._columns[field]
+        if isinstance(column, _Categories):
+            codes, values = column.codes, column.values
+            return lambda i: values[codes[i]]
+        return column.__getitem__
+
+    def sort(self, field: str = 'SIGNAL', reverse: bool = True) -> 'ScanTable':
+        """ Rows ordered by field, strongest signal first by default. """
+        return self.take(sorted(range(len(self)), key=self._key(field), reverse=reverse))
+
+    def top(self, k: int, field: str = 'SIGNAL') -> 'ScanTable':
+        """ The k rows with the largest field, largest first. """
+        return self.take(heapq.nlargest(k, range(len(self)), key=self._key(field)))
+
+    # -------------------------------------------------------------------------------- diff
+
+    def keys(self) -> list:
+        """ The identity of each row: its BSSID, or (DEVICE, BSSID) when the table holds several devices' scans. """
+        bssids = self._columns['BSSID']
+        if 'DEVICE' not in self._columns: return list(bssids)
+        return list(zip(self._columns['DEVICE'], bssids))
+
+    def diff(self, previous: 'ScanTable' or None, signal_delta: int = 0) -> 'ScanDiff':
+        """
+            What changed from previous to this table, by BSSID.
+
+        :param signal_delta: SIGNAL moves up to this many points are not a change, so the usual jitter is not reported
+        """
+        if previous is None: previous = ScanTable(self.fields)
+        before = { key: i for i, key in enumerate(previous.keys()) }
+        after = { key: i for i, key in enumerate(self.keys()) }
+
+        compared = [field for field in self.fields if field in previous._columns]
+        added, changed = [], []
+        for key, i in after.items():
+            j = before.get(key)
+            if j is None: added.append(i)
+            elif any(previous._changed(self, field, j, i, signal_delta) for field in compared): changed.append(i)
+        removed = [j for key, j in before.items() if key not in after]
+        return ScanDiff(self.take(added), previous.take(removed), self.take(changed))
+
+    def _changed(self, other: 'ScanTable', field: str, i: int, j: int, signal_delta: int) -> bool:
+        old, new = self._columns[field][i], other._columns[field][j]
+        if field == 'SIGNAL': return abs(old - new) > signal_delta
+        return old != new
+
+    # -------------------------------------------------------------------------------- rows
+
+    def row(self, i: int) -> AccessPoint:
+        record = AccessPoint.__new__(AccessPoint)
+        for name in AccessPoint.__slots__:
+            setattr(record, name, None)
+        for field, column in self._columns.items():
+            value = column[i]
+            if field in self.numeric: value = sys.intern(f'{value}{self._units.get(field, "")}')
+            setattr(record, attribute(field), value)
+        return record
+
+    def __getitem__(self, i: int or slice) -> AccessPoint or 'ScanTable':
+        if isinstance(i, slice): return self.take(range(len(self))[i])
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError('ScanTable index out of range')
+        return self.row(i)
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def ToDict(self) -> dict:
+        """ { column: [values] } """
+        return { field: list(column) for field, column in self._columns.items() }
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ScanTable) and self.ToDict() == other.ToDict()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {len(self)} access points, {', '.join(self.fields)}>"
+
+
+
+class ScanDiff(object):
+    """
+        The access points added, removed and changed between two scans, as ScanTables; removed rows are as last seen,
+        changed rows as they are now.
+    """
+    __slots__ = ['added', 'removed', 'changed']
+    def __init__(self, added: ScanTable, removed: ScanTable, changed: ScanTable):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def ToDict(self) -> dict:
+        return { 'added': self.added.ToDict(), 'removed': self.removed.ToDict(), 'changed': self.changed.ToDict() }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : +{len(self.added)} -{len(self.removed)} ~{len(self.changed)}>"
+
+
+
+class _Scan(object):
+    __slots__ = ['table', 'scanned', 'listed', 'lock']
+    def __init__(self):
+        self.table = None
+        # time.monotonic() of the last rescan we asked for, and of the last list
+        self.scanned = None
+        self.listed = None
+        self.lock = threading.Lock()
+
+
+
+class ScanCache(object):
+    """
+        The latest scan of each interface, with its age. if_name None stands for every interface at once.
+
+        update() lists with `--rescan no` while the interface scanned less than max_age seconds ago, and with
+        `--rescan yes` otherwise; a rescan keeps the radio off channel for seconds, so it is only paid for stale data.
+    """
+    def __init__(self, max_age: float = 30.0, fields: [str] = None, signal_delta: int = 0, wifi_list=None, clock: callable = time.monotonic):
+        """
+        :param max_age: seconds a scan stays fresh
+        :param fields: columns to list; BSSID (and DEVICE) are added, they identify the rows
+        :param signal_delta: SIGNAL moves up to this many points are not reported as changes
+        :param wifi_list: the list command to run; defaults to nmcli.devices.wifi.list
+        """
+        self.max_age = max_age
+        self.fields = fields
+        self.signal_delta = signal_delta
+        self.clock = clock
+        self._wifi_list = wifi_list
+        self._scans = { }
+        self._lock = threading.Lock()
+
+    @property
+    def wifi_list(self):
+        if self._wifi_list is None:
+            from . import nmcli
+            self._wifi_list = nmcli.devices.wifi.list
+        return self._wifi_list
+
+    def _scan(self, if_name: str or None) -> _Scan:
+        with self._lock:
+            scan = self._scans.get(if_name)
+            if scan is None: scan = self._scans[if_name] = _Scan()
+            return scan
+
+    def age(self, if_name: str = None) -> float or None:
+        """ Seconds since if_name was last rescanned through this cache; None if it never was. """
+        scan = self._scans.get(if_name)
+        if scan is None or scan.scanned is None: return None
+        return self.clock() - scan.scanned
+
+    def fresh(self, if_name: str = None, max_age: float = None) -> bool:
+        age = self.age(if_name)
+        return age is not None and age < (self.max_age if max_age is None else max_age)
+
+    def update(self, if_name: str = None, max_age: float = None, rescan: bool = None) -> ScanDiff:
+        """
+            Lists the access points of if_name and returns what changed since the previous update.
+
+        :param max_age: overrides the cache's max_age for this call
+        :param rescan: True always rescans, False never does; None rescans only stale data
+        """
+        scan = self._scan(if_name)
+        with scan.lock:
+            if rescan is None: rescan = not self.fresh(if_name, max_age)
+            fields = self.fields
+            if fields is not None:
+                fields = [field for field in ('DEVICE', 'BSSID') if field not in fields and (field == 'BSSID' or if_name is None)] + list(fields)
+
+            table = self.wifi_list(if_name, rescan=rescan, fields=fields).data
+            now = self.clock()
+            if rescan: scan.scanned = now
+            scan.listed = now
+
+            diff = table.diff(scan.table, self.signal_delta)
+            scan.table = table
+            return diff
+
+    def get(self, if_name: str = None, max_age: float = None) -> ScanTable:
+        """ The cached table of if_name, updated first if it is stale. """
+        scan = self._scan(if_name)
+        if scan.table is None or not self.fresh(if_name, max_age): self.update(if_name, max_age)
+        return scan.table
+
+    def table(self, if_name: str = None) -> ScanTable or None:
+        """ The last table listed for if_name, as is. """
+        scan = self._scans.get(if_name)
+        return None if scan is None else scan.table
+
+    def clear(self, if_name: str = None):
+        """ Forgets if_name; without one, every interface. """
+        with self._lock:
+            if if_name is None: self._scans.clear()
+            else: self._scans.pop(if_name, None)
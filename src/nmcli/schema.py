@@ -0,0 +1,189 @@
+"""
+    The fields the installed nmcli accepts, discovered once per nmcli version.
+
+        schema = nmcli.load_schema()        # `nmcli --version`, then the cache file or, the first time, one probe per command
+        schema.fields('device status')      # ['DEVICE', 'TYPE', 'STATE', 'IP4-CONNECTIVITY', ...]
+        nmcli.devices.status(fields=['DEVICE', 'STATE', 'NOT-A-FIELD'])     # --fields DEVICE,STATE
+
+    nmcli lists the allowed fields when it is given an invalid one; each command in probes is run once that way, with
+    LC_ALL=C as the message is matched in English. The result is written to $XDG_CACHE_HOME/nmcli/schema-<version>.json,
+    so later starts only run `nmcli --version`; a discovery that found no command at all is not saved.
+    Once a schema is set, every command drops the fields its nmcli does not know before they reach --fields, and the
+    parser is handed the fields that were actually sent.
+"""
+import json
+import os
+import re
+import tempfile
+
+from .cache import command_words
+
+
+___all__ = ['Schema', 'probes']
+
+
+
+
+# command: extra args that keep the probe from doing any work
+probes = {
+        'general status':       [],
+        'general permissions':  [],
+        'general logging':      [],
+        'radio all':            [],
+        'networking connectivity': [],
+        'device status':        [],
+        'device show':          [],
+        'device wifi list':     ['--rescan', 'no'],
+        'connection show':      [],
+        }
+
+# a field nmcli never accepts
+_probe_field = 'nmcli-schema-probe'
+_allowed = re.compile(r'allowed fields:\s*([^\s;]+)')
+# always accepted, whatever the command
+_keywords = ('all', 'common')
+
+
+
+class Schema(object):
+    """
+        { command: [allowed fields] } for one nmcli version. Commands nmcli would not list fields for are left out;
+        their fields are passed through unchecked.
+    """
+    __root__: str = 'nmcli'
+    def __init__(self, version: str, commands: dict):
+        self.version = version
+        self.commands = commands
+        self._allowed = { name: { field.lower() for field in fields } for name, fields in commands.items() }
+        # (command, requested fields) -> fields sent, filled as commands run
+        self._valid = { }
+
+    # -------------------------------------------------------------------------------- discovery
+
+    @classmethod
+    def Version(cls, transport=None) -> str:
+        """ The version `nmcli --version` reports, e.g. '1.36.6' """
+        retcode, stdout, stderr = cls._transport(transport).execute([cls.__root__, '--version'])
+        if retcode != 0: raise RuntimeError(f"nmcli return {retcode} code. STDERR='{stderr}'")
+        return stdout.strip().rsplit(' ', 1)[-1]
+
+    @classmethod
+    def Discover(cls, transport=None, version: str = None) -> 'Schema':
+        """ Runs every probe; costs one nmcli process per command. """
+        transport = cls._transport(transport)
+        if version is None: version = cls.Version(transport)
+        commands = { }
+        for name, extra in probes.items():
+            retcode, stdout, stderr = transport.execute([cls.__root__, '--terse', '--fields', _probe_field, *name.split(), *extra])
+            match = _allowed.search(stderr) or _allowed.search(stdout)
+            if match is not None: commands[name] = match.group(1).rstrip('.').split(',')
+        return cls(version, commands)
+
+    @classmethod
+    def Load(cls, path: str = None, transport=None, refresh: bool = False) -> 'Schema':
+        """
+            The schema of the installed nmcli: read from path when it was saved for this version, else discovered and saved.
+
+        :param path: the cache file; defaults to default_path(version)
+        :param refresh: discover again even if the cache file is current
+        """
+        version = cls.Version(transport)
+        path = path or cls.default_path(version)
+        if not refresh:
+            schema = cls.Read(path)
+            if schema is not None and schema.version == version and schema.commands: return schema
+
+        schema = cls.Discover(transport, version)
+        if not schema.commands: return schema  # every probe failed; try again on the next start
+        try:
+            schema.Save(path)
+        except OSError:
+            # the cache is an optimization; a read-only home only costs the probes on the next start
+            pass
+        return schema
+
+    @staticmethod
+    def _transport(transport):
+        """ transport (ROOT's by default) running nmcli with LC_ALL=C """
+        if transport is None:
+            from .base import ROOT
+            transport = ROOT.transport
+        c_locale = getattr(transport, 'c_locale', None)
+        return transport if c_locale is None else c_locale()
+
+    # -------------------------------------------------------------------------------- cache file
+
+    @staticmethod
+    def default_path(version: str) -> str:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        version = re.sub(r'[^\w.-]', '_', version)
+        return os.path.join(base, 'nmcli', f'schema-{version}.json')
+
+    @classmethod
+    def Read(cls, path: str) -> 'Schema' or None:
+        """ The schema saved at path; None when it is missing or unreadable. """
+        try:
+            with open(path, encoding='utf-8') as f:
+                d = json.load(f)
+            return cls(d['version'], d['commands'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def Save(self, path: str):
+        """ Writes the schema to path atomically; concurrent readers see the old file or the new one. """
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.schema-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.ToDict(), f, indent=1)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def ToDict(self) -> dict:
+        return { 'version': self.version, 'commands': self.commands }
+
+    # -------------------------------------------------------------------------------- lookups
+
+    def fields(self, command: str) -> [str] or None:
+        """ The allowed fields of command ('device status'), None when unknown """
+        return self.commands.get(command)
+
+    def lookup(self, argv: [str]) -> str or None:
+        """ The probed command an nmcli argv runs; 'connection show ID' (the details) is not one. """
+        words = command_words(argv)
+        for name in probes:
+            probe = name.split()
+            if words[:len(probe)] != probe: continue
+            if name == 'connection show' and self._positional(words[len(probe):]): return None
+            return name if name in self.commands else None
+        return None
+
+    @staticmethod
+    def _positional(words: [str]) -> bool:
+        args = iter(words)
+        for word in args:
+            if word == '--order': next(args, None)
+            elif not word.startswith('-'): return True
+        return False
+
+    def valid(self, argv: [str], fields: [str]) -> [str]:
+        """
+            fields without those the command does not accept; a property ('GENERAL.STATE') is accepted with its section.
+            When none is valid the fields are returned as they are, so nmcli reports the error.
+        """
+        name = self.lookup(argv)
+        if name is None: return fields
+
+        key = (name, tuple(fields))
+        sent = self._valid.get(key)
+        if sent is None:
+            allowed = self._allowed[name]
+            sent = [field for field in fields if field.lower() in _keywords or field.lower() in allowed or field.split('.', 1)[0].lower() in allowed]
+            sent = self._valid[key] = sent or list(fields)
+        return sent
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : nmcli {self.version}, {len(self.commands)} commands>"
@@ -1,17 +1,219 @@
 import re
+from collections.abc import Mapping
 
 anti_spacer = re.compile(r'(\s+)')
 
+# one field of a terse line (runs of anything but ':' and '\', or a backslash escape) and its separator
+_escaped_field = re.compile(r'((?:[^:\\]|\\.)*)(:?)')
+
+
+def unescape(value: str) -> str:
+    """ Drops nmcli's backslash escapes; '00\\:11' -> '00:11', 'a\\\\b' -> 'a\\b' """
+    if '\\' not in value: return value
+    return value.replace('\\\\', '\0').replace('\\', '').replace('\0', '\\')
+
+
+def split_terse(line: str) -> [str]:
+    """
+        Splits one line of `nmcli --terse` output into its unescaped values.
+
+        nmcli escapes ':' and '\\' inside values with a backslash; 'a\\:b:c\\\\d' -> ['a:b', 'c\\d']
+    """
+    if '\\' not in line: return line.split(':')
+    values = []
+    match = _escaped_field.match(line)
+    while True:
+        value, separator = match.groups()
+        values.append(unescape(value))
+        if not separator: return values
+        match = _escaped_field.match(line, match.end())
+
+
+class TerseParser(object):
+    """
+        Parses `nmcli --terse --fields <fields>` tabular output into rows keyed by field name, in one pass.
+
+        Built once per field list and shared; lines whose value count does not match the fields are skipped.
+    """
+    __slots__ = ['fields', '_width']
+    def __init__(self, fields: list or tuple):
+        self.fields = tuple(fields)
+        self._width = len(self.fields)
+
+    def rows(self, stdout: str) -> [list]:
+        """ The unescaped values of each row, without building dicts. """
+        width = self._width
+        if '\\' not in stdout:
+            return [values for values in (line.split(':') for line in stdout.splitlines()) if len(values) == width]
+        return [values for values in map(split_terse, stdout.splitlines()) if len(values) == width]
+
+    def __call__(self, stdout: str) -> [dict]:
+        fields = self.fields
+        return [dict(zip(fields, values)) for values in self.rows(stdout)]
+
+
+_terse_parsers = { }
+
+def terse_parser(fields: list or tuple) -> TerseParser:
+    """ The shared TerseParser of fields, built on first use """
+    key = tuple(fields)
+    parser = _terse_parsers.get(key)
+    if parser is None: parser = _terse_parsers[key] = TerseParser(key)
+    return parser
+
+
+def parse_terse(stdout: str, fields: list or tuple) -> [dict]:
+    """ parse_terse('eth0:ethernet', ['DEVICE', 'TYPE']) -> [{'DEVICE': 'eth0', 'TYPE': 'ethernet'}] """
+    return terse_parser(fields)(stdout)
+
 
 def row_parser(stdout: str, headers: list or tuple) -> dict:
-    l = []
-    for row in stdout.strip().split('\n'):
-        if any(header in row for header in headers): continue
-        l.append(row.split())
+    """ Two column terse output as { first column: second column } """
+    return { values[0]: values[1] for values in terse_parser(headers).rows(stdout) }
+
+
+
+class MultilineSection(Mapping):
+    """
+        The properties of one section of a multiline record (GENERAL, IP4, DHCP4, ... or connection, ipv4, ...).
+
+        Its lines are only split when the section is first read. Indexed keys are grouped into lists,
+        so IP4.ADDRESS[1] and IP4.ADDRESS[2] become section['ADDRESS'] == [first, second];
+        section['ADDRESS[2]'] still works.
+    """
+    __slots__ = ['name', '_text', '_values']
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self._text = text
+        self._values = None
+
+    @property
+    def properties(self) -> dict:
+        if self._values is None:
+            values = { }
+            prefix = self.name + '.'
+            skip = len(prefix)
+            for line in self._text.split('\n'):
+                key, separator, value = line.partition(':')
+                if not separator or not key.startswith(prefix): continue
+                value = value.strip()
+                prop = key[skip:].rstrip()
+                if prop.endswith(']'):
+                    prop = prop[:prop.rindex('[')]
+                    values.setdefault(prop, []).append(value)  # nmcli prints [1], [2], ... in order
+                else:
+                    values[prop] = value
+            self._values = values
+            self._text = None
+        return self._values
+
+    def __getitem__(self, prop: str) -> str or [str]:
+        if prop.endswith(']') and '[' in prop:
+            prop, index = prop[:-1].split('[', 1)
+            try:
+                return self.properties[prop][int(index) - 1]
+            except (IndexError, ValueError):
+                raise KeyError(f'{prop}[{index}]') from None
+        return self.properties[prop]
+
+    def __iter__(self):
+        return iter(self.properties)
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def ToDict(self) -> dict:
+        return { key: list(value) if isinstance(value, list) else value for key, value in self.properties.items() }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.name} : {'parsed' if self._values is not None else 'not parsed'}>"
+
+
+
+class MultilineRecord(Mapping):
+    """
+        One record of `nmcli --mode multiline` output (one device of `device show`, one profile of `connection show ID`).
+
+            record['GENERAL']['STATE']      -> '100 (connected)'
+            record['IP4']['ADDRESS']        -> ['192.168.1.219/24']
+            record['IP4.ADDRESS[1]']        -> '192.168.1.219/24'   (the flat nmcli key)
+
+        Sections are located with plain substring searches and only parsed when first read. Values are taken as
+        printed: nmcli only escapes ':' and '\\' in tabular terse output, so a backslash here is part of the value.
+    """
+    __slots__ = ['_text', '_names', '_sections']
+    _section_name = re.compile(r'^([^.:\n]+)\.', re.M)
+
+    def __init__(self, text: str):
+        self._text = '\n' + text.strip('\n')
+        self._names = None
+        self._sections = { }
+
+    def section(self, name: str) -> MultilineSection:
+        section = self._sections.get(name)
+        if section is None:
+            text = self._text
+            first = text.find(f'\n{name}.')
+            if first < 0: raise KeyError(name)
+            last = text.rfind(f'\n{name}.')  # nmcli prints a section's lines together
+            end = text.find('\n', last + 1)
+            section = self._sections[name] = MultilineSection(name, text[first + 1:end if end >= 0 else len(text)])
+        return section
+
+    def __getitem__(self, key: str) -> MultilineSection or str or [str]:
+        if '.' in key and key not in self._sections:
+            name, _, prop = key.partition('.')
+            return self.section(name)[prop]
+        return self.section(key)
+
+    def names(self) -> [str]:
+        if self._names is None:
+            self._names = list(dict.fromkeys(self._section_name.findall(self._text, 1)))
+        return self._names
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def ToDict(self) -> dict:
+        return { name: self.section(name).ToDict() for name in self.names() }
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} : {', '.join(self.names())}>"
+
+
+_boundaries = { }
+
+def split_records(stdout: str, boundary: str) -> [str]:
+    """ Splits multiline output into the text of each record; a record starts at every `boundary:` line. """
+    pattern = _boundaries.get(boundary)
+    if pattern is None: pattern = _boundaries[boundary] = re.compile(rf'^{re.escape(boundary)}:', re.M)
+    starts = [match.start() for match in pattern.finditer(stdout)]
+    if not starts: return [stdout] if stdout.strip() else []
+    return [stdout[start:end] for start, end in zip(starts, starts[1:] + [len(stdout)])]
+
+
+def parse_multiline(stdout: str, boundary: str = None) -> [MultilineRecord]:
+    """ Multiline output as lazy records; without a boundary the whole output is one record. """
+    if boundary is None: return [MultilineRecord(stdout)] if stdout.strip() else []
+    return [MultilineRecord(text) for text in split_records(stdout, boundary)]
+
+
+def multiline_parser(stdout: str, boundary: str) -> dict:
+    """ Multiline output as { value of the boundary line: MultilineRecord } """
     d = { }
-    for row in l:
-        key, value = row
-        d[key] = value
+    for text in split_records(stdout, boundary):
+        key = text.split('\n', 1)[0].partition(':')[2].strip()
+        d[key] = MultilineRecord(text)
     return d
 
 
@@ -20,8 +222,7 @@ def single_parser(stdout: str) -> dict:
     return dict(hostname=stdout.strip())
 
 
-def header_single_row_parser(stdout: str) -> dict:
-    l = []
-    for row in stdout.strip().split('\n'):
-        l.append(row.split())
-    return dict(zip(l[0], l[1]))
\ No newline at end of file
+def header_single_row_parser(stdout: str, headers: list or tuple) -> dict:
+    """ Single row terse output as { column: value } """
+    rows = parse_terse(stdout, headers)
+    return rows[0] if rows else { }
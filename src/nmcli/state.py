@@ -0,0 +1,233 @@
+"""
+    An in-memory copy of NetworkManager state, kept current by a long running `nmcli monitor`.
+
+        store = StateStore()
+        store.start()
+        nmcli.set_transport(store)
+
+        nmcli.devices.status()           # answered from memory
+        nmcli.connections.Show()         # answered from memory
+        nmcli.state.connectivity()       # answered from memory
+
+    The store is a Transport: device status, the connection list and networking connectivity are rendered from
+    memory and parsed by the commands as usual, so Results keep their shape. Everything else, and any read asking for
+    a field the store does not hold, goes to the wrapped transport. If the monitor process dies the store
+    resynchronizes from a fresh snapshot and starts a new monitor.
+"""
+import threading
+
+from .events import (MonitorStream, DeviceStateEvent, DeviceAddedEvent, DeviceRemovedEvent, DeviceConnectionEvent,
+                     ConnectionAddedEvent, ConnectionChangedEvent, ConnectionRemovedEvent, ConnectivityEvent, NetworkManagerStateEvent)
+from .standard_parsers import parse_terse
+from .transport import Transport, SubprocessTransport
+
+
+___all__ = ['StateStore']
+
+
+
+
+class StateStore(Transport):
+    __root__: str = 'nmcli'
+
+    # fields fetched in the snapshot; a read can ask for any subset of these
+    default_fields = {
+            'device status':           ['DEVICE', 'TYPE', 'STATE', 'CONNECTION'],
+            'connection show':         ['NAME', 'UUID', 'TYPE', 'DEVICE'],
+            'networking connectivity': ['CONNECTIVITY'],
+            }
+    snapshot_fields = {
+            'device status':   ['DEVICE', 'TYPE', 'STATE', 'CONNECTION', 'CON-UUID', 'CON-PATH', 'DBUS-PATH'],
+            'connection show': ['NAME', 'UUID', 'TYPE', 'TIMESTAMP', 'TIMESTAMP-REAL', 'AUTOCONNECT', 'READONLY', 'DBUS-PATH', 'ACTIVE', 'DEVICE', 'STATE', 'ACTIVE-PATH'],
+            }
+    # a device in one of these states has no connection
+    _idle_states = ('unmanaged', 'unavailable', 'disconnected', 'failed')
+
+    def __init__(self, transport: Transport = None, resync_delay: float = 1.0):
+        """
+        :param transport: where snapshots, the monitor and every unserved command go; defaults to the current ROOT.transport
+        :param resync_delay: seconds to wait before restarting a monitor that died
+        """
+        if transport is None:
+            from .base import ROOT
+            transport = ROOT.transport
+        self.transport = transport if transport is not self else SubprocessTransport()
+        self.resync_delay = resync_delay
+
+        self.devices = { }
+        self.connections = [ ]
+        self.connectivity = ''
+        self.version = 0
+
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._stream = None
+        self._thread = None
+        self.last_error = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, wait: float or None = 10.0) -> 'StateStore':
+        """ Starts the monitor thread. Blocks until the first snapshot is loaded, up to `wait` seconds (None waits forever, 0 not at all). """
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='nmcli-state-store', daemon=True)
+            self._thread.start()
+        if wait != 0: self._ready.wait(wait)
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        self._ready.clear()
+        stream = self._stream
+        if stream is not None: stream.close()
+        if self._thread is not None and self._thread is not threading.current_thread(): self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # -------------------------------------------------------------------------------- Transport
+
+    def execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        stdout = self._serve(command)
+        if stdout is None: return self.transport.execute(command) if timeout is None else self.transport.execute(command, timeout=timeout)
+        return 0, stdout, ''
+
+    async def async_execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        stdout = self._serve(command)
+        if stdout is None:
+            if timeout is None: return await self.transport.async_execute(command)
+            return await self.transport.async_execute(command, timeout=timeout)
+        return 0, stdout, ''
+
+    def open(self, command: [str]):
+        return self.transport.open(command)
+
+    async def async_open(self, command: [str]):
+        return await self.transport.async_open(command)
+
+    def _serve(self, command: [str]) -> str or None:
+        if not self._ready.is_set(): return None
+        request = self._match(command)
+        if request is None: return None
+
+        name, fields = request
+        fields = fields or self.default_fields[name]
+        with self._lock:
+            if name == 'device status': rows = list(self.devices.values())
+            elif name == 'connection show': rows = self.connections
+            else: rows = [{ 'CONNECTIVITY': self.connectivity }]
+            if rows and any(field not in rows[0] for field in fields): return None
+            return self._render(rows, fields)
+
+    # -------------------------------------------------------------------------------- snapshot
+
+    def _query(self, name: str) -> [dict]:
+        fields = self.snapshot_fields[name]
+        retcode, stdout, stderr = self.transport.execute([self.__root__, '--terse', '--fields', ','.join(fields), *name.split()])
+        if retcode != 0: raise RuntimeError(f"nmcli return {retcode} code. STDERR='{stderr}'")
+
+        return parse_terse(stdout, fields)
+
+    def _load_devices(self):
+        devices = { row['DEVICE']: row for row in self._query('device status') }
+        with self._lock:
+            self.devices = devices
+            self.version += 1
+
+    def _load_connections(self):
+        connections = self._query('connection show')
+        with self._lock:
+            self.connections = connections
+            self.version += 1
+
+    def _load_connectivity(self):
+        retcode, stdout, stderr = self.transport.execute([self.__root__, '--terse', 'networking', 'connectivity'])
+        if retcode != 0: raise RuntimeError(f"nmcli return {retcode} code. STDERR='{stderr}'")
+        with self._lock:
+            self.connectivity = stdout.strip()
+            self.version += 1
+
+    def resync(self):
+        """ Reloads every table from nmcli. """
+        self._load_devices()
+        self._load_connections()
+        self._load_connectivity()
+
+    # -------------------------------------------------------------------------------- monitor
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                # the monitor is started before the snapshot, so nothing that happens in between is missed
+                self._stream = MonitorStream([self.__root__, 'monitor'], self.transport.open([self.__root__, 'monitor']))
+                self.resync()
+                self._ready.set()
+                for event in self._stream:
+                    self._apply(event)
+            except Exception as e:
+                self.last_error = e
+            finally:
+                self._ready.clear()
+                if self._stream is not None: self._stream.close()
+                self._stream = None
+            self._stopping.wait(self.resync_delay)
+
+    def _apply(self, event):
+        if isinstance(event, NetworkManagerStateEvent):
+            if event.state == 'stopped': self._ready.clear()
+            elif event.state == 'running':
+                self.resync()
+                self._ready.set()
+
+        elif isinstance(event, ConnectivityEvent):
+            with self._lock:
+                self.connectivity = event.state
+                self.version += 1
+
+        elif isinstance(event, DeviceRemovedEvent):
+            with self._lock:
+                self.devices.pop(event.device, None)
+                self.version += 1
+
+        elif isinstance(event, DeviceAddedEvent):
+            self._load_devices()
+
+        elif isinstance(event, DeviceConnectionEvent):
+            with self._lock:
+                device = self.devices.get(event.device)
+                if device is not None:
+                    device['CONNECTION'] = event.connection
+                    device['CON-UUID'] = next((row['UUID'] for row in self.connections if row.get('NAME') == event.connection), '')
+                    self.version += 1
+            self._load_connections()
+
+        elif isinstance(event, DeviceStateEvent):
+            with self._lock:
+                device = self.devices.get(event.device)
+                if device is not None:
+                    device['STATE'] = event.state
+                    if event.state in self._idle_states:
+                        device['CONNECTION'] = device['CON-UUID'] = device['CON-PATH'] = ''
+                    self.version += 1
+
+            if device is None: self._load_devices()
+            elif event.state == 'connected' or event.state in self._idle_states: self._load_connections()
+
+        elif isinstance(event, ConnectionRemovedEvent):
+            # the monitor names the profile only; when several share the name, which one went is read back from nmcli
+            with self._lock:
+                named = [row for row in self.connections if row.get('NAME') == event.connection]
+                if len(named) == 1:
+                    self.connections = [row for row in self.connections if row is not named[0]]
+                    self.version += 1
+            if len(named) > 1: self._load_connections()
+
+        elif isinstance(event, (ConnectionAddedEvent, ConnectionChangedEvent)):
+            self._load_connections()
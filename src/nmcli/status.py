@@ -91,9 +91,9 @@ class NetworkControlCommand(ROOT):
         on = 'on'
         off = 'off'
         connectivity = 'connectivity'
-    def __init__(self):
+    def __init__(self, asynchronous: bool = False):
         # self.connectivity = _StatusConnectivityCommand(base=self.__base_command__)
-        pass
+        self._asynchronous = asynchronous
 
 
     def on(self) -> Result:
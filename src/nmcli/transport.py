@@ -0,0 +1,383 @@
+"""
+    Transports run a fully built nmcli argv and return (return code, stdout, stderr), the same triple ROOT.Shell always returned.
+
+    SubprocessTransport is the default and spawns nmcli.
+    DBusTransport answers the common reads (device status, connection show, general status) straight from
+    org.freedesktop.NetworkManager over the system bus, rendering nmcli's terse output so the usual parsers
+    produce the same Result shapes. Anything it does not know how to answer goes to its fallback transport.
+
+        nmcli.set_transport(DBusTransport())
+"""
+import copy
+import os
+import subprocess
+import time
+from functools import partial
+
+from .events import MAX_LINE_LENGTH
+
+
+___all__ = ['Transport', 'SubprocessTransport', 'DBusTransport']
+
+
+
+
+class Transport(object):
+    # noinspection PyMethodMayBeStatic
+    def execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        """ timeout: seconds after which a command still running is killed (subprocess.TimeoutExpired); only passed when set """
+        raise NotImplementedError()
+
+    async def async_execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        """ Defaults to running execute on the loop's executor. """
+        import asyncio
+        call = self.execute if timeout is None else partial(self.execute, timeout=timeout)
+        return await asyncio.get_running_loop().run_in_executor(None, call, command)
+
+    def execute_timed(self, command: [str], timeout: float = None) -> (int, str, str, dict):
+        """ execute, with the phases it can tell apart (spawn, wait, decode in seconds, stdout_bytes) in a dict; used when metrics are set """
+        if timeout is None: return (*self.execute(command), { })
+        return (*self.execute(command, timeout=timeout), { })
+
+    async def async_execute_timed(self, command: [str], timeout: float = None) -> (int, str, str, dict):
+        if timeout is None: return (*await self.async_execute(command), { })
+        return (*await self.async_execute(command, timeout=timeout), { })
+
+    def open(self, command: [str]) -> subprocess.Popen:
+        """ Starts a long running command (nmcli monitor) whose text stdout is read line by line. """
+        raise NotImplementedError()
+
+    async def async_open(self, command: [str]) -> 'asyncio.subprocess.Process':
+        raise NotImplementedError()
+
+    def __call__(self, command: [str]) -> (int, str, str):
+        return self.execute(command)
+
+    def c_locale(self) -> 'Transport':
+        """ This transport with nmcli's messages in English (LC_ALL=C), for output matched as text; itself unless it spawns nmcli """
+        return self
+
+    # helpers for transports that answer some reads themselves instead of running nmcli
+    default_fields = { }
+    aliases = { 'dev': 'device', 'con': 'connection', 'g': 'general', 'gen': 'general', 'n': 'networking', 'net': 'networking' }
+    default_commands = { 'device': 'status', 'connection': 'show', 'general': 'status' }
+
+    def _match(self, command: [str]) -> (str, [str]) or None:
+        """ Returns (request name, requested fields) when the argv is one of the reads named in default_fields. """
+        fields = None
+        words = []
+        args = iter(command[1:])
+        for arg in args:
+            if arg in ('--fields', '-f'):
+                fields = next(args, '').split(',')
+            elif arg in ('--terse', '-t'):
+                continue
+            elif arg.startswith('-'):
+                return None
+            else:
+                words.append(arg)
+
+        if not words: return None
+        words[0] = self.aliases.get(words[0], words[0])
+        if len(words) == 1 and words[0] in self.default_commands: words.append(self.default_commands[words[0]])
+        if len(words) != 2: return None
+
+        name = ' '.join(words)
+        if name not in self.default_fields: return None
+        if fields in (['all'], ['common']): fields = None
+        return name, fields
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace(':', '\\:')
+
+    def _render(self, rows: [dict], fields: [str]) -> str:
+        """ Renders rows the way `nmcli --terse --fields <fields>` prints them. """
+        return ''.join(':'.join(self._escape(row.get(field, '')) for field in fields) + '\n' for row in rows)
+
+
+
+class SubprocessTransport(Transport):
+    # the environment nmcli runs in; None inherits the process's
+    env: dict = None
+
+    def execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        """
+            Execute args and returns status code, stdout and stderr
+
+        Any exceptions in running subprocess are allowed to raise to caller; past timeout nmcli is killed and
+        subprocess.TimeoutExpired raised.
+        """
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.env)
+        stdout, stderr = self._communicate(process, timeout)
+        retcode = process.returncode
+
+        return retcode, stdout.decode(), stderr.decode()
+
+    async def async_execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        import asyncio
+        process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=self.env)
+        stdout, stderr = await self._async_communicate(process, command, timeout)
+        retcode = process.returncode
+
+        return retcode, stdout.decode(), stderr.decode()
+
+    def execute_timed(self, command: [str], timeout: float = None) -> (int, str, str, dict):
+        started = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.env)
+        spawned = time.perf_counter()
+        stdout, stderr = self._communicate(process, timeout)
+        exited = time.perf_counter()
+        retcode = process.returncode
+        timings = { 'spawn': spawned - started, 'wait': exited - spawned, 'stdout_bytes': len(stdout) }
+        stdout, stderr = stdout.decode(), stderr.decode()
+        timings['decode'] = time.perf_counter() - exited
+
+        return retcode, stdout, stderr, timings
+
+    async def async_execute_timed(self, command: [str], timeout: float = None) -> (int, str, str, dict):
+        import asyncio
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=self.env)
+        spawned = time.perf_counter()
+        stdout, stderr = await self._async_communicate(process, command, timeout)
+        exited = time.perf_counter()
+        retcode = process.returncode
+        timings = { 'spawn': spawned - started, 'wait': exited - spawned, 'stdout_bytes': len(stdout) }
+        stdout, stderr = stdout.decode(), stderr.decode()
+        timings['decode'] = time.perf_counter() - exited
+
+        return retcode, stdout, stderr, timings
+
+    @staticmethod
+    def _communicate(process: subprocess.Popen, timeout: float = None) -> (bytes, bytes):
+        try:
+            return process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+
+    @staticmethod
+    async def _async_communicate(process: 'asyncio.subprocess.Process', command: [str], timeout: float = None) -> (bytes, bytes):
+        import asyncio
+        if timeout is None: return await process.communicate()
+        try:
+            return await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            if process.returncode is None: process.kill()
+            await process.wait()
+            raise subprocess.TimeoutExpired(command, timeout) from None
+
+    def c_locale(self) -> 'SubprocessTransport':
+        transport = copy.copy(self)
+        transport.env = dict(self.env or os.environ, LC_ALL='C')
+        return transport
+
+    # monitor lines are matched against nmcli's English messages, so the locale is pinned
+    _monitor_env = dict(os.environ, LC_ALL='C')
+
+    def open(self, command: [str]) -> subprocess.Popen:
+        return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=self._monitor_env, universal_newlines=True, bufsize=1)
+
+    async def async_open(self, command: [str]) -> 'asyncio.subprocess.Process':
+        import asyncio
+        return await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, env=self._monitor_env, limit=MAX_LINE_LENGTH)
+
+
+
+
+
+class DBusTransport(Transport):
+    """
+        Serves `device status`, `connection show` (the profile list) and `general status` over D-Bus.
+
+        address selects the bus (defaults to the system bus), so it can be pointed at a mock bus service.
+        Other commands, or any read that fails on the bus, are passed to fallback (a SubprocessTransport by default).
+        A read given a timeout raises subprocess.TimeoutExpired when the bus has not answered it by then, as nmcli would.
+    """
+    service = 'org.freedesktop.NetworkManager'
+    path = '/org/freedesktop/NetworkManager'
+    settings_path = '/org/freedesktop/NetworkManager/Settings'
+
+    nm_states = {
+            0:  'unknown',
+            10: 'asleep',
+            20: 'disconnected',
+            30: 'disconnecting',
+            40: 'connecting',
+            50: 'connected (local only)',
+            60: 'connected (site only)',
+            70: 'connected',
+            }
+    connectivity_states = { 0: 'unknown', 1: 'none', 2: 'portal', 3: 'limited', 4: 'full' }
+    device_states = {
+            0:   'unknown',
+            10:  'unmanaged',
+            20:  'unavailable',
+            30:  'disconnected',
+            40:  'connecting (prepare)',
+            50:  'connecting (configuring)',
+            60:  'connecting (need authentication)',
+            70:  'connecting (getting IP configuration)',
+            80:  'connecting (checking IP connectivity)',
+            90:  'connecting (starting secondary connections)',
+            100: 'connected',
+            110: 'deactivating',
+            120: 'failed',
+            }
+    device_types = {
+            0:  'unknown',
+            1:  'ethernet',
+            2:  'wifi',
+            5:  'bt',
+            6:  'olpc-mesh',
+            7:  'wimax',
+            8:  'gsm',
+            9:  'infiniband',
+            10: 'bond',
+            11: 'vlan',
+            12: 'adsl',
+            13: 'bridge',
+            14: 'generic',
+            15: 'team',
+            16: 'tun',
+            17: 'ip-tunnel',
+            18: 'macvlan',
+            19: 'vxlan',
+            20: 'veth',
+            21: 'macsec',
+            22: 'dummy',
+            23: 'ppp',
+            24: 'ovs-interface',
+            25: 'ovs-port',
+            26: 'ovs-bridge',
+            27: 'wpan',
+            28: '6lowpan',
+            29: 'wireguard',
+            30: 'wifi-p2p',
+            31: 'vrf',
+            32: 'loopback',
+            }
+
+    # default terse columns when no --fields are passed, as printed by nmcli
+    default_fields = {
+            'general status': ['STATE', 'CONNECTIVITY', 'WIFI-HW', 'WIFI', 'WWAN-HW', 'WWAN'],
+            'device status':  ['DEVICE', 'TYPE', 'STATE', 'CONNECTION'],
+            'connection show':  ['NAME', 'UUID', 'TYPE', 'DEVICE'],
+            }
+
+    def __init__(self, address: str = None, fallback: Transport = None, timeout: float = 5.0):
+        from .bus import DBusConnection, DBusError  # the bus client is only loaded when D-Bus is used
+        self.bus = DBusConnection(address, timeout=timeout)
+        self._errors = (DBusError, OSError, ConnectionError)
+        self.fallback = fallback or SubprocessTransport()
+
+    def c_locale(self) -> 'DBusTransport':
+        transport = copy.copy(self)
+        transport.fallback = self.fallback.c_locale()
+        return transport
+
+    def open(self, command: [str]) -> subprocess.Popen:
+        return self.fallback.open(command)
+
+    async def async_open(self, command: [str]) -> 'asyncio.subprocess.Process':
+        return await self.fallback.async_open(command)
+
+    def execute(self, command: [str], timeout: float = None) -> (int, str, str):
+        fallback = self.fallback.execute if timeout is None else partial(self.fallback.execute, timeout=timeout)
+        request = self._match(command)
+        if request is None: return fallback(command)
+
+        name, fields = request
+        read = getattr(self, '_' + name.replace(' ', '_'))
+        started = time.monotonic()
+        try:
+            if timeout is None: rows = read()
+            else:
+                with self.bus.Deadline(timeout):
+                    rows = read()
+        except self._errors:
+            # a bus that did not answer within the caller's timeout is not given a second chance through nmcli
+            if timeout is not None and time.monotonic() - started >= timeout: raise subprocess.TimeoutExpired(command, timeout) from None
+            return fallback(command)
+
+        fields = fields or self.default_fields[name]
+        for field in fields:
+            if rows and field not in rows[0]:
+                return 2, '', f"Error: invalid field '{field}'.\n"
+        return 0, self._render(rows, fields), ''
+
+    @staticmethod
+    def _enabled(value: bool) -> str:
+        return 'enabled' if value else 'disabled'
+
+    def _properties(self, path: str, interface: str) -> dict:
+        return self.bus.GetAllProperties(self.service, path, interface)
+
+    def _general_status(self) -> [dict]:
+        nm = self._properties(self.path, self.service)
+        return [{
+                'RUNNING':      'running',
+                'VERSION':      nm.get('Version', ''),
+                'STATE':        self.nm_states.get(nm.get('State', 0), 'unknown'),
+                'STARTUP':      'starting' if nm.get('Startup') else 'started',
+                'CONNECTIVITY': self.connectivity_states.get(nm.get('Connectivity', 0), 'unknown'),
+                'NETWORKING':   self._enabled(nm.get('NetworkingEnabled')),
+                'WIFI-HW':      self._enabled(nm.get('WirelessHardwareEnabled')),
+                'WIFI':         self._enabled(nm.get('WirelessEnabled')),
+                'WWAN-HW':      self._enabled(nm.get('WwanHardwareEnabled')),
+                'WWAN':         self._enabled(nm.get('WwanEnabled')),
+                }]
+
+    def _active_connection(self, path: str) -> dict:
+        if not path or path == '/': return { }
+        return self._properties(path, f'{self.service}.Connection.Active')
+
+    def _device_status(self) -> [dict]:
+        rows = []
+        devices, = self.bus.Call(self.service, self.path, self.service, 'GetDevices')
+        for path in devices:
+            device = self._properties(path, f'{self.service}.Device')
+            active = self._active_connection(device.get('ActiveConnection'))
+            rows.append({
+                    'DEVICE':     device.get('Interface', ''),
+                    'TYPE':       self.device_types.get(device.get('DeviceType', 0), 'unknown'),
+                    'STATE':      self.device_states.get(device.get('State', 0), 'unknown'),
+                    'CONNECTION': active.get('Id', ''),
+                    'CON-UUID':   active.get('Uuid', ''),
+                    'CON-PATH':   active.get('Connection', ''),
+                    'DBUS-PATH':  path,
+                    })
+        return rows
+
+    def _connection_show(self) -> [dict]:
+        active = { }
+        for path in self.bus.GetProperty(self.service, self.path, self.service, 'ActiveConnections'):
+            properties = self._active_connection(path)
+            devices = [self.bus.GetProperty(self.service, device, f'{self.service}.Device', 'Interface') for device in properties.get('Devices', [])]
+            active[properties.get('Connection')] = (path, properties, ','.join(devices))
+
+        rows = []
+        connections, = self.bus.Call(self.service, self.settings_path, f'{self.service}.Settings', 'ListConnections')
+        for path in connections:
+            settings, = self.bus.Call(self.service, path, f'{self.service}.Settings.Connection', 'GetSettings')
+            connection = settings.get('connection', { })
+            timestamp = connection.get('timestamp', 0)
+            active_path, properties, devices = active.get(path, ('', { }, ''))
+            rows.append({
+                    'NAME':           connection.get('id', ''),
+                    'UUID':           connection.get('uuid', ''),
+                    'TYPE':           connection.get('type', ''),
+                    'TIMESTAMP':      str(timestamp),
+                    'TIMESTAMP-REAL': time.strftime('%a %d %b %Y %I:%M:%S %p %Z', time.localtime(timestamp)) if timestamp else 'never',
+                    'AUTOCONNECT':    'yes' if connection.get('autoconnect', True) else 'no',
+                    'READONLY':       'yes' if connection.get('read-only', False) else 'no',
+                    'DEVICE':         devices,
+                    'ACTIVE':         'yes' if active_path else 'no',
+                    'STATE':          { 1: 'activating', 2: 'activated', 3: 'deactivating' }.get(properties.get('State'), ''),
+                    'DBUS-PATH':      path,
+                    'ACTIVE-PATH':    active_path,
+                    'FILENAME':       '',
+                    })
+        return rows